@@ -1,49 +1,292 @@
 # filepath: /home/fuad/My_Works/NFL_Sportsradar_API_SMT/App/api/api_routes.py
-from fastapi import APIRouter, HTTPException, Path, Depends
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Path, Depends, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Dict, Any, Union, get_args, get_origin
 from datetime import datetime, timedelta
+import asyncio
+import time
 import functools
+import inspect
+import orjson
 
-from App.services.nfl_service import nfl_service
+from App.core.request_context import is_stale, set_response_header
+from App.core.metrics import CACHE_REQUESTS, CACHE_ENTRIES, CACHE_SIZE_BYTES, CACHE_EVICTIONS
+from App.core.timing import Timings, current_timings, span, log_if_slow
+from App.services.nfl_service import nfl_service, nfl_passthrough_service, UpstreamPayload, refresh_listeners_idle, forget_supersets
 from App.models.schemas import ErrorResponse
 from App.services.Nfl_query_service import nfl_query_service
+from App.services.change_feed import change_feeds
+from App.services.live_updates import live_updates
+from App.services.snapshot_store import snapshot_store
+from App.services.player_view import player_view
+from App.services.nfl_calendar import nfl_calendar
+from App.services.ttl_policy import ttl_policy
+from App.services.popularity import popularity, prefetcher
+from App.services.query_jobs import query_jobs
+from App.services.cluster import cluster, matches
+from App.api.route_params import canonical_params
 from App.models.schemas import NFLQuery, NFLQueryResponse, ErrorResponse, TeamResponse, NewsArticle
+from App.models.schemas import BatchRequest, BatchResourceRequest, BatchResponse
+from App.models.schemas import NFLQueryBatch, NFLQueryBatchResponse, ChangeFeedResponse, QueryJobResponse
+from App.core.config import settings
 
 # Simple in-memory cache for API responses
 cache = {}
+cache_sizes = {}  # Approximate JSON size of each cached value, for metrics
 CACHE_EXPIRY = timedelta(minutes=15)  # Cache expiry time
 
-def with_cache(expiry: Optional[timedelta] = None):
+BATCH_MAX_RESOURCES = 20  # Maximum number of resources in one /nfl/batch request
+
+def with_cache(expiry: Optional[timedelta] = None, week_scoped: bool = False,
+               min_expiry: Optional[timedelta] = None, max_expiry: Optional[timedelta] = None,
+               game_window_expiry: Optional[timedelta] = None):
     """
     Decorator to cache API responses
     
+    Upstream payloads are cached as their raw bytes and served as-is. The decorated route gets
+    cached_call (the cached value, for callers that need the data), refresh (fetch and cache
+    anew regardless of expiry) and request_key (a call's cache key) attributes.
+    
     Args:
         expiry: Optional time delta for cache expiry (default: 15 minutes)
+        week_scoped: Whether the route's data is for the current NFL week, in which case the week
+            is part of the cache key and entries stop being served when a new week starts
+        min_expiry: Shortest adaptive expiry, see ttl_policy (default: a quarter of expiry)
+        max_expiry: Longest adaptive expiry, see ttl_policy (default: four times expiry)
+        game_window_expiry: Cap on the expiry while games are in progress, for data that moves
+            during games; entries fetched before the current games kicked off are not served
     """
     if expiry is None:
         expiry = CACHE_EXPIRY
         
     def decorator(func):
-        @functools.wraps(func)
-        async def wrapper(*args, **kwargs):
+        signature = inspect.signature(func)
+        ttl_policy.register(func.__name__, expiry, min_expiry, max_expiry, game_window_expiry)
+        history_params = [name for name in HISTORY_PARAMETERS if name not in signature.parameters]
+        
+        def split_history(kwargs):
+            history = {name: kwargs.pop(name, None) for name in history_params}
+            return history.get("as_of"), history.get("week")
+        
+        def cache_key(kwargs):
+            key = _make_cache_key(func.__name__, (), kwargs)
+            if week_scoped:
+                nfl_calendar.ensure_fresh()
+                season, week = nfl_calendar.week()
+                key = f"{key}:week={season}-{week}"
+            return key
+        
+        def request_key(*args, **kwargs):
+            """The cache key of a live call, bound and canonicalized as cached_call does it"""
+            split_history(kwargs)
+            return cache_key(canonical_params(func.__name__, signature, args, kwargs))
+        
+        async def cached_call(*args, **kwargs):
+            as_of, week = split_history(kwargs)
+            # Validate and normalize before building the key (see route_params): format=PPR and
+            # format=ppr share an entry, and bad values are a 422 that never reaches upstream
+            kwargs = canonical_params(func.__name__, signature, args, kwargs)
+            args = ()
+            if as_of is not None or week is not None:
+                return await _from_snapshot(func.__name__, kwargs, as_of, week)
+            
+            await _sync_invalidations()
+            
             # Create a cache key from function name and arguments
-            key = f"{func.__name__}:{str(args)}:{str(kwargs)}"
+            key = cache_key(kwargs)
+            # Popular keys are refreshed in the background before they expire (see popularity)
+            popularity.record(key, functools.partial(refresh, **kwargs))
             
             # Check if we have a cached response and it's still valid
+            expired = False
             if key in cache:
                 timestamp, value = cache[key]
-                if datetime.now() - timestamp < expiry:
+                if ttl_policy.is_fresh(func.__name__, timestamp):
+                    CACHE_REQUESTS.labels(func.__name__, "hit").inc()
                     return value
+                expired = True
             
             # Call the original function if no cache hit
             result = await func(*args, **kwargs)
             
-            # Cache the result
-            cache[key] = (datetime.now(), result)
+            # Cache the result, unless it is a stale fallback served while upstream is down
+            if is_stale():
+                CACHE_REQUESTS.labels(func.__name__, "stale").inc()
+            else:
+                CACHE_REQUESTS.labels(func.__name__, "miss").inc()
+                if expired:
+                    CACHE_EVICTIONS.labels(func.__name__, "expired").inc()
+                body = _encode_value(result)
+                _observe_content(func.__name__, key, body)
+                _store_in_cache(key, result, body)
+                _save_snapshot(func.__name__, kwargs, result, body)
             return result
+        
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            value = await cached_call(*args, **kwargs)
+            if isinstance(value, UpstreamPayload):
+                # Skip response model validation and re-encoding of data we never changed
+                return Response(content=value.raw, media_type="application/json")
+            return value
+        
+        async def refresh(*args, **kwargs):
+            split_history(kwargs)
+            kwargs = canonical_params(func.__name__, signature, args, kwargs)
+            args = ()
+            await _sync_invalidations()
+            key = cache_key(kwargs)
+            result = await func(*args, **kwargs)
+            if not is_stale():
+                CACHE_REQUESTS.labels(func.__name__, "refresh").inc()
+                body = _encode_value(result)
+                _observe_content(func.__name__, key, body)
+                _store_in_cache(key, result, body)
+                _save_snapshot(func.__name__, kwargs, result, body)
+            return result
+        
+        # Advertise the history parameters to FastAPI and document them with the route's own
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(), *(HISTORY_PARAMETERS[name] for name in history_params)
+        ])
+        wrapper.__doc__ = (func.__doc__ or "").rstrip() + "\n" + "".join(
+            HISTORY_PARAMETER_DOCS[name] for name in history_params
+        )
+        wrapper.cached_call = cached_call
+        wrapper.refresh = refresh
+        wrapper.request_key = request_key
         return wrapper
     return decorator
 
+# Time-travel parameters added to every cached route (as_of only, for routes that already pass a
+# week upstream). Every fresh value is kept in the snapshot store, and these answer from it
+HISTORY_PARAMETERS = {
+    "as_of": inspect.Parameter("as_of", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Optional[datetime]),
+    "week": inspect.Parameter("week", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Optional[int]),
+}
+HISTORY_PARAMETER_DOCS = {
+    "as_of": "    - **as_of**: Optional ISO 8601 time; serve the latest stored snapshot fetched at or before it\n",
+    "week": "    - **week**: Optional NFL week; serve the latest stored snapshot from that week of the season\n",
+}
+
+def _as_timestamp(value: Any) -> Optional[float]:
+    """Epoch seconds for an as_of value given as a datetime, ISO 8601 string or number"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Invalid as_of time: {value}")
+    return value.timestamp()
+
+async def _from_snapshot(source: str, params: Dict[str, Any], as_of: Any, week: Optional[int]) -> Any:
+    """
+    Answer a cached route from the snapshot store
+    
+    Raises:
+        HTTPException: 404 if no snapshot matches
+    """
+    loop = asyncio.get_running_loop()
+    entry = await loop.run_in_executor(None, snapshot_store.find, source, params, _as_timestamp(as_of), week)
+    try:
+        body = None if entry is None else await loop.run_in_executor(None, snapshot_store.load, entry)
+    except FileNotFoundError:
+        body = None  # Removed by a compaction since this worker last read the index
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"No stored snapshot of {source} with {params} for that time")
+    set_response_header("X-Snapshot-Fetched-At", datetime.fromtimestamp(entry["fetched_at"]).isoformat())
+    payload = UpstreamPayload(body)
+    return payload if entry["passthrough"] else payload.data
+
+def _encode_value(value: Any) -> Optional[bytes]:
+    """
+    JSON body of a freshly fetched value (an upstream payload's raw bytes), encoded once and
+    shared by the TTL policy, the cache size gauge and the snapshot store; None if unencodable
+    """
+    if isinstance(value, UpstreamPayload):
+        return value.raw
+    try:
+        return orjson.dumps(value)
+    except TypeError:
+        return None
+
+def _save_snapshot(source: str, params: Dict[str, Any], value: Any, body: Optional[bytes]):
+    """Write a freshly fetched value's body to the snapshot store without blocking the event loop"""
+    if not settings.SNAPSHOT_ENABLED or body is None:
+        return
+    passthrough = isinstance(value, UpstreamPayload)
+    write = asyncio.get_running_loop().run_in_executor(None, snapshot_store.save, source, dict(params), body, passthrough)
+    write.add_done_callback(functools.partial(_snapshot_written, source))
+
+def _snapshot_written(source: str, write: asyncio.Future):
+    """Report a failed snapshot write, which would otherwise be lost with its unawaited future"""
+    if not write.cancelled() and write.exception() is not None:
+        print(f"Could not store snapshot of {source}: {write.exception()!r}")
+
+def _cached_data(value: Any) -> Any:
+    """The data behind a cached value, parsing an upstream payload if needed"""
+    return value.data if isinstance(value, UpstreamPayload) else value
+
+def _make_cache_key(name: str, args: tuple, kwargs: dict) -> str:
+    """Cache key for one call of a cached route, independent of keyword argument order"""
+    return f"{name}:{str(args)}:{str(sorted(kwargs.items()))}"
+
+def _time_left(key: str) -> Optional[float]:
+    """Seconds until a cache entry expires (0 if it already has), or None if it isn't cached"""
+    if key not in cache:
+        return None
+    timestamp, _ = cache[key]
+    namespace = key.split(":", 1)[0]
+    if not ttl_policy.is_fresh(namespace, timestamp):
+        return 0.0
+    return max(0.0, timestamp.timestamp() + ttl_policy.expiry(namespace).total_seconds() - time.time())
+
+def start_prefetcher():
+    """Start keeping the most requested cache keys warm"""
+    prefetcher.start(_time_left)
+
+def _observe_content(namespace: str, key: str, body: Optional[bytes]):
+    """Let the TTL policy compare freshly fetched content with the previous fetch of the key"""
+    if body is not None:
+        ttl_policy.observe(namespace, key, body)
+
+def _store_in_cache(key: str, value: Any, body: Optional[bytes]):
+    """Store a value (and the size of its encoded body) in the cache, keeping the gauges current"""
+    size = len(body) if body is not None else 0
+    previous = cache_sizes.get(key)
+    if previous is None:
+        CACHE_ENTRIES.inc()
+    else:
+        CACHE_SIZE_BYTES.dec(previous)
+    cache[key] = (datetime.now(), value)
+    cache_sizes[key] = size
+    CACHE_SIZE_BYTES.inc(size)
+
+def _clear_cache(namespace: Optional[str] = None, pattern: Optional[str] = None) -> int:
+    """
+    Drop the cached entries of a route (by function name) and/or whose key matches a glob
+    pattern, or every entry when neither is given; returns how many were dropped
+    """
+    cleared = [key for key in cache if matches(key, namespace, pattern)]
+    for key in cleared:
+        CACHE_EVICTIONS.labels(key.split(":", 1)[0], "cleared").inc()
+        del cache[key]
+        CACHE_SIZE_BYTES.dec(cache_sizes.pop(key, 0))
+    CACHE_ENTRIES.set(len(cache))
+    return len(cleared)
+
+async def _sync_invalidations():
+    """Apply the cache clears other workers have made since the last check"""
+    if cluster.enabled:
+        entries = await cluster.poll_invalidations()
+        for entry in entries:
+            _clear_cache(entry.get("namespace"), entry.get("pattern"))
+        if entries:
+            forget_supersets()
+
 router = APIRouter(prefix="/nfl", tags=["NFL Data"])
 
 @router.get("/teams", response_model=List[TeamResponse], summary="Get NFL Teams List")
@@ -60,15 +303,28 @@ async def get_schedule():
     """
     Retrieve the current regular season schedule.
     """
-    return await nfl_service.get_schedule()
+    return await nfl_passthrough_service.get_schedule()
 
 @router.delete("/cache", summary="Clear API Cache")
-async def clear_cache():
+async def clear_cache(endpoint: Optional[str] = None, pattern: Optional[str] = None):
     """
-    Clear all cached API responses.
+    Clear cached API responses, in every worker.
+    
+    - **endpoint**: Only clear this route's entries (its path, e.g. adp or /nfl/adp)
+    - **pattern**: Only clear entries whose cache key matches this glob pattern (e.g. *'format', 'ppr'*)
+    
+    With neither, every cached response is cleared.
     """
-    cache.clear()
-    return {"message": "Cache cleared successfully"}
+    namespace = None
+    if endpoint is not None:
+        namespace = _cached_route_names().get(endpoint.strip("/").removeprefix(router.prefix.strip("/") + "/"))
+        if namespace is None:
+            raise HTTPException(status_code=422, detail=f"Unknown cached endpoint: {endpoint}")
+    cleared = _clear_cache(namespace, pattern)
+    forget_supersets()
+    if cluster.enabled:
+        await asyncio.get_running_loop().run_in_executor(None, cluster.invalidate, namespace, pattern)
+    return {"message": f"Cache cleared successfully ({cleared} entries in this worker)"}
 
 
 @router.get("/standings", response_model=dict, summary="Get NFL Standings")
@@ -77,10 +333,10 @@ async def get_standings():
     """
     Retrieve the current regular-season standings for all NFL teams including their rankings within their division and conference.
     """
-    return await nfl_service.get_standings()
+    return await nfl_passthrough_service.get_standings()
 
 @router.get("/injuries", response_model=dict, summary="Get Injury Reports")
-@with_cache(timedelta(hours=6))
+@with_cache(timedelta(hours=6), week_scoped=True, game_window_expiry=timedelta(minutes=5))
 async def get_weekly_injuries(season: Optional[int] = None, week: Optional[int] = None):
     """
     Retrieve injury reports for all NFL teams.
@@ -88,7 +344,7 @@ async def get_weekly_injuries(season: Optional[int] = None, week: Optional[int]
     - **season**: Optional season year (e.g., 2024 or 2023)
     - **week**: Optional week number (1-18)
     """
-    return await nfl_service.get_weekly_injuries(season, week)
+    return await nfl_passthrough_service.get_weekly_injuries(season, week)
 
 
 @router.get("/draft-rankings", response_model=dict, summary="Get NFL Draft Rankings")
@@ -98,8 +354,11 @@ async def get_draft_rankings(format: str = "std"):
     Retrieve draft rankings and injury risk for the current season.
     
     - **format**: The scoring format (std = standard scoring, ppr = point per reception, half = half-point-ppr, superflex = Superflex 2 QB)
+    
+    With variant derivation enabled, ppr and half rankings are the standard rankings re-ordered
+    by that format's projected points, not the experts' rankings for the format.
     """
-    return await nfl_service.get_draft_rankings(format)
+    return await nfl_passthrough_service.get_draft_rankings(format)
 
 @router.get("/player-tiers", response_model=dict, summary="Get NFL Player Tiers")
 @with_cache(timedelta(hours=6))
@@ -109,7 +368,7 @@ async def get_player_tiers(format: str = "std"):
     
     - **format**: The scoring format (std = standard scoring, ppr = point per reception)
     """
-    return await nfl_service.get_player_tiers(format)
+    return await nfl_passthrough_service.get_player_tiers(format)
 
 @router.get("/auction-values", response_model=dict, summary="Get Auction Values")
 @with_cache(timedelta(hours=6))
@@ -121,7 +380,7 @@ async def get_auction_values(teams: int = 12, budget: int = 200, format: str = "
     - **budget**: League budget (default: 200)
     - **format**: Scoring format (std, ppr)
     """
-    return await nfl_service.get_auction_values(teams, budget, format)
+    return await nfl_passthrough_service.get_auction_values(teams, budget, format)
 
 @router.get("/adp", response_model=dict, summary="Get Average Draft Position")
 @with_cache(timedelta(hours=6))
@@ -132,7 +391,7 @@ async def get_adp(teams: int = 12, format: str = "std"):
     - **teams**: Number of teams in the league (8, 10, 12, 14, 16)
     - **format**: Scoring format (std, ppr, half, superflex)
     """
-    return await nfl_service.get_adp(teams, format)
+    return await nfl_passthrough_service.get_adp(teams, format)
 
 @router.get("/best-ball", response_model=dict, summary="Get Best Ball Rankings")
 @with_cache(timedelta(hours=12))
@@ -140,7 +399,7 @@ async def get_best_ball_rankings():
     """
     Retrieve Best Ball rankings for the upcoming NFL season.
     """
-    return await nfl_service.get_best_ball_rankings()
+    return await nfl_passthrough_service.get_best_ball_rankings()
 
 @router.get("/bye-weeks", response_model=dict, summary="Get Bye Weeks")
 @with_cache(timedelta(hours=24))
@@ -148,7 +407,7 @@ async def get_bye_weeks():
     """
     Retrieve bye weeks for the current season.
     """
-    return await nfl_service.get_bye_weeks()
+    return await nfl_passthrough_service.get_bye_weeks()
 
 @router.get("/defense-rankings", response_model=dict, summary="Get Defensive Rankings")
 @with_cache(timedelta(hours=12))
@@ -156,33 +415,36 @@ async def get_defensive_rankings():
     """
     Retrieve defensive rankings for all NFL teams.
     """
-    return await nfl_service.get_defensive_rankings()
+    return await nfl_passthrough_service.get_defensive_rankings()
 
 @router.get("/depth", response_model=dict, summary="Get Depth Charts")
-@with_cache(timedelta(hours=12))
+@with_cache(timedelta(hours=12), game_window_expiry=timedelta(minutes=15))
 async def get_depth_charts():
     """
     Retrieve current depth charts for all NFL teams.
     """
-    return await nfl_service.get_depth_charts()
+    return await nfl_passthrough_service.get_depth_charts()
 
 @router.get("/weekly-projections", response_model=dict, summary="Get Weekly Projections")
-@with_cache(timedelta(hours=3))
+@with_cache(timedelta(hours=3), week_scoped=True, game_window_expiry=timedelta(minutes=10))
 async def get_weekly_projections():
     """
     Retrieve weekly projections for Weeks 1-18.
     """
-    return await nfl_service.get_weekly_projections()
+    return await nfl_passthrough_service.get_weekly_projections()
 
 @router.get("/weekly-rankings", response_model=dict, summary="Get Weekly Rankings")
-@with_cache(timedelta(hours=3))
+@with_cache(timedelta(hours=3), week_scoped=True, game_window_expiry=timedelta(minutes=10))
 async def get_weekly_rankings(format: str = "std"):
     """
     Retrieve current weekly rankings including projected points.
     
     - **format**: Scoring format (std, ppr, half)
+    
+    With variant derivation enabled, ppr and half rankings are the standard rankings re-ordered
+    by that format's projected points, not the experts' rankings for the format.
     """
-    return await nfl_service.get_weekly_rankings(format)
+    return await nfl_passthrough_service.get_weekly_rankings(format)
 
 @router.get("/dynasty", response_model=dict, summary="Get Dynasty Rankings")
 @with_cache(timedelta(hours=24))
@@ -190,10 +452,10 @@ async def get_dynasty_rankings():
     """
     Retrieve consensus dynasty rankings.
     """
-    return await nfl_service.get_dynasty_rankings()
+    return await nfl_passthrough_service.get_dynasty_rankings()
 
 @router.get("/news", response_model=List[NewsArticle], summary="Get NFL News")
-@with_cache(timedelta(hours=1))
+@with_cache(timedelta(hours=1), game_window_expiry=timedelta(minutes=5))
 async def get_nfl_news():
     """
     Retrieve current player and team news with fantasy analysis.
@@ -201,7 +463,7 @@ async def get_nfl_news():
     return await nfl_service.get_nfl_news()
 
 @router.get("/fantasy-leaders", response_model=dict, summary="Get Fantasy Leaders")
-@with_cache(timedelta(hours=3))
+@with_cache(timedelta(hours=3), game_window_expiry=timedelta(minutes=5))
 async def get_fantasy_leaders(format: str = "std", position: str = "ALL", week: int = 0):
     """
     Retrieve weekly and season leaders by total fantasy points.
@@ -210,7 +472,7 @@ async def get_fantasy_leaders(format: str = "std", position: str = "ALL", week:
     - **position**: Position filter (ALL, QB, RB, WR, TE, FLEX, K, IDP)
     - **week**: Week number (0 for entire season, 1-18 for specific week)
     """
-    return await nfl_service.get_fantasy_leaders(format, position, week)
+    return await nfl_passthrough_service.get_fantasy_leaders(format, position, week)
 
 @router.get("/players", response_model=dict, summary="Get NFL Players")
 @with_cache(timedelta(hours=24))
@@ -220,23 +482,23 @@ async def get_players(include_inactive: bool = False):
     
     - **include_inactive**: Set to True to include inactive players
     """
-    return await nfl_service.get_players(include_inactive)
+    return await nfl_passthrough_service.get_players(include_inactive)
 
 @router.get("/add-drops", response_model=dict, summary="Get Player Adds and Drops")
-@with_cache(timedelta(hours=3))
+@with_cache(timedelta(hours=3), week_scoped=True, game_window_expiry=timedelta(minutes=10))
 async def get_player_adds_drops():
     """
     Retrieve the players most added and dropped over the previous 48 hours across all Yahoo, ESPN, CBS Sports, and Sleeper leagues.
     """
-    return await nfl_service.get_player_adds_drops()
+    return await nfl_passthrough_service.get_player_adds_drops()
 
 @router.get("/weather", response_model=dict, summary="Get Weather Forecasts")
-@with_cache(timedelta(hours=3))
+@with_cache(timedelta(hours=3), week_scoped=True, game_window_expiry=timedelta(minutes=15))
 async def get_weather_forecasts():
     """
     Retrieve the weather forecasts for all NFL teams.
     """
-    return await nfl_service.get_weather_forecasts()
+    return await nfl_passthrough_service.get_weather_forecasts()
 
 @router.get("/draft-projections", response_model=dict, summary="Get Draft Projections")
 @with_cache(timedelta(hours=24))
@@ -244,7 +506,7 @@ async def get_draft_projections():
     """
     Retrieve draft projections for the upcoming season.
     """
-    return await nfl_service.get_draft_projections()
+    return await nfl_passthrough_service.get_draft_projections()
 
 @router.get("/ros", response_model=dict, summary="Get Rest of Season Projections")
 @with_cache(timedelta(hours=6))
@@ -252,10 +514,10 @@ async def get_rest_of_season_projections():
     """
     Retrieve rest of season (ROS) projections for all skill and IDP players.
     """
-    return await nfl_service.get_rest_of_season_projections()
+    return await nfl_passthrough_service.get_rest_of_season_projections()
 
 @router.get("/dfs", response_model=dict, summary="Get Daily Fantasy Football")
-@with_cache(timedelta(hours=1))
+@with_cache(timedelta(hours=1), game_window_expiry=timedelta(minutes=5))
 async def get_dfs(slate_id: str):
     """
     Get the salaries, Fantasy Nerds projected points, and Bang for Your Buck scores 
@@ -263,16 +525,16 @@ async def get_dfs(slate_id: str):
     
     - **slate_id**: The slateId is required and can be obtained by calling the Daily Fantasy Football - Get Slates endpoint
     """
-    return await nfl_service.get_dfs(slate_id)
+    return await nfl_passthrough_service.get_dfs(slate_id)
 
 @router.get("/dfs-slates", response_model=dict, summary="Get Daily Fantasy Football Slates")
-@with_cache(timedelta(hours=1))
+@with_cache(timedelta(hours=1), week_scoped=True)
 async def get_dfs_slates():
     """
     Get a listing of the current slates for upcoming DFS Classic contests (Weeks 1-18). 
     The slateId's from this response will be needed to retrieve player data for a specific slate.
     """
-    return await nfl_service.get_dfs_slates()
+    return await nfl_passthrough_service.get_dfs_slates()
 
 @router.get("/idp-draft", response_model=dict, summary="Get IDP Draft Rankings")
 @with_cache(timedelta(hours=24))
@@ -280,23 +542,23 @@ async def get_idp_draft():
     """
     Retrieve IDP (Individual Defensive Players) rankings for the upcoming NFL season.
     """
-    return await nfl_service.get_idp_draft()
+    return await nfl_passthrough_service.get_idp_draft()
 
 @router.get("/idp-weekly", response_model=dict, summary="Get IDP Weekly Projections")
-@with_cache(timedelta(hours=6))
+@with_cache(timedelta(hours=6), week_scoped=True)
 async def get_idp_weekly():
     """
     Retrieve weekly projections for IDP players.
     """
-    return await nfl_service.get_idp_weekly()
+    return await nfl_passthrough_service.get_idp_weekly()
 
 @router.get("/nfl-picks", response_model=dict, summary="Get NFL Picks")
-@with_cache(timedelta(hours=6))
+@with_cache(timedelta(hours=6), week_scoped=True)
 async def get_nfl_picks():
     """
     Get the current week's NFL game picks for each game broken down by expert.
     """
-    return await nfl_service.get_nfl_picks()
+    return await nfl_passthrough_service.get_nfl_picks()
 
 @router.get("/playoffs", response_model=dict, summary="Get Playoff Projections")
 @with_cache(timedelta(hours=6))
@@ -306,10 +568,265 @@ async def get_playoff_projections(week: int):
     
     - **week**: Pass the playoff week number (1 = Wild Card, 2 = Divisional Round, 3 = Conference Championships, 4 = Super Bowl)
     """
-    return await nfl_service.get_playoff_projections(week)
+    return await nfl_passthrough_service.get_playoff_projections(week)
+
+# Change feed source -> the cached route whose refreshes feed it
+CHANGE_FEED_ROUTES = {
+    "injuries": get_weekly_injuries,
+    "news": get_nfl_news,
+    "add-drops": get_player_adds_drops,
+    "depth": get_depth_charts,
+}
+
+@router.get("/changes", response_model=ChangeFeedResponse, summary="Get Changes Since a Version")
+async def get_changes(source: str, since: int = 0):
+    """
+    Retrieve what changed in injuries, news, add-drops or depth charts since a version.
+    
+    Each refresh of those resources is diffed against the previous one, keyed by player id,
+    article link or team and position. Poll with the returned version as **since** to receive
+    only added, changed and removed entries. When **reset** is true the changes are no longer
+    available (or since is 0) and the full resource should be reloaded. Versions are opaque and
+    only valid against the worker that issued them; a version from another worker or from
+    before a restart also gets a reset.
+    
+    - **source**: One of injuries, news, add-drops, depth
+    - **since**: The last version seen (0 on the first poll)
+    """
+    handler = CHANGE_FEED_ROUTES.get(source)
+    if handler is None:
+        raise HTTPException(status_code=422, detail=f"Unknown source: {source}. Use one of {', '.join(CHANGE_FEED_ROUTES)}")
+    # Going through the cached route refreshes the source when its cache entry has expired
+    await handler.cached_call(**_bind_route_params(handler, {}))
+    await refresh_listeners_idle()
+    return change_feeds[source].changes_since(since)
+
+def _refresher(handler):
+    """Refresh a change feed source's default view through its cached route"""
+    return lambda: handler.refresh(**_bind_route_params(handler, {}))
+
+for _source, _handler in CHANGE_FEED_ROUTES.items():
+    live_updates.register_source(_source, _refresher(_handler))
+
+def _split_filter(value: Optional[str]) -> set:
+    return {part.strip().upper() for part in (value or "").split(",") if part.strip()}
+
+@router.get("/subscribe", summary="Subscribe to Live Updates")
+async def subscribe(sources: str = "injuries,news", team: Optional[str] = None,
+                    player: Optional[str] = None, position: Optional[str] = None):
+    """
+    Stream new and changed records as server-sent events instead of polling.
+    
+    Each source is refreshed in the background while it has subscribers, and every change is
+    pushed as a `change` event with the added, changed and removed entries matching the filters.
+    A `ready` event with each source's current version (usable as **since** with /nfl/changes)
+    is sent first, and a comment line every few seconds keeps the connection alive. A client
+    that falls too far behind receives a `reset` event and should reload and resubscribe.
+    
+    - **sources**: Comma-separated list of injuries, news, add-drops, depth
+    - **team**: Comma-separated team codes (e.g. KC,BUF)
+    - **player**: Comma-separated player ids
+    - **position**: Comma-separated positions (e.g. QB,RB)
+    """
+    requested = [source.strip() for source in sources.split(",") if source.strip()]
+    unknown = [source for source in requested if source not in CHANGE_FEED_ROUTES]
+    if not requested or unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown or missing source(s): {', '.join(unknown)}. "
+                                                    f"Use any of {', '.join(CHANGE_FEED_ROUTES)}")
+    filters = {"team": _split_filter(team), "player": _split_filter(player), "position": _split_filter(position)}
+    return StreamingResponse(
+        live_updates.stream(requested, filters),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _load_calendar():
+    """Schedule and bye weeks data for the NFL calendar, through their cached routes"""
+    schedule, byes = await asyncio.gather(get_schedule.cached_call(), get_bye_weeks.cached_call())
+    return _cached_data(schedule), _cached_data(byes)
+
+nfl_calendar.register_loader(_load_calendar)
+
+@router.get("/calendar", response_model=dict, summary="Get NFL Calendar")
+async def get_calendar():
+    """
+    Retrieve where the NFL season stands right now.
+    
+    Derived from the schedule and bye weeks: the season, current week (0 before week 1), phase
+    (offseason, preseason, regular or postseason), whether a game is in progress, the next
+    kickoff (when lineups lock), this week's kickoff windows and the teams on bye. When the
+    schedule can't be loaded, **from_schedule** is false and the week is estimated from the date.
+    """
+    if not nfl_calendar.loaded_at:
+        try:
+            await nfl_calendar.refresh()
+        except HTTPException as e:
+            print(f"Could not load the NFL calendar: {e.detail}")
+    else:
+        nfl_calendar.ensure_fresh()
+    return nfl_calendar.status()
+
+# Upstream endpoint behind each player profile section -> the cached route that fetches it
+PLAYER_PROFILE_ROUTES = {
+    "players": get_players,
+    "draft-rankings": get_draft_rankings,
+    "weekly-rankings": get_weekly_rankings,
+    "adp": get_adp,
+    "auction": get_auction_values,
+    "ros": get_rest_of_season_projections,
+    "weekly-projections": get_weekly_projections,
+    "injuries": get_weekly_injuries,
+    "depth": get_depth_charts,
+    "news": get_nfl_news,
+}
+
+async def _load_player_view():
+    """Fetch, through their cached routes, any profile sources the player view has not seen yet (see sections_to_load)"""
+    handlers = [PLAYER_PROFILE_ROUTES[endpoint] for endpoint in player_view.sections_to_load()]
+    # A source that fails to load just leaves its section out of the profiles
+    await asyncio.gather(*(handler.cached_call(**_bind_route_params(handler, {})) for handler in handlers),
+                         return_exceptions=True)
+    if handlers:
+        await refresh_listeners_idle()
+
+@router.get("/players/{player_id}/profile", response_model=dict, summary="Get Player Profile")
+async def get_player_profile(player_id: str):
+    """
+    Retrieve everything known about one player in a single lookup.
+    
+    Joins the roster entry, draft and weekly rankings, ADP, auction values, ROS and weekly
+    projections, injury report, depth chart slot and recent news for the player, from a view
+    kept up to date as each of those sources refreshes. Scoring-dependent sections use the
+    default (standard, 12-team) view.
+    
+    - **player_id**: Fantasy Nerds playerId
+    """
+    await _load_player_view()
+    profile = player_view.get(player_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Player not found: {player_id}")
+    return profile
 
-@router.post("/query", response_model=NFLQueryResponse, summary="Ask a question about NFL data")
-async def ask_nfl_question(query: NFLQuery):
+@router.get("/player-profiles", response_model=dict, summary="Get Player Profiles")
+async def get_player_profiles(ids: Optional[str] = None, team: Optional[str] = None, position: Optional[str] = None):
+    """
+    Retrieve joined player profiles in bulk.
+    
+    - **ids**: Optional comma-separated playerIds (all players if omitted)
+    - **team**: Optional team code filter (e.g. KC)
+    - **position**: Optional position filter (e.g. QB)
+    """
+    await _load_player_view()
+    if ids:
+        profiles = [player_view.get(player_id.strip()) for player_id in ids.split(",") if player_id.strip()]
+        profiles = [profile for profile in profiles if profile is not None]
+    else:
+        profiles = list(player_view.profiles.values())
+    if team:
+        profiles = [profile for profile in profiles if (profile["team"] or "").upper() == team.upper()]
+    if position:
+        profiles = [profile for profile in profiles if (profile["position"] or "").upper() == position.upper()]
+    return {
+        "count": len(profiles),
+        "sources": {section: datetime.fromtimestamp(loaded).isoformat() for section, loaded in player_view.loaded_at.items()},
+        "profiles": profiles,
+    }
+
+@functools.lru_cache(maxsize=None)
+def _batch_routes() -> Dict[str, Any]:
+    """
+    Map resource names (route paths without the /nfl/ prefix) to their cached GET handlers;
+    built on first use, once every route has been registered
+    """
+    return {
+        route.path[len(router.prefix) + 1:]: route.endpoint
+        for route in router.routes
+        if "GET" in route.methods and "{" not in route.path and hasattr(route.endpoint, "cached_call")
+    }
+
+@functools.lru_cache(maxsize=None)
+def _cached_route_names() -> Dict[str, str]:
+    """Map route paths without the /nfl/ prefix (path parameters included) to their cache namespaces; built on first use"""
+    return {
+        route.path[len(router.prefix) + 1:]: route.endpoint.__name__
+        for route in router.routes
+        if "GET" in route.methods and hasattr(route.endpoint, "cached_call")
+    }
+
+def _coerce_param(value: Any, annotation: Any) -> Any:
+    """Convert a JSON parameter value to the type a route handler declares"""
+    if get_origin(annotation) is Union:  # Optional[X]
+        if value is None:
+            return None
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+    if annotation is bool and isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if annotation in (int, bool, str):
+        return annotation(value)
+    return value
+
+def _bind_route_params(handler, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the keyword arguments for a route handler the same way FastAPI would, so batch
+    items share cache entries with the individual routes
+    
+    Raises:
+        HTTPException: 422 for unknown, missing or malformed parameters
+    """
+    signature = inspect.signature(handler)
+    unknown = set(params) - set(signature.parameters)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown parameter(s): {', '.join(sorted(unknown))}")
+    
+    kwargs = {}
+    for name, parameter in signature.parameters.items():
+        if name in params:
+            try:
+                kwargs[name] = _coerce_param(params[name], parameter.annotation)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=422, detail=f"Invalid value for parameter '{name}'")
+        elif parameter.default is inspect.Parameter.empty:
+            raise HTTPException(status_code=422, detail=f"Missing required parameter: {name}")
+        else:
+            kwargs[name] = parameter.default
+    return kwargs
+
+async def _resolve_batch_item(item: BatchResourceRequest) -> Dict[str, Any]:
+    """Fetch one batch item through its cached route, capturing errors in the result"""
+    resource = item.resource.strip("/")
+    if resource.startswith("nfl/"):
+        resource = resource[len("nfl/"):]
+    handler = _batch_routes().get(resource)
+    if handler is None:
+        return {"resource": item.resource, "status": 404, "error": f"Unknown resource: {item.resource}"}
+    
+    try:
+        data = _cached_data(await handler.cached_call(**_bind_route_params(handler, item.params)))
+        return {"resource": item.resource, "status": 200, "data": data}
+    except HTTPException as e:
+        return {"resource": item.resource, "status": e.status_code, "error": str(e.detail)}
+    except Exception as e:
+        return {"resource": item.resource, "status": 500, "error": f"Unexpected error: {str(e)}"}
+
+@router.post("/batch", response_model=BatchResponse, summary="Fetch Multiple Resources")
+async def get_batch(batch: BatchRequest):
+    """
+    Fetch several NFL data resources in one round trip.
+    
+    Each item names a GET route under /nfl (e.g. "schedule", "injuries", "adp") and its query
+    parameters. Items are resolved concurrently through the same cache as the individual routes,
+    and are returned in request order with a per-item status and error.
+    
+    Example: {"requests": [{"resource": "standings"}, {"resource": "adp", "params": {"teams": 10, "format": "ppr"}}]}
+    """
+    if len(batch.requests) > BATCH_MAX_RESOURCES:
+        raise HTTPException(status_code=422, detail=f"A batch may contain at most {BATCH_MAX_RESOURCES} resources")
+    results = await asyncio.gather(*(_resolve_batch_item(item) for item in batch.requests))
+    return {"results": results}
+
+@router.post("/query", response_model=NFLQueryResponse, response_model_exclude_none=True,
+             summary="Ask a question about NFL data")
+async def ask_nfl_question(query: NFLQuery, response: Response):
     """
     Ask a natural language question about NFL data and get an AI-powered response.
     
@@ -319,6 +836,94 @@ async def ask_nfl_question(query: NFLQuery):
     - "Show me the Packers' upcoming schedule"
     - "What's the depth chart for the Cowboys?"
     - "Which teams are playing this weekend?"
+    
+    Set **debug** to true to get per-stage timings in the response. Timings are also returned
+    in the Server-Timing header.
+    
+    When too many questions are already queued, the response is 503 with a Retry-After header,
+    unless an earlier answer to the same question can be served (marked with a Warning header).
+    """
+    if not (settings.QUERY_TIMING_ENABLED or query.debug):
+        return await nfl_query_service.process_query(query.query)
+    
+    timings = Timings()
+    token = current_timings.set(timings)
+    try:
+        with span("total"):
+            result = await nfl_query_service.process_query(query.query)
+    finally:
+        current_timings.reset(token)
+    
+    response.headers["Server-Timing"] = timings.server_timing_header()
+    log_if_slow(query.query, timings, settings.SLOW_QUERY_THRESHOLD_MS)
+    if query.debug:
+        result = {**result, "debug": {"timings": timings.as_dict()}}
+    return result
+
+@router.post("/query/jobs", response_model=QueryJobResponse, status_code=202, summary="Submit a question as a background job")
+async def submit_query_job(query: NFLQuery):
+    """
+    Queue a natural language question and return a job id immediately.
+    
+    For clients whose HTTP timeouts are shorter than an LLM call: the question is answered by a
+    pool of background workers, and the answer is collected with GET /nfl/query/jobs/{job_id}
+    from any worker. Finished jobs are kept for a limited time; a job whose question could not
+    be answered ends as failed, with the reason in error. When the job queue is full the
+    response is 503 with a Retry-After header.
     """
-    response = await nfl_query_service.process_query(query.query)
-    return response
+    job = await query_jobs.submit(query.query)
+    return job.as_dict()
+
+@router.get("/query/jobs/{job_id}", response_model=QueryJobResponse, summary="Get a background question job")
+async def get_query_job(job_id: str, wait: float = 0):
+    """
+    Retrieve the status of a question job, and its answer once it is done.
+    
+    - **job_id**: The id returned when the job was submitted
+    - **wait**: Optional seconds to wait for the job to finish before responding (long polling)
+    """
+    job = await query_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found or expired: {job_id}")
+    job = await query_jobs.wait(job, min(max(wait, 0), settings.QUERY_JOB_MAX_WAIT))
+    return job.as_dict()
+
+@router.post("/query/batch", response_model=NFLQueryBatchResponse, summary="Ask many questions about NFL data")
+async def ask_nfl_questions(batch: NFLQueryBatch):
+    """
+    Answer a batch of natural language questions in one request.
+    
+    Questions are classified up front and the data they need is fetched and summarized once per
+    source, then answered with bounded LLM concurrency. Results are returned in question order.
+    
+    A batch may hold at most QUERY_BATCH_MAX_QUERIES questions; submit larger batches as a
+    job (POST /nfl/query/batch/jobs).
+    """
+    if len(batch.queries) > settings.QUERY_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"A batch may contain at most {settings.QUERY_BATCH_MAX_QUERIES} queries; submit larger batches to /nfl/query/batch/jobs",
+        )
+    results = await nfl_query_service.process_batch(batch.queries)
+    return {"results": results}
+
+@router.post("/query/batch/jobs", response_model=QueryJobResponse, status_code=202,
+             summary="Submit many questions as one background job")
+async def submit_query_batch_job(batch: NFLQueryBatch):
+    """
+    Queue a large batch of natural language questions and return a job id immediately.
+    
+    The batch is answered by one background worker exactly like POST /nfl/query/batch: data is
+    fetched and summarized once per source for the whole batch. Collect the answers, in
+    question order, from result.results with GET /nfl/query/jobs/{job_id}. A batch job may hold
+    at most QUERY_BATCH_JOB_MAX_QUERIES questions.
+    """
+    if not batch.queries:
+        raise HTTPException(status_code=422, detail="A batch must contain at least one query")
+    if len(batch.queries) > settings.QUERY_BATCH_JOB_MAX_QUERIES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"A batch job may contain at most {settings.QUERY_BATCH_JOB_MAX_QUERIES} queries",
+        )
+    job = await query_jobs.submit(None, batch.queries)
+    return job.as_dict()
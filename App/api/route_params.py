@@ -0,0 +1,74 @@
+import re
+import inspect
+from typing import Any, Callable, Dict
+from fastapi import HTTPException
+
+TEAM_COUNTS = (8, 10, 12, 14, 16)
+
+def _choice(*allowed: Any, case: Callable[[str], str] = str.lower) -> Callable[[Any], Any]:
+    """Accept one of the allowed values, compared after normalizing the case of strings"""
+    def check(value):
+        if isinstance(value, str):
+            value = case(value.strip())
+        if value not in allowed:
+            raise ValueError(f"must be one of {', '.join(str(v) for v in allowed)}")
+        return value
+    return check
+
+def _int_range(low: int, high: int) -> Callable[[Any], Any]:
+    def check(value):
+        value = int(value)
+        if not low <= value <= high:
+            raise ValueError(f"must be between {low} and {high}")
+        return value
+    return check
+
+def _pattern(regex: str, description: str) -> Callable[[Any], Any]:
+    compiled = re.compile(regex)
+    def check(value):
+        value = str(value).strip()
+        if not compiled.fullmatch(value):
+            raise ValueError(f"must be {description}")
+        return value
+    return check
+
+# Route handler -> parameter -> validator returning the canonical value. Values follow the
+# enumerations documented on each route.
+ROUTE_PARAM_RULES: Dict[str, Dict[str, Callable[[Any], Any]]] = {
+    "get_weekly_injuries": {"season": _int_range(2000, 2100), "week": _int_range(1, 18)},
+    "get_draft_rankings": {"format": _choice("std", "ppr", "half", "superflex")},
+    "get_player_tiers": {"format": _choice("std", "ppr")},
+    "get_auction_values": {"teams": _choice(*TEAM_COUNTS), "budget": _int_range(1, 1000), "format": _choice("std", "ppr")},
+    "get_adp": {"teams": _choice(*TEAM_COUNTS), "format": _choice("std", "ppr", "half", "superflex")},
+    "get_weekly_rankings": {"format": _choice("std", "ppr", "half")},
+    "get_fantasy_leaders": {
+        "format": _choice("std", "ppr", "half"),
+        "position": _choice("ALL", "QB", "RB", "WR", "TE", "FLEX", "K", "IDP", case=str.upper),
+        "week": _int_range(0, 18),
+    },
+    "get_dfs": {"slate_id": _pattern(r"[A-Za-z0-9_-]{1,32}", "1-32 letters, digits, '-' or '_'")},
+    "get_playoff_projections": {"week": _int_range(1, 4)},
+}
+
+def canonical_params(route: str, signature: inspect.Signature, args: tuple, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Every parameter of a route call by name, defaults filled in and values validated and
+    normalized, so equivalent requests share one cache entry and invalid ones never reach upstream
+
+    Raises:
+        HTTPException: 422 for missing, unknown or invalid parameters
+    """
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    bound.apply_defaults()
+    params = dict(bound.arguments)
+    for name, check in ROUTE_PARAM_RULES.get(route, {}).items():
+        if params.get(name) is None:
+            continue
+        try:
+            params[name] = check(params[name])
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid value for parameter '{name}': {e}")
+    return params
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -12,7 +13,7 @@ api_key = os.getenv("FANTASY_NERDS_API_KEY")
 if not api_key:
     raise ValueError("FANTASY_NERDS_API_KEY not found in environment variables. Please add it to your .env file.")
 
-base_url = "https://api.fantasynerds.com/v1/nfl"
+base_url = os.getenv("FANTASY_NERDS_BASE_URL", "https://api.fantasynerds.com/v1/nfl")
 gpt_api_key = os.getenv("GPT_API_KEY")  # Added GPT API Key
 print(f"Fantasy Nerds API Key loaded: {'*' * 4}{api_key[-4:] if api_key else 'Not found'}")
 print(f"Base URL loaded: {base_url}")
@@ -22,10 +23,134 @@ class Settings:
     API_KEY: str = api_key
     BASE_URL: str = base_url
     GPT_API_KEY: str = gpt_api_key  # Added GPT API Key
+    GPT_API_URL: str = os.getenv("GPT_API_URL", "https://api.openai.com/v1/chat/completions")
+    # Where the query service reaches this API's own cached routes
+    INTERNAL_API_URL: str = os.getenv("INTERNAL_API_URL", "http://localhost:8000")
     
     # API Info for Swagger UI
     API_TITLE: str = "NFL Fantasy Data API"
     API_DESCRIPTION: str = "API for fetching NFL data from Fantasy Nerds"
     API_VERSION: str = "0.2.0"
+    
+    # Fantasy Nerds rate limiting, shared by all workers on the host through a state file
+    FN_RATE_LIMIT_PER_MINUTE: float = float(os.getenv("FN_RATE_LIMIT_PER_MINUTE", "60"))  # 0 disables
+    FN_RATE_LIMIT_BURST: int = int(os.getenv("FN_RATE_LIMIT_BURST", "10"))
+    FN_RATE_LIMIT_STATE_FILE: str = os.getenv(
+        "FN_RATE_LIMIT_STATE_FILE", os.path.join(tempfile.gettempdir(), "nfl_api_fn_ratelimit.bin")
+    )
+    FN_RATE_LIMIT_BACKGROUND_RESERVE: float = float(os.getenv("FN_RATE_LIMIT_BACKGROUND_RESERVE", "0.3"))
+    FN_RATE_LIMIT_USER_MAX_WAIT: float = float(os.getenv("FN_RATE_LIMIT_USER_MAX_WAIT", "2"))  # seconds
+    FN_RATE_LIMIT_BACKGROUND_MAX_WAIT: float = float(os.getenv("FN_RATE_LIMIT_BACKGROUND_MAX_WAIT", "30"))
+    # /nfl/query data fetches leave this share of the bucket to the data routes
+    FN_RATE_LIMIT_QUERY_RESERVE: float = float(os.getenv("FN_RATE_LIMIT_QUERY_RESERVE", "0.1"))
+    FN_RATE_LIMIT_QUERY_MAX_WAIT: float = float(os.getenv("FN_RATE_LIMIT_QUERY_MAX_WAIT", "5"))  # seconds
+    
+    # Per-endpoint circuit breaker; while open the last good payload is served as stale
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_TIMEOUT: float = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))  # seconds before a probe
+    STALE_CACHE_MAX_ENTRIES: int = int(os.getenv("STALE_CACHE_MAX_ENTRIES", "256"))
+    
+    # Upstream deadlines and hedging of slow requests
+    UPSTREAM_TIMEOUT: float = float(os.getenv("UPSTREAM_TIMEOUT", "30"))  # seconds, when the caller sets no deadline
+    QUERY_FETCH_TIMEOUT: float = float(os.getenv("QUERY_FETCH_TIMEOUT", "15"))  # data budget for /nfl/query
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "95"))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_MAX_RATE: float = float(os.getenv("HEDGE_MAX_RATE", "0.05"))  # at most 5% of requests hedged
+    
+    # Serve subset requests (active roster, one position's leaders, ppr/half rankings) from
+    # the superset document, reusing a superset fetched within the max age. Derived ppr/half
+    # rankings are the standard rankings re-sorted by that format's points, not expert ranks
+    VARIANT_DERIVATION_ENABLED: bool = os.getenv("VARIANT_DERIVATION_ENABLED", "true").lower() in ("1", "true", "yes")
+    VARIANT_SUPERSET_MAX_AGE: float = float(os.getenv("VARIANT_SUPERSET_MAX_AGE", "300"))  # seconds
+    
+    # Batch natural-language queries; a batch is answered within one request, so keep it to what
+    # QUERY_BATCH_LLM_CONCURRENCY can answer before clients time out. Larger batches (nightly
+    # runs of thousands of questions) are submitted as one background job, up to the job maximum
+    QUERY_BATCH_MAX_QUERIES: int = int(os.getenv("QUERY_BATCH_MAX_QUERIES", "50"))
+    QUERY_BATCH_JOB_MAX_QUERIES: int = int(os.getenv("QUERY_BATCH_JOB_MAX_QUERIES", "5000"))
+    QUERY_BATCH_LLM_CONCURRENCY: int = int(os.getenv("QUERY_BATCH_LLM_CONCURRENCY", "8"))
+    
+    # Admission control of /nfl/query: concurrent queries per worker, queries waiting for a slot,
+    # and the longest estimated wait before a query is turned away with a 503
+    QUERY_MAX_CONCURRENCY: int = int(os.getenv("QUERY_MAX_CONCURRENCY", "16"))
+    QUERY_MAX_QUEUE: int = int(os.getenv("QUERY_MAX_QUEUE", "64"))
+    QUERY_TARGET_WAIT: float = float(os.getenv("QUERY_TARGET_WAIT", "10"))  # seconds
+    
+    # Background /nfl/query jobs (/nfl/query/jobs): worker pool, stored jobs and how long
+    # finished jobs are kept for their results to be collected. Jobs live in QUERY_JOB_DIR,
+    # shared by the workers on the host so any of them can run or report a job
+    QUERY_JOB_DIR: str = os.getenv("QUERY_JOB_DIR", os.path.join(tempfile.gettempdir(), "nfl_api_jobs"))
+    QUERY_JOB_WORKERS: int = int(os.getenv("QUERY_JOB_WORKERS", "4"))
+    QUERY_JOB_MAX_JOBS: int = int(os.getenv("QUERY_JOB_MAX_JOBS", "1000"))
+    QUERY_JOB_TTL: float = float(os.getenv("QUERY_JOB_TTL", "900"))  # seconds
+    QUERY_JOB_MAX_WAIT: float = float(os.getenv("QUERY_JOB_MAX_WAIT", "30"))  # longest long-poll, seconds
+    QUERY_JOB_POLL_INTERVAL: float = float(os.getenv("QUERY_JOB_POLL_INTERVAL", "0.5"))  # seconds between job store checks
+    
+    # Per-stage timing of /nfl/query (Server-Timing header, debug.timings, slow query log)
+    QUERY_TIMING_ENABLED: bool = os.getenv("QUERY_TIMING_ENABLED", "true").lower() in ("1", "true", "yes")
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "5000"))
+    
+    # Upstream mode: "passthrough" calls Fantasy Nerds, "record" also saves every response to
+    # CASSETTE_DIR, "replay" serves only saved responses and never touches the network
+    UPSTREAM_MODE: str = os.getenv("UPSTREAM_MODE", "passthrough").lower()
+    CASSETTE_DIR: str = os.getenv("CASSETTE_DIR", str(Path(__file__).resolve().parent.parent.parent / "cassettes"))
+    REPLAY_SIMULATE_LATENCY: bool = os.getenv("REPLAY_SIMULATE_LATENCY", "false").lower() in ("1", "true", "yes")
+    
+    # Versions of diffs kept per change feed (injuries, news, add-drops, depth)
+    CHANGE_FEED_MAX_VERSIONS: int = int(os.getenv("CHANGE_FEED_MAX_VERSIONS", "100"))
+    
+    # Live update subscriptions (/nfl/subscribe)
+    LIVE_UPDATE_REFRESH_INTERVAL: float = float(os.getenv("LIVE_UPDATE_REFRESH_INTERVAL", "60"))  # seconds
+    LIVE_UPDATE_HEARTBEAT: float = float(os.getenv("LIVE_UPDATE_HEARTBEAT", "15"))  # seconds
+    LIVE_UPDATE_QUEUE_SIZE: int = int(os.getenv("LIVE_UPDATE_QUEUE_SIZE", "100"))  # events per subscriber
+    
+    # Append-only history of fetched payloads, queried with as_of= and week= on the cached routes.
+    # Kept for a season, so it defaults to the user's data directory rather than the checkout or /tmp
+    SNAPSHOT_ENABLED: bool = os.getenv("SNAPSHOT_ENABLED", "true").lower() in ("1", "true", "yes")
+    SNAPSHOT_DIR: str = os.getenv("SNAPSHOT_DIR", os.path.join(
+        os.getenv("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"), "nfl_api", "snapshots"
+    ))
+    SNAPSHOT_RETENTION_DAYS: float = float(os.getenv("SNAPSHOT_RETENTION_DAYS", "400"))  # a season and its offseason
+    SNAPSHOT_MAX_ENTRIES: int = int(os.getenv("SNAPSHOT_MAX_ENTRIES", "2000"))  # per route call
+    
+    # Adaptive route cache expiry: halve a route's TTL when its content changed since the last
+    # fetch, add back a quarter of the configured expiry when it didn't
+    ADAPTIVE_TTL_ENABLED: bool = os.getenv("ADAPTIVE_TTL_ENABLED", "true").lower() in ("1", "true", "yes")
+    ADAPTIVE_TTL_DECREASE: float = float(os.getenv("ADAPTIVE_TTL_DECREASE", "0.5"))
+    ADAPTIVE_TTL_INCREASE: float = float(os.getenv("ADAPTIVE_TTL_INCREASE", "0.25"))
+    ADAPTIVE_TTL_MAX_KEYS: int = int(os.getenv("ADAPTIVE_TTL_MAX_KEYS", "256"))  # content digests kept per route
+    
+    # Popularity-driven prefetch: keep the most requested cache keys from expiring
+    PREFETCH_ENABLED: bool = os.getenv("PREFETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+    PREFETCH_TOP_K: int = int(os.getenv("PREFETCH_TOP_K", "20"))
+    PREFETCH_MIN_SCORE: float = float(os.getenv("PREFETCH_MIN_SCORE", "3"))  # decayed requests
+    PREFETCH_INTERVAL: float = float(os.getenv("PREFETCH_INTERVAL", "30"))  # seconds between passes
+    PREFETCH_LEAD_TIME: float = float(os.getenv("PREFETCH_LEAD_TIME", "120"))  # seconds before expiry
+    POPULARITY_HALF_LIFE: float = float(os.getenv("POPULARITY_HALF_LIFE", "3600"))  # seconds
+    POPULARITY_MAX_KEYS: int = int(os.getenv("POPULARITY_MAX_KEYS", "10000"))
+    
+    # Answers to the most asked /nfl/query questions, regenerated in the background when their
+    # data changes, spending at most QUERY_PRECOMPUTE_TOKEN_BUDGET LLM tokens an hour on it
+    QUERY_PRECOMPUTE_ENABLED: bool = os.getenv("QUERY_PRECOMPUTE_ENABLED", "true").lower() in ("1", "true", "yes")
+    QUERY_PRECOMPUTE_TOP_N: int = int(os.getenv("QUERY_PRECOMPUTE_TOP_N", "25"))
+    QUERY_PRECOMPUTE_MIN_SCORE: float = float(os.getenv("QUERY_PRECOMPUTE_MIN_SCORE", "3"))  # decayed asks
+    QUERY_PRECOMPUTE_INTERVAL: float = float(os.getenv("QUERY_PRECOMPUTE_INTERVAL", "60"))  # seconds
+    QUERY_PRECOMPUTE_LEAD_TIME: float = float(os.getenv("QUERY_PRECOMPUTE_LEAD_TIME", "120"))  # seconds before expiry
+    QUERY_PRECOMPUTE_TOKEN_BUDGET: int = int(os.getenv("QUERY_PRECOMPUTE_TOKEN_BUDGET", "200000"))  # per hour
+    QUERY_ANSWER_TTL: float = float(os.getenv("QUERY_ANSWER_TTL", "600"))  # seconds
+    QUERY_POPULARITY_HALF_LIFE: float = float(os.getenv("QUERY_POPULARITY_HALF_LIFE", "3600"))  # seconds
+    
+    # Coordination between the workers on a host: invalidations reach every worker's cache, and
+    # one worker at a time fetches a document upstream and shares it through CLUSTER_DIR
+    CLUSTER_COORDINATION_ENABLED: bool = os.getenv("CLUSTER_COORDINATION_ENABLED", "true").lower() in ("1", "true", "yes")
+    CLUSTER_DIR: str = os.getenv("CLUSTER_DIR", os.path.join(tempfile.gettempdir(), "nfl_api_cluster"))
+    CLUSTER_SYNC_INTERVAL: float = float(os.getenv("CLUSTER_SYNC_INTERVAL", "0.5"))  # seconds between invalidation log reads
+    CLUSTER_FOLLOWER_WAIT: float = float(os.getenv("CLUSTER_FOLLOWER_WAIT", "10"))  # seconds to wait on another worker's fetch
+    CLUSTER_SHARE_MAX_AGE: float = float(os.getenv("CLUSTER_SHARE_MAX_AGE", "30"))  # seconds a shared document may be reused
+    
+    # NFL calendar (current week, season phase, game windows) built from the cached schedule
+    NFL_SCHEDULE_TIMEZONE: str = os.getenv("NFL_SCHEDULE_TIMEZONE", "America/New_York")  # of dates without an offset
+    NFL_GAME_WINDOW_MINUTES: float = float(os.getenv("NFL_GAME_WINDOW_MINUTES", "210"))  # kickoff to final whistle
+    NFL_CALENDAR_REFRESH_INTERVAL: float = float(os.getenv("NFL_CALENDAR_REFRESH_INTERVAL", "43200"))  # seconds
 
 settings = Settings()
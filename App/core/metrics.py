@@ -0,0 +1,95 @@
+import os
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
+
+# HTTP requests, labelled by route template rather than raw path to keep cardinality bounded
+REQUEST_LATENCY = Histogram(
+    "nfl_api_request_duration_seconds", "Time spent handling HTTP requests",
+    ["route", "method", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "nfl_api_requests_in_flight", "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+
+# Route response cache (with_cache), labelled by namespace (the route function name)
+CACHE_REQUESTS = Counter(
+    "nfl_cache_requests_total", "Route cache lookups by outcome (hit, miss, stale)",
+    ["namespace", "result"],
+)
+CACHE_ENTRIES = Gauge(
+    "nfl_cache_entries", "Entries held in the route cache",
+    multiprocess_mode="livesum",
+)
+CACHE_SIZE_BYTES = Gauge(
+    "nfl_cache_size_bytes", "Approximate JSON size of the values held in the route cache",
+    multiprocess_mode="livesum",
+)
+CACHE_EVICTIONS = Counter(
+    "nfl_cache_evictions_total", "Route cache entries dropped, by reason (expired, cleared)",
+    ["namespace", "reason"],
+)
+CACHE_TTL_SECONDS = Gauge(
+    "nfl_cache_ttl_seconds", "Current adaptive expiry of each route cache namespace",
+    ["namespace"], multiprocess_mode="liveall",
+)
+
+# Fantasy Nerds calls, one observation per HTTP attempt (hedged duplicates included)
+UPSTREAM_LATENCY = Histogram(
+    "nfl_upstream_request_duration_seconds", "Latency of Fantasy Nerds requests",
+    ["endpoint"],
+)
+UPSTREAM_RESPONSES = Counter(
+    "nfl_upstream_responses_total", "Fantasy Nerds responses by status code, timeout or error",
+    ["endpoint", "status"],
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "nfl_upstream_requests_in_flight", "Fantasy Nerds requests currently outstanding",
+    ["endpoint"], multiprocess_mode="livesum",
+)
+
+# OpenAI completions
+LLM_LATENCY = Histogram(
+    "nfl_llm_request_duration_seconds", "Latency of OpenAI chat completion calls",
+    buckets=(0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60),
+)
+LLM_TOKENS = Counter(
+    "nfl_llm_tokens_total", "OpenAI tokens used, by type (prompt, completion)",
+    ["type"],
+)
+LLM_IN_FLIGHT = Gauge(
+    "nfl_llm_requests_in_flight", "OpenAI completion calls currently outstanding",
+    multiprocess_mode="livesum",
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "nfl_llm_queue_depth", "Callers waiting on an OpenAI completion (including coalesced waiters)",
+    multiprocess_mode="livesum",
+)
+
+# Admission control of /nfl/query
+QUERY_ADMISSIONS = Counter(
+    "nfl_query_admissions_total", "Natural-language queries by admission outcome (admitted, rejected, degraded)",
+    ["result"],
+)
+QUERY_QUEUE_DEPTH = Gauge(
+    "nfl_query_queue_depth", "Natural-language queries and batches waiting for admission",
+    multiprocess_mode="livesum",
+)
+QUERIES_IN_FLIGHT = Gauge(
+    "nfl_queries_in_flight", "Admission slots held by natural-language queries being processed (a batch holds several)",
+    multiprocess_mode="livesum",
+)
+
+def render_metrics() -> bytes:
+    """
+    Render all metrics in the Prometheus text format
+    
+    Under gunicorn, set PROMETHEUS_MULTIPROC_DIR so every worker's metrics are aggregated.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
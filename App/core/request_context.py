@@ -0,0 +1,54 @@
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Headers that services want added to the current HTTP response. The middleware in main.py
+# installs a fresh dict per request; outside a request the value is None and writes are dropped.
+response_headers: contextvars.ContextVar[Optional[Dict[str, str]]] = contextvars.ContextVar(
+    "response_headers", default=None
+)
+
+# Absolute time.monotonic() by which the current request must be answered, if any
+request_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+STALE_AGE_HEADER = "X-Stale-Age-Seconds"
+# Seconds the caller is still willing to wait; sent on internal calls and honoured on incoming ones
+DEADLINE_HEADER = "X-Request-Timeout"
+
+def set_response_header(name: str, value: str):
+    """Add a header to the response for the request being handled, if any"""
+    headers = response_headers.get()
+    if headers is not None:
+        headers[name] = value
+
+def mark_stale(age_seconds: float):
+    """Flag the current response as served from stale data"""
+    set_response_header("Warning", '110 - "Response is Stale"')
+    set_response_header(STALE_AGE_HEADER, str(int(age_seconds)))
+
+def remaining_time(deadline: Optional[float] = None) -> Optional[float]:
+    """Seconds left until the given deadline (or the current request's), None if unbounded"""
+    if deadline is None:
+        deadline = request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """Tighten the current deadline to at most `seconds` from now for the enclosed block"""
+    deadline = time.monotonic() + seconds
+    current = request_deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = request_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        request_deadline.reset(token)
+
+def is_stale() -> bool:
+    """Whether stale data has been served while handling the current request"""
+    headers = response_headers.get()
+    return bool(headers) and STALE_AGE_HEADER in headers
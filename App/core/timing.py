@@ -0,0 +1,60 @@
+import re
+import json
+import time
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger("nfl_api.timing")
+
+class Timings:
+    """Durations of the named stages of one request, in the order they finished"""
+
+    def __init__(self):
+        self.spans: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        # Stages that run more than once (e.g. a repeated fetch) accumulate
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        """Stage durations in milliseconds"""
+        return {name: round(seconds * 1000, 2) for name, seconds in self.spans.items()}
+
+    def server_timing_header(self) -> str:
+        """Format the stages as a Server-Timing header value"""
+        return ", ".join(
+            f"{re.sub(r'[^A-Za-z0-9_-]', '_', name)};dur={seconds * 1000:.1f}"
+            for name, seconds in self.spans.items()
+        )
+
+# Timings for the request being handled; None (the default) turns every span into a no-op
+current_timings: contextvars.ContextVar[Optional[Timings]] = contextvars.ContextVar(
+    "current_timings", default=None
+)
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block as a stage of the current request, if timing is enabled"""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+def log_if_slow(query: str, timings: Timings, threshold_ms: float):
+    """Log a structured record of a query's stage timings when it took longer than the threshold"""
+    stages = timings.as_dict()
+    total = stages.get("total", sum(stages.values()))
+    if total >= threshold_ms:
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "query": query,
+            "total_ms": total,
+            "stages_ms": stages,
+        }))
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 
 class Team(BaseModel):
     id: str
@@ -39,11 +39,63 @@ class ErrorResponse(BaseModel):
 # Change from NFLquery to NFLQuery to match imports
 class NFLQuery(BaseModel):
     query: str = Field(..., description="Natural language question about NFL data")
+    debug: bool = Field(False, description="Include per-stage timings in the response")
 
 class NFLQueryResponse(BaseModel):
     query: str
     answer: str
     data_sources: List[str]
+    debug: Optional[Dict[str, Any]] = None
+
+class NFLQueryBatch(BaseModel):
+    queries: List[str] = Field(..., description="Natural language questions about NFL data")
+
+class NFLQueryBatchResponse(BaseModel):
+    results: List[NFLQueryResponse]
+
+class QueryJobResponse(BaseModel):
+    job_id: str
+    status: str = Field(..., description="queued, running, done or failed")
+    query: Optional[str] = Field(None, description="The question, for a single-question job")
+    queries: Optional[List[str]] = Field(None, description="The questions, for a batch job")
+    result: Optional[Union[NFLQueryResponse, NFLQueryBatchResponse]] = None
+    error: Optional[str] = None
+    created_at: float
+    finished_at: Optional[float] = None
+    
+class BatchResourceRequest(BaseModel):
+    resource: str = Field(..., description="Route name under /nfl, e.g. 'schedule' or 'injuries'")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Query parameters for that route")
+
+class BatchRequest(BaseModel):
+    requests: List[BatchResourceRequest]
+
+class BatchResourceResult(BaseModel):
+    resource: str
+    status: int
+    data: Optional[Any] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchResourceResult]
+
+class ChangeItem(BaseModel):
+    key: str
+    item: Any
+
+class ChangeVersion(BaseModel):
+    version: int
+    timestamp: float
+    added: List[ChangeItem]
+    changed: List[ChangeItem]
+    removed: List[str]
+
+class ChangeFeedResponse(BaseModel):
+    source: str
+    version: int = Field(..., description="Opaque version; pass as 'since' on the next poll")
+    since: int
+    reset: bool = Field(..., description="True when the changes are unavailable and the full resource must be reloaded")
+    changes: List[ChangeVersion]
     
 class TeamResponse(BaseModel):
     team_code: str
@@ -2,40 +2,71 @@
 import os
 import json
 import httpx
+import orjson
 import hashlib
 import time
-from typing import Dict, List, Any, Union
+import asyncio
+import contextvars
+from typing import Dict, List, Any, Optional, Union
 from App.core.config import settings
+from App.core.metrics import LLM_LATENCY, LLM_TOKENS, LLM_IN_FLIGHT, LLM_QUEUE_DEPTH
+from App.core.timing import span
 
 llm_cache = {}
 LLM_CACHE_TTL = 60 * 10  # 10 minutes
 
+# Completions currently in flight, keyed by a hash of the final prompt. Identical
+# prompts arriving while one is pending await the same task instead of calling GPT again.
+llm_inflight: Dict[str, asyncio.Task] = {}
+
+# Optional dict that completions awaited in the current context add their token usage to
+# ("tokens") and flag failures in ("failed"), for callers that budget LLM spend or must not
+# keep failed answers. A completion shared by coalesced callers is reported to each of them.
+llm_usage: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("llm_usage", default=None)
+
+class Completion:
+    """Outcome of one chat completion request, shared by every caller awaiting it"""
+    __slots__ = ("text", "tokens", "failed")
+
+    def __init__(self, text: str, tokens: int = 0, failed: bool = False):
+        self.text = text
+        self.tokens = tokens
+        self.failed = failed
+
+def _report_usage(completion: Completion):
+    """Add a completion's tokens and failure to the current context's usage sink, if any"""
+    sink = llm_usage.get()
+    if sink is not None:
+        sink["tokens"] += completion.tokens
+        sink["failed"] = sink["failed"] or completion.failed
+
 class LLMService:
     def __init__(self):
         self.api_key = settings.GPT_API_KEY  # Using GPT API key from .env file
-        self.base_url = "https://api.openai.com/v1/chat/completions"
+        self.base_url = settings.GPT_API_URL
         self.model = "gpt-4.1-2025-04-14"
 
-    async def generate_response(self, query: str, context_data: Dict[str, Any] = None) -> str:
+    async def generate_response(self, query: str, context_data: Dict[str, Any] = None,
+                                summary_cache: Dict = None) -> str:
         """
         Generate a response using OpenAI's GPT model based on the user query and NFL data context
         
         Args:
             query (str): The user's query about NFL data
             context_data (dict): NFL data to provide as context to the LLM
+            summary_cache (dict, optional): Summaries shared across calls, keyed by source object
             
         Returns:
             str: The LLM's response
         """
-        # Create a cache key based on query and context
-        cache_key = hashlib.sha256((query + str(context_data)).encode()).hexdigest()
+        # A repeated question over the same data is answered from the cache before summarizing
+        context_key = self._context_key(query, context_data)
         now = time.time()
-        # Check cache
-        if cache_key in llm_cache:
-            cached_time, cached_response = llm_cache[cache_key]
+        if context_key in llm_cache:
+            cached_time, cached_response = llm_cache[context_key]
             if now - cached_time < LLM_CACHE_TTL:
                 return cached_response
-
+        
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -77,7 +108,8 @@ class LLMService:
         # Process context data if available - with size limitation
         if context_data:
             # Summarize the data to avoid 413 errors
-            summarized_data = self._summarize_context_data(context_data)
+            with span("summarize"):
+                summarized_data = self._summarize_context_data(context_data, summary_cache)
             
             # Add instructions on how to use the data
             data_instructions = (
@@ -95,7 +127,8 @@ class LLMService:
             messages.append({"role": "system", "content": data_instructions})
             
             # Format and add the summarized context data
-            context_str = f"{json.dumps(summarized_data, indent=2)}"
+            with span("json_encode"):
+                context_str = f"{json.dumps(summarized_data, indent=2)}"
             # Limit context string to avoid payload too large - reduced for GPT's token limit
             if len(context_str) > 15000:  # Reduced size for GPT's token limit
                 context_str = context_str[:15000] + "...[additional data truncated for size]"
@@ -103,38 +136,96 @@ class LLMService:
             messages.append({"role": "system", "content": context_str})
             print(f"Context data size after summary: {len(context_str)} characters")
 
+        payload = {
+            "model": self.model,
+            "messages": messages + [{"role": "user", "content": query}],
+            "temperature": 0.7,
+            "max_tokens": 800,  # Increased for more detailed responses
+        }
+
+        # Cache on the final prompt; hashing the summarized prompt is far cheaper than the raw context
+        prompt_key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        # Check cache
+        if prompt_key in llm_cache:
+            cached_time, cached_response = llm_cache[prompt_key]
+            if now - cached_time < LLM_CACHE_TTL:
+                return cached_response
+
+        # Coalesce identical in-flight prompts onto a single upstream completion
+        task = llm_inflight.get(prompt_key)
+        if task is None:
+            task = asyncio.ensure_future(self._request_completion(headers, payload, prompt_key, now))
+            llm_inflight[prompt_key] = task
+            task.add_done_callback(lambda _: llm_inflight.pop(prompt_key, None))
+
+        # Shield the shared task so one waiter disconnecting doesn't cancel it for the others
+        LLM_QUEUE_DEPTH.inc()
+        try:
+            with span("llm"):
+                completion = await asyncio.shield(task)
+        finally:
+            LLM_QUEUE_DEPTH.dec()
+        _report_usage(completion)
+        if not completion.failed and context_key is not None:
+            llm_cache[context_key] = (now, completion.text)
+        return completion.text
+
+    def _context_key(self, query: str, context_data: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Cache key for a question and its raw context data, or None if the context can't be encoded"""
+        try:
+            body = orjson.dumps([self.model, query, context_data],
+                                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+        except orjson.JSONEncodeError:
+            return None
+        return "context:" + hashlib.blake2b(body, digest_size=16).hexdigest()
+
+    async def _request_completion(self, headers: Dict[str, str], payload: Dict[str, Any], cache_key: str, now: float) -> Completion:
+        """
+        Call the OpenAI chat completions API and cache a successful response
+        
+        Args:
+            headers (dict): Request headers including authorization
+            payload (dict): The chat completion request body
+            cache_key (str): Key under which to store the response in llm_cache
+            now (float): Timestamp to record for the cache entry
+            
+        Returns:
+            Completion: The LLM's response (or an error message, flagged as failed) and its token usage
+        """
+        started = time.perf_counter()
+        LLM_IN_FLIGHT.inc()
         try:
             async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    self.base_url,
-                    headers=headers,
-                    json={
-                        "model": self.model,
-                        "messages": messages + [{"role": "user", "content": query}],
-                        "temperature": 0.7,
-                        "max_tokens": 800,  # Increased for more detailed responses
-                    },
-                )
+                response = await client.post(self.base_url, headers=headers, json=payload)
                 response.raise_for_status()
                 
                 result = response.json()
                 llm_response = result['choices'][0]['message']['content']
+                usage = result.get('usage') or {}
+                LLM_TOKENS.labels("prompt").inc(usage.get('prompt_tokens', 0))
+                LLM_TOKENS.labels("completion").inc(usage.get('completion_tokens', 0))
                 # Store in cache
                 llm_cache[cache_key] = (now, llm_response)
-                return llm_response
+                return Completion(llm_response, usage.get('prompt_tokens', 0) + usage.get('completion_tokens', 0))
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 429:
-                return "Rate limit exceeded. Please try again later."
+                return Completion("Rate limit exceeded. Please try again later.", failed=True)
             print(f"Error generating response: {e}")
-            return f"Sorry, I couldn't generate a response: {str(e)}"
+            return Completion(f"Sorry, I couldn't generate a response: {str(e)}", failed=True)
         except Exception as e:
             print(f"Error generating response: {e}")
-            return f"Sorry, I couldn't generate a response: {str(e)}"
+            return Completion(f"Sorry, I couldn't generate a response: {str(e)}", failed=True)
+        finally:
+            LLM_IN_FLIGHT.dec()
+            LLM_LATENCY.observe(time.perf_counter() - started)
 
-    def _summarize_context_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def _summarize_context_data(self, data: Dict[str, Any], summary_cache: Dict = None) -> Dict[str, Any]:
         """
         Summarize the context data to a reasonable size for the LLM API, 
         handling combined data from multiple endpoints
+        
+        When a summary_cache is given, summaries of the shared source payloads are reused
+        across calls that were handed the same payload objects.
         """
         # Create a container for the summarized data
         summarized = {
@@ -145,13 +236,16 @@ class LLMService:
         try:
             # Process each type of data in the combined data
             if "league" in data:
-                summarized["league_structure"] = self._summarize_league_structure(data["league"])
+                summarized["league_structure"] = self._summarize_source(
+                    data["league"], self._summarize_league_structure, summary_cache)
                 
             if "standings" in data:
-                summarized["standings"] = self._summarize_standings_data(data["standings"])
+                summarized["standings"] = self._summarize_source(
+                    data["standings"], self._summarize_standings_data, summary_cache)
                 
             if "schedule" in data:
-                summarized["schedule"] = self._summarize_schedule_data(data["schedule"])
+                summarized["schedule"] = self._summarize_source(
+                    data["schedule"], self._summarize_schedule_data, summary_cache)
                 
             if "team_profiles" in data:
                 summarized["team_profiles"] = {}
@@ -159,7 +253,8 @@ class LLMService:
                     summarized["team_profiles"][team_code] = self._summarize_team_profile(profile)
                     
             if "injuries" in data:
-                summarized["injuries"] = self._summarize_injury_data(data["injuries"])
+                summarized["injuries"] = self._summarize_source(
+                    data["injuries"], self._summarize_injury_data, summary_cache)
                 
             if "team_injuries" in data:
                 summarized["team_injuries"] = {}
@@ -179,11 +274,13 @@ class LLMService:
                 
             # Handle draft rankings data
             if "draft_rankings" in data:
-                summarized["draft_rankings"] = self._summarize_fantasy_rankings(data["draft_rankings"])
+                summarized["draft_rankings"] = self._summarize_source(
+                    data["draft_rankings"], self._summarize_fantasy_rankings, summary_cache)
                 
             # Handle weekly rankings data  
             if "weekly_rankings" in data:
-                summarized["weekly_rankings"] = self._summarize_fantasy_rankings(data["weekly_rankings"])
+                summarized["weekly_rankings"] = self._summarize_source(
+                    data["weekly_rankings"], self._summarize_fantasy_rankings, summary_cache)
                 
             return summarized
         except Exception as e:
@@ -191,6 +288,18 @@ class LLMService:
             return {"summary": "Data available but could not be summarized due to an error",
                     "error": str(e)}
 
+    def _summarize_source(self, source_data: Any, summarizer, summary_cache: Dict = None) -> Any:
+        """Summarize one source payload, reusing an earlier summary of the same object if cached"""
+        if summary_cache is None:
+            return summarizer(source_data)
+        key = (summarizer.__name__, id(source_data))
+        cached = summary_cache.get(key)
+        # The entry keeps a reference to its source, so its id can't be reused while the cache
+        # lives; the identity check still guards against a cache shared beyond that
+        if cached is None or cached[0] is not source_data:
+            cached = summary_cache[key] = (source_data, summarizer(source_data))
+        return cached[1]
+
     def _summarize_league_structure(self, league_data: Dict[str, Any]) -> Dict[str, Any]:
         """Summarize league structure data"""
         if not league_data:
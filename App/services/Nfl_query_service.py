@@ -1,9 +1,55 @@
 from App.services.api_client import nfl_api_client
 from App.services.LLm_service import llm_service
+from App.core.config import settings
+from App.core.request_context import deadline_scope, mark_stale
+from App.core.timing import span
+from App.services.nfl_calendar import nfl_calendar
+from App.services.answer_cache import answer_cache, normalize_query, context_digest
+from App.services.LLm_service import llm_usage
+from App.services.admission import query_admission, Overloaded
+from App.services.rate_limiter import upstream_priority, PRIORITY_USER, PRIORITY_QUERY
+from App.core.metrics import QUERY_ADMISSIONS
+from contextlib import contextmanager
+from fastapi import HTTPException
 import re
-import datetime
+import asyncio
 from typing import Dict, List, Any, Tuple, Optional
 
+@contextmanager
+def query_priority():
+    """Fetch query data below the data routes' rate limiter priority (background callers stay lower)"""
+    token = upstream_priority.set(PRIORITY_QUERY) if upstream_priority.get() == PRIORITY_USER else None
+    try:
+        yield
+    finally:
+        if token is not None:
+            upstream_priority.reset(token)
+
+class SharedFetchClient:
+    """
+    Wraps the NFL API client so that identical calls made through it share one request.
+    
+    Used when processing a batch of queries: each distinct source (method and arguments)
+    is fetched once and every query that needs it awaits the same result.
+    """
+
+    def __init__(self, api_client):
+        self._api_client = api_client
+        self._requests = {}
+
+    def __getattr__(self, name):
+        method = getattr(self._api_client, name)
+
+        async def shared_call(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            task = self._requests.get(key)
+            if task is None:
+                task = asyncio.ensure_future(method(*args, **kwargs))
+                self._requests[key] = task
+            return await asyncio.shield(task)
+
+        return shared_call
+
 class NFLQueryService:
     """
     Service to handle user queries related to NFL data
@@ -26,67 +72,189 @@ class NFLQueryService:
             "titans": "TEN", "commanders": "WAS", "washington": "WAS"
         }
 
-    async def process_query(self, query: str):
+    async def process_query(self, query: str, raise_errors: bool = False):
         """
         Process a natural language query about NFL data
         
         Args:
             query (str): The user's question about NFL data
+            raise_errors (bool): Raise instead of answering with an apology when the question
+                can't be answered (used by background jobs, which report the failure)
             
         Returns:
             dict: Response containing the LLM's answer and relevant data
+            
+        Raises:
+            Overloaded: 503 with Retry-After when too many queries are already waiting
+            HTTPException: With raise_errors, when the data or the LLM answer couldn't be obtained
         """
         try:
-            # Determine query type and fetch relevant data
+            # Popular questions are answered ahead of time (see answer_cache)
+            normalized = normalize_query(query)
+            answer_cache.record(normalized, query)
+            precomputed = answer_cache.get(normalized)
+            if precomputed is not None:
+                return {**precomputed, "query": query}
+            
+            # Bounded concurrency and queue, so a burst of queries can't starve the data routes
+            async with query_admission.admit():
+                query_type, context_data = await self.fetch_context(query)
+                usage = {"tokens": 0, "failed": False}
+                token = llm_usage.set(usage)
+                try:
+                    result = await self._answer_query(query, query_type, context_data)
+                finally:
+                    llm_usage.reset(token)
+            if raise_errors and (usage["failed"] or ("error" in context_data and len(context_data) <= 2)):
+                raise HTTPException(status_code=502, detail=result["answer"])
+            # Keep only real answers: a failed completion's apology must not be served to everyone
+            if "error" not in context_data and not usage["failed"] and answer_cache.is_popular(normalized):
+                answer_cache.store(normalized, result, context_digest(context_data))
+            return result
+            
+        except Overloaded:
+            # Degrade to an outdated answer to the same question rather than turning it away
+            stale = answer_cache.get_stale(normalize_query(query))
+            if stale is None:
+                raise
+            response, age = stale
+            QUERY_ADMISSIONS.labels("degraded").inc()
+            mark_stale(age)
+            return {**response, "query": query}
+        except Exception as e:
+            if raise_errors:
+                raise
+            return self._error_response(query, e)
+
+    async def fetch_context(self, query: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Classify a query and fetch the data needed to answer it
+        
+        Returns:
+            tuple: The query type and the context data
+        """
+        # Determine query type and fetch relevant data
+        with span("classify"):
+            nfl_calendar.ensure_fresh()
             query_type, params = self._classify_query(query)
+        # Bound the data fetches so enough time is left for the LLM call
+        with deadline_scope(settings.QUERY_FETCH_TIMEOUT), query_priority(), span("fetch"):
             context_data = await self._fetch_relevant_data(query_type, params)
+        return query_type, context_data
+
+    def start_precompute(self):
+        """Start keeping answers to the most popular questions ready in the background"""
+        answer_cache.start(self.fetch_context, self._answer_query)
+
+    async def process_batch(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Process many natural language queries, sharing data fetches and summaries between them
+        
+        All queries are classified up front and their data is fetched concurrently through a
+        client that requests each distinct source only once. Each source is summarized once,
+        and LLM calls run with bounded concurrency. The batch is admitted like single queries,
+        holding one admission slot per LLM call it runs at a time.
+        
+        Args:
+            queries (list): The user's questions about NFL data
             
-            # Check if there was an error in fetching data
-            if "error" in context_data and len(context_data) <= 2:  # Only error and query_type
-                default_sources = self.get_data_sources(query_type)
-                llm_response = f"I'm sorry, I couldn't retrieve the data needed to answer your question. Error: {context_data.get('error', 'Unknown error')}"
-                
-                return {
-                    "query": query,
-                    "answer": llm_response,
-                    "data_sources": default_sources
-                }
+        Returns:
+            list: One response dict per query, in the same order as the queries
             
-            # Track which endpoints were actually used in this query
-            used_endpoints = []
-            for key in context_data:
-                if key not in ["query_type", "metadata", "original_query", "error"]:
-                    # Convert the key to an endpoint name format
-                    endpoint_name = key.replace("_", "-") if key != "league" else "teams"
-                    endpoint_path = f"/nfl/{endpoint_name}"
-                    if endpoint_path not in used_endpoints:
-                        used_endpoints.append(endpoint_path)
-            
-            # Make sure we have at least one data source
-            if not used_endpoints:
-                used_endpoints = self.get_data_sources(query_type)
-                
-                # Ensure data_sources is always a list, never empty
-                if not used_endpoints:
-                    used_endpoints = ["Fantasy Nerds NFL API Data"]
+        Raises:
+            Overloaded: 503 with Retry-After when the query service is too busy for the batch
+        """
+        llm_concurrency = min(len(queries), settings.QUERY_BATCH_LLM_CONCURRENCY)
+        async with query_admission.admit(llm_concurrency):
+            return await self._process_batch(queries, llm_concurrency)
 
-            # Generate a LLM response with the context data
-            llm_response = await self.llm_service.generate_response(query, context_data)
+    async def _process_batch(self, queries: List[str], llm_concurrency: int) -> List[Dict[str, Any]]:
+        """Answer an admitted batch (see process_batch)"""
+        nfl_calendar.ensure_fresh()
+        classified = [self._classify_query(query) for query in queries]
+        
+        shared_client = SharedFetchClient(self.api_client)
+        with deadline_scope(settings.QUERY_FETCH_TIMEOUT), query_priority():
+            contexts = await asyncio.gather(*(
+                self._fetch_relevant_data(query_type, params, shared_client)
+                for query_type, params in classified
+            ))
+        
+        summary_cache = {}
+        semaphore = asyncio.Semaphore(llm_concurrency)
+        
+        async def answer(query, query_type, context_data):
+            async with semaphore:
+                try:
+                    return await self._answer_query(query, query_type, context_data, summary_cache)
+                except Exception as e:
+                    return self._error_response(query, e)
+        
+        return await asyncio.gather(*(
+            answer(query, query_type, context_data)
+            for query, (query_type, _), context_data in zip(queries, classified, contexts)
+        ))
 
+    async def _answer_query(self, query: str, query_type: str, context_data: Dict[str, Any],
+                            summary_cache: Dict = None) -> Dict[str, Any]:
+        """
+        Generate the answer for a classified query from its fetched context data
+        
+        Args:
+            query (str): The user's question about NFL data
+            query_type (str): Type of the query (player_rankings, matchups, etc.)
+            context_data (dict): Data fetched for the query
+            summary_cache (dict, optional): Shared per-source summaries, used by batch processing
+            
+        Returns:
+            dict: Response containing the LLM's answer and relevant data
+        """
+        # Check if there was an error in fetching data
+        if "error" in context_data and len(context_data) <= 2:  # Only error and query_type
+            default_sources = self.get_data_sources(query_type)
+            llm_response = f"I'm sorry, I couldn't retrieve the data needed to answer your question. Error: {context_data.get('error', 'Unknown error')}"
+            
             return {
                 "query": query,
                 "answer": llm_response,
-                "data_sources": used_endpoints
+                "data_sources": default_sources
             }
+        
+        # Track which endpoints were actually used in this query
+        used_endpoints = []
+        for key in context_data:
+            if key not in ["query_type", "metadata", "original_query", "error"]:
+                # Convert the key to an endpoint name format
+                endpoint_name = key.replace("_", "-") if key != "league" else "teams"
+                endpoint_path = f"/nfl/{endpoint_name}"
+                if endpoint_path not in used_endpoints:
+                    used_endpoints.append(endpoint_path)
+        
+        # Make sure we have at least one data source
+        if not used_endpoints:
+            used_endpoints = self.get_data_sources(query_type)
             
-        except Exception as e:
-            # Fallback for any unexpected errors
-            print(f"Error in process_query: {str(e)}")
-            return {
-                "query": query,
-                "answer": f"I'm sorry, an unexpected error occurred while processing your question. Error: {str(e)}",
-                "data_sources": ["Fantasy Nerds NFL API Data"]
-            }
+            # Ensure data_sources is always a list, never empty
+            if not used_endpoints:
+                used_endpoints = ["Fantasy Nerds NFL API Data"]
+
+        # Generate a LLM response with the context data
+        llm_response = await self.llm_service.generate_response(query, context_data, summary_cache)
+
+        return {
+            "query": query,
+            "answer": llm_response,
+            "data_sources": used_endpoints
+        }
+
+    def _error_response(self, query: str, error: Exception) -> Dict[str, Any]:
+        """Fallback response for any unexpected error while processing a query"""
+        print(f"Error in process_query: {str(error)}")
+        return {
+            "query": query,
+            "answer": f"I'm sorry, an unexpected error occurred while processing your question. Error: {str(error)}",
+            "data_sources": ["Fantasy Nerds NFL API Data"]
+        }
     
     def _classify_query(self, query: str) -> Tuple[str, Dict[str, Any]]:
         """
@@ -100,33 +268,23 @@ class NFLQueryService:
         """
         query = query.lower()
         params = {"original_query": query}
+        season, current_week = nfl_calendar.week()
         
         # Extract year if present in query
         year_match = re.search(r'20\d{2}', query)
         if year_match:
             params["year"] = year_match.group(0)
         else:
-            # Default to current year
-            current_year = datetime.datetime.now().year
-            params["year"] = str(current_year)
+            # Default to the current season, which started the previous year in January and February
+            params["year"] = str(season)
         
         # Extract week if mentioned
         week_match = re.search(r'week (\d+)', query)
         if week_match:
             params["week"] = week_match.group(1)
         else:
-            # Determine current week based on the current date
-            # This is a simplified approach - in production you would calculate the actual NFL week
-            current_month = datetime.datetime.now().month
-            current_day = datetime.datetime.now().day
-            
-            # Regular season typically starts in September
-            if current_month < 9:
-                params["week"] = "1"  # Preseason
-            else:
-                # Rough approximation - a better approach would use a lookup table or API
-                week_num = ((current_month - 9) * 4) + (current_day // 7) + 1
-                params["week"] = str(min(17, max(1, week_num)))  # Ensure between 1-17
+            # Current regular season week from the calendar: 1 before the season, 18 after it
+            params["week"] = str(min(18, max(1, current_week)))
         
         # Extract season type if mentioned
         if any(term in query for term in ["preseason", "pre-season", "pre season"]):
@@ -134,14 +292,7 @@ class NFLQueryService:
         elif any(term in query for term in ["postseason", "post-season", "post season", "playoffs"]):
             params["season_type"] = "PST"
         else:
-            # Determine season type based on current date
-            current_month = datetime.datetime.now().month
-            if current_month < 9:
-                params["season_type"] = "PRE"  # Preseason before September
-            elif current_month > 12 or current_month < 3:
-                params["season_type"] = "PST"  # Postseason Jan-Feb
-            else:
-                params["season_type"] = "REG"  # Regular season Sep-Dec
+            params["season_type"] = nfl_calendar.season_type()
             
         # Extract team mentions
         teams_found = []
@@ -262,17 +413,19 @@ class NFLQueryService:
         # Default to general query
         return "general", params
 
-    async def _fetch_relevant_data(self, query_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _fetch_relevant_data(self, query_type: str, params: Dict[str, Any], api_client=None) -> Dict[str, Any]:
         """
         Fetch the relevant NFL data based on query type, combining multiple data sources when needed
         
         Args:
             query_type (str): Type of the query (player_rankings, matchups, etc.)
             params (dict): Parameters extracted from the query
+            api_client (optional): Client to fetch through (defaults to the shared NFL API client)
             
         Returns:
             dict: Combined data from relevant endpoints
         """
+        api_client = api_client or self.api_client
         try:
             # Get the basic parameters from the params dict
             teams = params.get("teams", [])
@@ -286,7 +439,7 @@ class NFLQueryService:
             # Fetch data based on query type with combined relevant sources
             if query_type == "player_rankings":
                 # Get league structure for team context
-                combined_data["league"] = await self.api_client.get_teams()
+                combined_data["league"] = await api_client.get_teams()
                 
                 # Get draft rankings for rankings context
                 try:
@@ -300,7 +453,7 @@ class NFLQueryService:
                     elif "superflex" in original_query or "2qb" in original_query:
                         format_type = "superflex"
                     
-                    combined_data["draft_rankings"] = await self.api_client.get_draft_rankings(format_type)
+                    combined_data["draft_rankings"] = await api_client.get_draft_rankings(format_type)
                     
                     # Add metadata about which player we're looking for
                     player_name = params.get("player")
@@ -329,19 +482,19 @@ class NFLQueryService:
                 
                 # Get weekly rankings for additional context
                 try:
-                    combined_data["weekly_rankings"] = await self.api_client.get_weekly_rankings()
+                    combined_data["weekly_rankings"] = await api_client.get_weekly_rankings()
                 except Exception as e:
                     print(f"Error fetching weekly rankings: {e}")
                 
                 # Add ADP data for additional ranking context
                 try:
-                    combined_data["adp"] = await self.api_client.get_adp(format=format_type)
+                    combined_data["adp"] = await api_client.get_adp(format=format_type)
                 except Exception as e:
                     print(f"Error fetching ADP data: {e}")
                 
             elif query_type == "matchups":
                 # Get schedule data
-                combined_data["schedule"] = await self.api_client.get_schedule()
+                combined_data["schedule"] = await api_client.get_schedule()
                 
                 # If specific teams mentioned, filter or highlight their games
                 if teams:
@@ -356,16 +509,16 @@ class NFLQueryService:
             elif query_type == "injuries":
                 # Get injury data
                 try:
-                    combined_data["injuries"] = await self.api_client.get_weekly_injuries()
+                    combined_data["injuries"] = await api_client.get_weekly_injuries()
                 except Exception as e:
                     print(f"Error fetching injuries: {e}")
                 
                 # Get team context
-                combined_data["league"] = await self.api_client.get_teams()
+                combined_data["league"] = await api_client.get_teams()
                 
                 # Add news data which may contain injury updates
                 try:
-                    combined_data["news"] = await self.api_client.get_nfl_news()
+                    combined_data["news"] = await api_client.get_nfl_news()
                 except Exception as e:
                     print(f"Error fetching news: {e}")
                 
@@ -380,10 +533,10 @@ class NFLQueryService:
                 
             elif query_type == "schedule":
                 # Get the full schedule
-                combined_data["schedule"] = await self.api_client.get_schedule()
+                combined_data["schedule"] = await api_client.get_schedule()
                 
                 # Get team context
-                combined_data["league"] = await self.api_client.get_teams()
+                combined_data["league"] = await api_client.get_teams()
                 
                 # If specific teams mentioned, filter their games
                 if teams:
@@ -403,19 +556,19 @@ class NFLQueryService:
             elif query_type == "depth_chart":
                 # For depth charts, we need the full depth charts data
                 try:
-                    combined_data["depth_charts"] = await self.api_client.get_depth_charts()
+                    combined_data["depth_charts"] = await api_client.get_depth_charts()
                 except Exception as e:
                     print(f"Error fetching depth charts: {e}")
                 
                 # Also get teams information for context
-                combined_data["league"] = await self.api_client.get_teams()
+                combined_data["league"] = await api_client.get_teams()
                 
             elif query_type == "standings":
                 # Get standings data
-                combined_data["standings"] = await self.api_client.get_standings()
+                combined_data["standings"] = await api_client.get_standings()
                 
                 # Get team context
-                combined_data["league"] = await self.api_client.get_teams()
+                combined_data["league"] = await api_client.get_teams()
                 
             elif query_type == "draft_rankings":
                 # Get draft rankings
@@ -428,8 +581,8 @@ class NFLQueryService:
                 elif "superflex" in original_query or "2qb" in original_query:
                     format_type = "superflex"
                     
-                combined_data["draft_rankings"] = await self.api_client.get_draft_rankings(format_type)
-                combined_data["adp"] = await self.api_client.get_adp(format=format_type)
+                combined_data["draft_rankings"] = await api_client.get_draft_rankings(format_type)
+                combined_data["adp"] = await api_client.get_adp(format=format_type)
                 
             elif query_type == "auction_values":
                 # Get auction values
@@ -450,7 +603,7 @@ class NFLQueryService:
                 if budget_match:
                     budget = int(budget_match.group(1))
                     
-                combined_data["auction_values"] = await self.api_client.get_auction_values(teams, budget, format_type)
+                combined_data["auction_values"] = await api_client.get_auction_values(teams, budget, format_type)
                 
             elif query_type == "player_tiers":
                 # Get player tiers
@@ -459,60 +612,60 @@ class NFLQueryService:
                 if "ppr" in original_query:
                     format_type = "ppr"
                     
-                combined_data["player_tiers"] = await self.api_client.get_player_tiers(format_type)
+                combined_data["player_tiers"] = await api_client.get_player_tiers(format_type)
                 
             elif query_type == "dynasty":
                 # Get dynasty rankings
-                combined_data["dynasty_rankings"] = await self.api_client.get_dynasty_rankings()
+                combined_data["dynasty_rankings"] = await api_client.get_dynasty_rankings()
                 
             elif query_type == "bestball":
                 # Get best ball rankings
-                combined_data["bestball_rankings"] = await self.api_client.get_best_ball_rankings()
+                combined_data["bestball_rankings"] = await api_client.get_best_ball_rankings()
                 
             elif query_type == "bye_weeks":
                 # Get bye weeks
-                combined_data["bye_weeks"] = await self.api_client.get_bye_weeks()
+                combined_data["bye_weeks"] = await api_client.get_bye_weeks()
                 
             elif query_type == "defense_rankings":
                 # Get defensive rankings
-                combined_data["defensive_rankings"] = await self.api_client.get_defensive_rankings()
+                combined_data["defensive_rankings"] = await api_client.get_defensive_rankings()
                 
             elif query_type == "weather":
                 # Get weather forecasts
-                combined_data["weather_forecasts"] = await self.api_client.get_weather_forecasts()
+                combined_data["weather_forecasts"] = await api_client.get_weather_forecasts()
                 
                 # Get teams and schedule for context
-                combined_data["league"] = await self.api_client.get_teams()
-                combined_data["schedule"] = await self.api_client.get_schedule()
+                combined_data["league"] = await api_client.get_teams()
+                combined_data["schedule"] = await api_client.get_schedule()
             
             elif query_type == "adds_drops":
                 # Get player adds and drops
-                combined_data["adds_drops"] = await self.api_client.get_player_adds_drops()
+                combined_data["adds_drops"] = await api_client.get_player_adds_drops()
                 
                 # Get additional context
-                combined_data["league"] = await self.api_client.get_teams()
+                combined_data["league"] = await api_client.get_teams()
             
             elif query_type == "ros_projections":
                 # Get rest of season projections
-                combined_data["ros_projections"] = await self.api_client.get_rest_of_season_projections()
+                combined_data["ros_projections"] = await api_client.get_rest_of_season_projections()
                 
                 # Get additional context for comparison
                 try:
-                    combined_data["weekly_rankings"] = await self.api_client.get_weekly_rankings()
+                    combined_data["weekly_rankings"] = await api_client.get_weekly_rankings()
                 except Exception as e:
                     print(f"Error fetching weekly rankings: {e}")
                     
             else:  # General query
                 # For general queries, provide league structure and standings
-                combined_data["league"] = await self.api_client.get_teams()
-                combined_data["standings"] = await self.api_client.get_standings()
+                combined_data["league"] = await api_client.get_teams()
+                combined_data["standings"] = await api_client.get_standings()
                 
                 # Add current week's schedule
-                combined_data["schedule"] = await self.api_client.get_schedule()
+                combined_data["schedule"] = await api_client.get_schedule()
                 
                 # Add weekly rankings and projections
                 try:
-                    combined_data["weekly_rankings"] = await self.api_client.get_weekly_rankings()
+                    combined_data["weekly_rankings"] = await api_client.get_weekly_rankings()
                 except Exception as e:
                     print(f"Error fetching weekly rankings: {e}")
             
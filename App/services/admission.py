@@ -0,0 +1,121 @@
+import math
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from App.core.config import settings
+from App.core.metrics import QUERY_ADMISSIONS, QUERY_QUEUE_DEPTH, QUERIES_IN_FLIGHT
+
+class Overloaded(HTTPException):
+    """503 for work turned away by admission control, carrying a Retry-After header"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail=f"Query service is busy ({reason}); retry in {retry_after} seconds",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+class AdmissionController:
+    """
+    Bounded concurrency and queue for expensive work (natural-language queries).
+
+    At most max_concurrency slots are in use at once and at most max_queue callers wait for
+    theirs. A single query takes one slot; a batch takes as many as it runs LLM calls in
+    parallel. A caller is turned away with a 503 and a Retry-After when the queue is full or
+    when its estimated wait (slots needed ahead of it times the average run time, spread over
+    the slots) exceeds the target, so a burst of queries sheds load instead of piling up
+    coroutines and connections that slow down the cached data routes served by the same worker.
+    Waiters are served in arrival order, so a batch isn't starved by a stream of single queries.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, target_wait: float):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.target_wait = target_wait
+        self.available = self.max_concurrency
+        self.waiters = deque()  # (slots, future) in arrival order
+        self.running = 0  # slots in use
+        self.waiting = 0  # slots requested by queued callers
+        self.average_run_time = 0.0  # EWMA in seconds, 0 until the first run completes
+
+    def _must_wait(self, slots: int) -> bool:
+        return bool(self.waiters) or self.available < slots
+
+    def estimated_wait(self, slots: int = 1) -> float:
+        """Seconds a caller arriving now would wait for its slots"""
+        if not self._must_wait(slots):
+            return 0.0
+        return (self.waiting + slots) / self.max_concurrency * self.average_run_time
+
+    def _reject(self, reason: str, slots: int):
+        QUERY_ADMISSIONS.labels("rejected").inc()
+        raise Overloaded(reason, max(1, math.ceil(self.estimated_wait(slots) or self.target_wait)))
+
+    async def _acquire(self, slots: int):
+        if not self._must_wait(slots):
+            self.available -= slots
+            return
+        waiter = (slots, asyncio.get_running_loop().create_future())
+        self.waiters.append(waiter)
+        self.waiting += slots
+        QUERY_QUEUE_DEPTH.inc()
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            if waiter[1].done() and not waiter[1].cancelled():
+                self._release(slots)  # granted just as we were cancelled
+            else:
+                self.waiters.remove(waiter)
+                self._wake()  # callers behind us may fit now
+            raise
+        finally:
+            self.waiting -= slots
+            QUERY_QUEUE_DEPTH.dec()
+
+    def _release(self, slots: int):
+        self.available += slots
+        self._wake()
+
+    def _wake(self):
+        while self.waiters and self.waiters[0][0] <= self.available:
+            slots, future = self.waiters.popleft()
+            if not future.done():
+                self.available -= slots
+                future.set_result(None)
+
+    @asynccontextmanager
+    async def admit(self, slots: int = 1):
+        """
+        Hold slots for the enclosed block, waiting for them if needed
+
+        Args:
+            slots (int): Concurrent LLM calls the block makes (capped at max_concurrency)
+
+        Raises:
+            Overloaded: 503 with Retry-After when the caller would wait too long
+        """
+        slots = min(max(1, slots), self.max_concurrency)
+        if len(self.waiters) >= self.max_queue and self._must_wait(slots):
+            self._reject("queue full", slots)
+        if self.estimated_wait(slots) > self.target_wait:
+            self._reject("estimated wait too long", slots)
+
+        await self._acquire(slots)
+        QUERY_ADMISSIONS.labels("admitted").inc()
+        self.running += slots
+        QUERIES_IN_FLIGHT.inc(slots)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.average_run_time = elapsed if not self.average_run_time else 0.8 * self.average_run_time + 0.2 * elapsed
+            self.running -= slots
+            QUERIES_IN_FLIGHT.dec(slots)
+            self._release(slots)
+
+query_admission = AdmissionController(
+    settings.QUERY_MAX_CONCURRENCY, settings.QUERY_MAX_QUEUE, settings.QUERY_TARGET_WAIT
+)
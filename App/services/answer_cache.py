@@ -0,0 +1,149 @@
+import re
+import time
+import asyncio
+import hashlib
+import functools
+import contextvars
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+import orjson
+from App.core.config import settings
+from App.services.popularity import PopularityTracker
+from App.services.LLm_service import llm_usage
+from App.services.rate_limiter import upstream_priority, PRIORITY_BACKGROUND
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so rephrasings of one question match"""
+    return " ".join(re.sub(r"[^\w\s']", " ", query.lower()).split())
+
+def context_digest(context_data: Dict[str, Any]) -> bytes:
+    """Fingerprint of the data a question was answered from"""
+    body = orjson.dumps(context_data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+class PrecomputedAnswer:
+    __slots__ = ("response", "digest", "answered_at")
+
+    def __init__(self, response: Dict[str, Any], digest: bytes, answered_at: float):
+        self.response = response
+        self.digest = digest
+        self.answered_at = answered_at
+
+class AnswerCache:
+    """
+    Answers to the most popular /nfl/query questions, kept ready so they need no LLM call.
+
+    Questions are counted by their normalized text. Every interval, each of the top-N questions
+    whose answer is missing or about to expire has its data fetched again: if the data is the
+    same as when it was answered, the answer is simply renewed; otherwise it is regenerated,
+    as long as the tokens spent on regeneration in the last hour stay within the budget. Any
+    question served on demand while it is in the top N is stored the same way; the top N is
+    ranked once per interval rather than on every question.
+    """
+
+    def __init__(self):
+        self.tracker = PopularityTracker(settings.QUERY_POPULARITY_HALF_LIFE, settings.POPULARITY_MAX_KEYS)
+        self.answers: Dict[str, PrecomputedAnswer] = {}
+        self.spent: deque = deque()  # (timestamp, tokens) of regenerations within the last hour
+        self.popular: Set[str] = set()  # the top-N questions as of the last ranking
+        self.ranked_at = float("-inf")
+        self.fetch_context = None
+        self.answer = None
+        self.task: Optional[asyncio.Task] = None
+
+    def record(self, normalized: str, query: str):
+        self.tracker.record(normalized, functools.partial(self._regenerate, normalized, query))
+
+    def get(self, normalized: str) -> Optional[Dict[str, Any]]:
+        entry = self.answers.get(normalized)
+        if entry is None or time.time() - entry.answered_at >= settings.QUERY_ANSWER_TTL:
+            return None
+        return entry.response
+
+    def get_stale(self, normalized: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """An answer regardless of its age, and that age in seconds, for when a fresh one can't be made"""
+        entry = self.answers.get(normalized)
+        if entry is None:
+            return None
+        return entry.response, time.time() - entry.answered_at
+
+    def is_popular(self, normalized: str) -> bool:
+        return normalized in self._popular()
+
+    def store(self, normalized: str, response: Dict[str, Any], digest: bytes):
+        self.answers[normalized] = PrecomputedAnswer(response, digest, time.time())
+
+    def _popular(self) -> Set[str]:
+        """The top-N questions, ranked again at most once per precompute interval"""
+        if time.monotonic() - self.ranked_at >= settings.QUERY_PRECOMPUTE_INTERVAL:
+            self._rank()
+        return self.popular
+
+    def _rank(self) -> Set[str]:
+        self.popular = {key for key, score in self.tracker.top(settings.QUERY_PRECOMPUTE_TOP_N)
+                        if score >= settings.QUERY_PRECOMPUTE_MIN_SCORE}
+        self.ranked_at = time.monotonic()
+        return self.popular
+
+    def tokens_spent(self) -> int:
+        cutoff = time.time() - 3600
+        while self.spent and self.spent[0][0] < cutoff:
+            self.spent.popleft()
+        return sum(tokens for _, tokens in self.spent)
+
+    def start(self, fetch_context: Callable[[str], Awaitable[Tuple[str, Dict[str, Any]]]],
+              answer: Callable[[str, str, Dict[str, Any]], Awaitable[Dict[str, Any]]]):
+        """
+        Start regenerating popular answers in the background, fetching a question's query type
+        and context data with fetch_context and answering from them with answer
+        """
+        self.fetch_context = fetch_context
+        self.answer = answer
+        if settings.QUERY_PRECOMPUTE_ENABLED and (self.task is None or self.task.done()):
+            # Start from an empty context so the task doesn't inherit request state
+            self.task = contextvars.Context().run(asyncio.ensure_future, self._run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self):
+        upstream_priority.set(PRIORITY_BACKGROUND)
+        while True:
+            await asyncio.sleep(settings.QUERY_PRECOMPUTE_INTERVAL)
+            popular = self._rank()
+            # Answers that dropped out of the top N are served until they expire, then let go
+            for key in [key for key in self.answers if key not in popular and self.get(key) is None]:
+                del self.answers[key]
+            for key in popular:
+                entry = self.answers.get(key)
+                if entry is not None and time.time() - entry.answered_at < settings.QUERY_ANSWER_TTL - settings.QUERY_PRECOMPUTE_LEAD_TIME:
+                    continue
+                try:
+                    await self.tracker.refreshers[key]()
+                except Exception as e:
+                    print(f"Precomputing the answer to '{key}' failed: {e}")
+
+    async def _regenerate(self, normalized: str, query: str):
+        query_type, context_data = await self.fetch_context(query)
+        if "error" in context_data:
+            return
+        digest = context_digest(context_data)
+        entry = self.answers.get(normalized)
+        if entry is not None and entry.digest == digest:
+            entry.answered_at = time.time()
+            return
+        if self.tokens_spent() >= settings.QUERY_PRECOMPUTE_TOKEN_BUDGET:
+            return
+        usage = {"tokens": 0, "failed": False}
+        token = llm_usage.set(usage)
+        try:
+            response = await self.answer(query, query_type, context_data)
+        finally:
+            llm_usage.reset(token)
+        self.spent.append((time.time(), usage["tokens"]))
+        if not usage["failed"]:
+            self.store(normalized, response, digest)
+
+answer_cache = AnswerCache()
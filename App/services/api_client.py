@@ -1,12 +1,16 @@
 import httpx
 from typing import Dict, Any, Optional, List, Union
 from fastapi import HTTPException
+from App.core.config import settings
+from App.core.request_context import remaining_time, DEADLINE_HEADER
+from App.services.rate_limiter import upstream_priority, PRIORITY_USER, PRIORITY_HEADER
+from App.core.timing import span
 
 class NFLApiClient:
     """
     Client for interacting with the cached NFL API endpoints
     """
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = settings.INTERNAL_API_URL):
         self.base_url = base_url
         self.client = httpx.AsyncClient(timeout=30.0)
         
@@ -143,11 +147,31 @@ class NFLApiClient:
         Returns:
             JSON response (can be a dictionary or a list)
         """
+        with span("fetch_" + endpoint.rsplit("/", 1)[-1]):
+            return await self._request(endpoint, params)
+
+    async def _request(self, endpoint: str, params: Dict[str, Any] = None) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Send the GET request for _get and map errors to HTTP exceptions"""
         try:
             url = f"{self.base_url}{endpoint}"
-            response = await self.client.get(url, params=params)
+            # Background callers keep their lower rate limiter priority on the route's upstream calls
+            headers = {}
+            priority = upstream_priority.get()
+            if priority != PRIORITY_USER:
+                headers[PRIORITY_HEADER] = priority
+            # Pass our remaining time budget on so the route can bound its upstream calls
+            remaining = remaining_time()
+            if remaining is not None:
+                if remaining <= 0:
+                    raise HTTPException(status_code=408, detail=f"Deadline exceeded before calling {endpoint}")
+                headers[DEADLINE_HEADER] = f"{remaining:.3f}"
+                response = await self.client.get(url, params=params, headers=headers, timeout=remaining)
+            else:
+                response = await self.client.get(url, params=params, headers=headers)
             response.raise_for_status()
             return response.json()
+        except HTTPException:
+            raise
         except httpx.HTTPStatusError as e:
             status_code = e.response.status_code
             detail = f"API error {status_code}: {str(e)}"
@@ -0,0 +1,62 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import tempfile
+from typing import Any, Dict, Optional
+from App.core.config import settings
+
+class CassetteStore:
+    """
+    Recorded Fantasy Nerds responses on local disk, for replaying real traffic offline.
+
+    Each response is one gzip-compressed JSON file holding the endpoint, its query parameters
+    (without the API key), the HTTP status, the response body and how long upstream took to
+    answer. Files are named by a hash of the endpoint and sorted parameters, grouped in one
+    directory per endpoint, so re-recording the same request overwrites its earlier recording.
+
+    save and load compress and read whole bodies, so callers on the event loop run them in an
+    executor.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, endpoint: str, params: Optional[Dict[str, Any]]) -> str:
+        params = {k: v for k, v in (params or {}).items() if k != "apikey"}
+        key = json.dumps([endpoint, sorted((k, str(v)) for k, v in params.items())])
+        name = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return os.path.join(self.directory, endpoint.replace("/", "_"), f"{name}.json.gz")
+
+    def save(self, endpoint: str, params: Optional[Dict[str, Any]], status: int, body: bytes, elapsed: float):
+        """Write one recording, replacing any earlier recording of the same request"""
+        path = self.path(endpoint, params)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        recording = {
+            "endpoint": endpoint,
+            "params": {k: v for k, v in (params or {}).items() if k != "apikey"},
+            "status": status,
+            "elapsed": elapsed,
+            "recorded_at": time.time(),
+            "body": body.decode("utf-8", errors="replace"),
+        }
+        # Write to a temporary file first so a concurrent replay never reads half a recording
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(json.dumps(recording).encode()))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, endpoint: str, params: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """The recording of a request, or None if it was never recorded"""
+        try:
+            with open(self.path(endpoint, params), "rb") as f:
+                return json.loads(gzip.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+
+cassette_store = CassetteStore(settings.CASSETTE_DIR)
@@ -0,0 +1,145 @@
+import time
+import secrets
+import functools
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+from App.core.config import settings
+from App.services.nfl_service import add_refresh_listener
+
+# Low bits of a version count the versions of one feed; the high bits are the feed's epoch
+VERSION_BITS = 24
+
+def _index_injuries(data: Any) -> Dict[str, Any]:
+    """Injury reports keyed by player id; the report groups them by team"""
+    teams = data.get("teams", {}) if isinstance(data, dict) else {}
+    if isinstance(teams, dict):
+        rows = [row for team_rows in teams.values() for row in team_rows]
+    else:
+        rows = [row for team in teams if isinstance(team, dict) for row in team.get("players") or []]
+    return {str(row.get("playerId")): row for row in rows if isinstance(row, dict)}
+
+def _index_news(data: Any) -> Dict[str, Any]:
+    """News articles keyed by link"""
+    articles = data.get("news", []) if isinstance(data, dict) else data
+    return {str(row.get("article_link")): row for row in articles if isinstance(row, dict)}
+
+def _index_add_drops(data: Any) -> Dict[str, Any]:
+    """Add and drop entries keyed by list and player id, so a player moving lists is a remove plus an add"""
+    index = {}
+    for section in ("adds", "drops"):
+        for row in (data.get(section) or []) if isinstance(data, dict) else []:
+            if isinstance(row, dict):
+                index[f"{section}:{row.get('playerId')}"] = row
+    return index
+
+def _index_depth(data: Any) -> Dict[str, Any]:
+    """Depth chart slots keyed by team and position"""
+    charts = data.get("charts", {}) if isinstance(data, dict) else {}
+    return {
+        f"{team}:{position}": players
+        for team, positions in charts.items() if isinstance(positions, dict)
+        for position, players in positions.items()
+    }
+
+class ChangeFeed:
+    """
+    Versioned structural diffs of one upstream source.
+
+    Each refresh is indexed by a stable key (player id, article link, team and position) and
+    compared to the previous snapshot. A refresh that changed anything becomes a new version
+    holding only the added, changed and removed entries. The log keeps the most recent
+    versions; a consumer further behind than that has to reload the full payload.
+
+    Listeners are called with each new version and the previous items of its removed keys,
+    which the log itself does not keep.
+
+    The log lives in one worker's memory, so versions start from a random epoch in their high
+    bits: a version issued by another worker, or before a restart, never falls in this feed's
+    range and gets a reset instead of a wrong diff.
+    """
+
+    def __init__(self, source: str, index: Callable[[Any], Dict[str, Any]], max_versions: int):
+        self.source = source
+        self.index = index
+        self.snapshot: Optional[Dict[str, Any]] = None  # written only while preparing an update
+        self.epoch = secrets.randbits(28) | 1
+        self.base = self.epoch << VERSION_BITS
+        self.version = self.base  # no baseline yet
+        self.log = deque(maxlen=max_versions)
+        self.listeners: List[Callable[[Dict[str, Any], Dict[str, Any]], None]] = []
+
+    def update(self, data: Any):
+        """Diff a fresh payload against the previous snapshot and log a version if it changed"""
+        apply = self.prepare(data)
+        if apply is not None:
+            apply()
+
+    def prepare(self, data: Any) -> Optional[Callable[[], None]]:
+        """
+        Index a fresh payload and diff it against the previous snapshot, off the event loop;
+        returns a function that logs the result as a version, or None if nothing changed
+        """
+        current = self.index(data)
+        previous = self.snapshot
+        self.snapshot = current
+        if previous is None:
+            # The first payload is the baseline everything after is diffed against
+            return self._set_baseline
+
+        added = [{"key": key, "item": item} for key, item in current.items() if key not in previous]
+        changed = [{"key": key, "item": item} for key, item in current.items()
+                   if key in previous and previous[key] != item]
+        removed = [key for key in previous if key not in current]
+        if not (added or changed or removed):
+            return None
+        return functools.partial(self._log_version, added, changed, removed, {key: previous[key] for key in removed})
+
+    def _set_baseline(self):
+        self.version = self.base + 1
+
+    def _log_version(self, added: List[Dict[str, Any]], changed: List[Dict[str, Any]], removed: List[str],
+                     removed_items: Dict[str, Any]):
+        self.version += 1
+        entry = {
+            "version": self.version,
+            "timestamp": time.time(),
+            "added": added,
+            "changed": changed,
+            "removed": removed,
+        }
+        self.log.append(entry)
+        for listener in self.listeners:
+            listener(entry, removed_items)
+
+    def changes_since(self, since: int) -> Dict[str, Any]:
+        """
+        Versions after `since`, or a reset when they are no longer (or never were) in the log
+
+        A reset tells the consumer to reload the full payload and continue from `version`.
+        """
+        oldest = self.log[0]["version"] if self.log else self.version + 1
+        reset = since >> VERSION_BITS != self.epoch or since <= self.base or since > self.version or since + 1 < oldest
+        return {
+            "source": self.source,
+            "version": self.version,
+            "since": since,
+            "reset": reset,
+            "changes": [] if reset else [entry for entry in self.log if entry["version"] > since],
+        }
+
+# Upstream endpoint -> change feed. Only the current view (no query parameters) is tracked;
+# diffing one week's report against another's would not describe a change.
+change_feeds: Dict[str, ChangeFeed] = {
+    "injuries": ChangeFeed("injuries", _index_injuries, settings.CHANGE_FEED_MAX_VERSIONS),
+    "news": ChangeFeed("news", _index_news, settings.CHANGE_FEED_MAX_VERSIONS),
+    "add-drops": ChangeFeed("add-drops", _index_add_drops, settings.CHANGE_FEED_MAX_VERSIONS),
+    "depth": ChangeFeed("depth", _index_depth, settings.CHANGE_FEED_MAX_VERSIONS),
+}
+
+def _on_refresh(endpoint: str, params: Dict[str, Any], payload) -> Optional[Callable[[], None]]:
+    feed = change_feeds.get(endpoint)
+    if feed is not None and not params:
+        return feed.prepare(payload.data)
+    return None
+
+add_refresh_listener(_on_refresh)
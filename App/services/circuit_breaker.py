@@ -0,0 +1,71 @@
+import time
+from typing import Dict
+from App.core.config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker for upstream calls.
+    
+    Trips open after a run of consecutive failures. While open, callers are refused without
+    touching upstream. Once the reset timeout passes a single probe is let through
+    (half-open); its outcome decides whether the circuit closes again or re-opens.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Whether a call may go upstream now"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                print(f"Circuit breaker for '{self.name}' opened after {self.failures} failure(s)")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def release_probe(self):
+        """Free the half-open probe slot when a call ended without recording an outcome"""
+        self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker will allow a probe"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    """Return the circuit breaker for an upstream endpoint, creating it on first use"""
+    breaker = breakers.get(endpoint)
+    if breaker is None:
+        breaker = CircuitBreaker(endpoint, settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_TIMEOUT)
+        breakers[endpoint] = breaker
+    return breaker
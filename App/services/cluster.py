@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import asyncio
+import fnmatch
+import hashlib
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+from App.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; every worker refreshes on its own
+    fcntl = None
+
+LOG_MAX_BYTES = 1 << 20  # the invalidation log is rotated past this size
+CLEANUP_INTERVAL = 300.0  # seconds between sweeps of stale shared documents and lock files
+
+class ClusterCoordinator:
+    """
+    Cache coordination between the workers on a host, through a shared directory.
+
+    - Invalidations are appended to invalidations.jsonl (one write on an O_APPEND descriptor,
+      so lines from concurrent workers don't interleave). Each worker reads the lines added
+      since it last looked, off the event loop, and drops the matching entries from its own
+      cache. Past LOG_MAX_BYTES the log is renamed to invalidations.jsonl.1 and a new one is
+      started; a worker finishes reading the previous log before moving to the new one.
+    - Upstream fetches of a document (upstream, endpoint and params) are serialized by a flock
+      on a per-document lock file. The worker holding the lock fetches and publishes the body
+      in results/; workers that wanted the same document wait for the lock and take the body it
+      published, if recent enough, instead of calling upstream themselves. Documents older
+      than CLUSTER_SHARE_MAX_AGE can't be shared anymore and are swept with idle lock files.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.log_path = os.path.join(directory, "invalidations.jsonl")
+        self.started = False  # whether the invalidation log has been looked at yet
+        self.inode: Optional[int] = None  # of the invalidation log being read, None before it exists
+        self.offset = 0  # into that log
+        self.checked_at = 0.0
+        self.polling = False
+        self.cleaned_at = time.monotonic()
+        self.invalidated_at = 0.0  # latest invalidation seen; older published documents aren't shared
+
+    @property
+    def enabled(self) -> bool:
+        return settings.CLUSTER_COORDINATION_ENABLED
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _result_path(self, key: str) -> str:
+        return os.path.join(self.directory, "results", f"{self._digest(key)}.bin")
+
+    # Invalidation log
+
+    def invalidate(self, namespace: Optional[str] = None, pattern: Optional[str] = None):
+        """Tell every worker to drop the cache entries of a namespace and/or matching a key pattern"""
+        os.makedirs(self.directory, exist_ok=True)
+        now = time.time()
+        line = (json.dumps({"namespace": namespace, "pattern": pattern, "time": now, "pid": os.getpid()}) + "\n").encode()
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        self.invalidated_at = max(self.invalidated_at, now)
+        if size > LOG_MAX_BYTES:
+            self._rotate_log()
+
+    def _rotate_log(self):
+        """Move the log aside so it stops growing (one rotation at a time across workers)"""
+        if fcntl is None:
+            return
+        fd = os.open(os.path.join(self.directory, "invalidations.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.path.getsize(self.log_path) > LOG_MAX_BYTES:
+                    os.replace(self.log_path, self.log_path + ".1")
+            except FileNotFoundError:
+                pass
+        finally:
+            os.close(fd)  # closing the descriptor releases the lock
+
+    async def poll_invalidations(self) -> List[Dict[str, Any]]:
+        """
+        Invalidations logged by other workers since the last poll, checked at most every sync
+        interval; the log is read in the executor, and callers arriving while a read is in
+        progress don't wait for it
+        """
+        now = time.time()
+        if self.polling or now - self.checked_at < settings.CLUSTER_SYNC_INTERVAL:
+            return []
+        self.checked_at = now
+        self.polling = True
+        try:
+            entries = await asyncio.get_running_loop().run_in_executor(None, self._read_log)
+        finally:
+            self.polling = False
+        for entry in entries:
+            self.invalidated_at = max(self.invalidated_at, entry["time"])
+        return [entry for entry in entries if entry.get("pid") != os.getpid()]
+
+    def _read_log(self) -> List[Dict[str, Any]]:
+        """Lines added to the invalidation log since the last read; blocking, so call it off the event loop"""
+        if time.monotonic() - self.cleaned_at >= CLEANUP_INTERVAL:
+            self.cleanup()
+        try:
+            current = os.stat(self.log_path)
+        except FileNotFoundError:
+            current = None
+        if not self.started:
+            # Start from the end: invalidations from before this worker started don't apply
+            self.started = True
+            if current is not None:
+                self.inode, self.offset = current.st_ino, current.st_size
+            return []
+        chunks = []
+        if self.inode is not None and (current is None or current.st_ino != self.inode):
+            # Rotated since the last read: finish the previous log, then start the new one
+            chunks.append(self._read_from(self.log_path + ".1", self.inode, self.offset, partial=False))
+            self.inode = None
+        if self.inode is None:
+            if current is None:
+                return self._parse(chunks)
+            self.inode, self.offset = current.st_ino, 0
+        chunk = self._read_from(self.log_path, self.inode, self.offset, partial=True)
+        self.offset += len(chunk)
+        chunks.append(chunk)
+        return self._parse(chunks)
+
+    @staticmethod
+    def _read_from(path: str, inode: int, offset: int, partial: bool) -> bytes:
+        """Complete lines of path after offset, if path is still the log with this inode"""
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_ino != inode:
+                    return b""  # rotated more than once since the last read
+                f.seek(offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return b""
+        # Leave a partly written last line for the next poll
+        return chunk[:chunk.rfind(b"\n") + 1] if partial else chunk
+
+    @staticmethod
+    def _parse(chunks: List[bytes]) -> List[Dict[str, Any]]:
+        entries = []
+        for line in b"".join(chunks).splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # blank, or cut short by a rotation
+        return entries
+
+    def cleanup(self):
+        """
+        Delete shared documents too old to be reused and lock files nobody holds; blocking, so
+        call it off the event loop
+        """
+        self.cleaned_at = time.monotonic()
+        now = time.time()
+        results_dir = os.path.join(self.directory, "results")
+        for name in self._listdir(results_dir):
+            path = os.path.join(results_dir, name)
+            # Temporary files may still be being written
+            max_age = CLEANUP_INTERVAL if name.endswith(".tmp") else settings.CLUSTER_SHARE_MAX_AGE
+            try:
+                if now - os.path.getmtime(path) > max_age:
+                    os.unlink(path)
+            except FileNotFoundError:
+                pass
+        if fcntl is None:
+            return
+        lock_dir = os.path.join(self.directory, "locks")
+        for name in self._listdir(lock_dir):
+            path = os.path.join(lock_dir, name)
+            try:
+                if now - os.path.getmtime(path) < CLEANUP_INTERVAL:
+                    continue
+                fd = os.open(path, os.O_RDWR)
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                os.unlink(path)
+            except (BlockingIOError, FileNotFoundError):
+                pass  # held by a worker fetching right now
+            finally:
+                os.close(fd)
+
+    @staticmethod
+    def _listdir(path: str) -> List[str]:
+        try:
+            return os.listdir(path)
+        except FileNotFoundError:
+            return []
+
+    # Shared upstream documents
+
+    def load_recent(self, key: str, max_age: float) -> Optional[bytes]:
+        """
+        The body another worker published for a key within max_age seconds, and after the
+        latest invalidation; blocking, so call it off the event loop
+        """
+        try:
+            with open(self._result_path(key), "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("key") != key:
+                    return None
+                stored_at = header["stored_at"]
+                if time.time() - stored_at > max_age or stored_at <= self.invalidated_at:
+                    return None
+                return f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def publish(self, key: str, body: bytes):
+        """Make a freshly fetched body available to the other workers; blocking, so call it off the event loop"""
+        path = self._result_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            header = json.dumps({"key": key, "stored_at": time.time()}).encode()
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(header + b"\n" + body)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            print(f"Could not publish {key} to the other workers: {e}")
+
+    @asynccontextmanager
+    async def refresh_lock(self, key: str, wait: float):
+        """
+        Hold the key's refresh lock for the enclosed block, waiting while another worker holds
+        it (up to wait seconds, then proceeding without it). A no-op without flock.
+        """
+        if fcntl is None:
+            yield
+            return
+        lock_dir = os.path.join(self.directory, "locks")
+        os.makedirs(lock_dir, exist_ok=True)
+        path = os.path.join(lock_dir, f"{self._digest(key)}.lock")
+        fd = -1
+        try:
+            give_up_at = time.monotonic() + wait
+            while True:
+                fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    if time.monotonic() >= give_up_at:
+                        break
+                    await asyncio.sleep(0.05)
+                else:
+                    # cleanup() may have unlinked the file between our open and flock, in which
+                    # case another worker can lock a new file at the path: lock that one instead
+                    if self._is_linked(fd, path):
+                        break
+                os.close(fd)
+                fd = -1
+            yield
+        finally:
+            if fd >= 0:
+                os.close(fd)  # closing the descriptor releases the lock
+
+    @staticmethod
+    def _is_linked(fd: int, path: str) -> bool:
+        """Whether an open descriptor is still the file at path"""
+        try:
+            return os.fstat(fd).st_ino == os.stat(path).st_ino
+        except FileNotFoundError:
+            return False
+
+def matches(key: str, namespace: Optional[str], pattern: Optional[str]) -> bool:
+    """Whether a cache key belongs to a namespace (route function name) and matches a glob pattern"""
+    if namespace is not None and key.split(":", 1)[0] != namespace:
+        return False
+    return pattern is None or fnmatch.fnmatchcase(key, pattern)
+
+cluster = ClusterCoordinator(settings.CLUSTER_DIR)
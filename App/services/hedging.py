@@ -0,0 +1,53 @@
+from collections import deque
+from typing import Dict, Optional
+from App.core.config import settings
+
+class LatencyTracker:
+    """
+    Recent upstream latencies for one endpoint, used to decide when to hedge a slow request.
+    
+    A hedge is sent once the primary request has been outstanding longer than the configured
+    latency percentile. Hedges are paid for out of a budget that each request tops up by the
+    maximum hedge rate, which caps hedges at that fraction of traffic.
+    """
+
+    def __init__(self, percentile: float, min_samples: int, max_hedge_rate: float, window: int = 200):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_hedge_rate = max_hedge_rate
+        self.samples = deque(maxlen=window)
+        self.hedge_budget = 0.0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait on the primary before hedging, or None if hedging is off for now"""
+        # Every request earns a fraction of a hedge; the cap stops idle periods banking a burst
+        self.hedge_budget = min(self.hedge_budget + self.max_hedge_rate, 10.0)
+        if self.max_hedge_rate <= 0 or len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[index]
+
+    def can_hedge(self) -> bool:
+        """Whether the budget has a hedge to spend, without spending it"""
+        return self.hedge_budget >= 1.0
+
+    def take_hedge(self) -> bool:
+        """Spend one hedge from the budget if available"""
+        if self.hedge_budget < 1.0:
+            return False
+        self.hedge_budget -= 1.0
+        return True
+
+latency_trackers: Dict[str, LatencyTracker] = {}
+
+def get_latency_tracker(endpoint: str) -> LatencyTracker:
+    """Return the latency tracker for an upstream endpoint, creating it on first use"""
+    tracker = latency_trackers.get(endpoint)
+    if tracker is None:
+        tracker = LatencyTracker(settings.HEDGE_PERCENTILE, settings.HEDGE_MIN_SAMPLES, settings.HEDGE_MAX_RATE)
+        latency_trackers[endpoint] = tracker
+    return tracker
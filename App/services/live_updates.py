@@ -0,0 +1,150 @@
+import json
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from App.core.config import settings
+from App.services.change_feed import change_feeds
+from App.services.rate_limiter import upstream_priority, PRIORITY_BACKGROUND
+
+def _describe(key: str, item: Any) -> Dict[str, Set[str]]:
+    """Teams, player ids and positions a change entry is about, for matching subscriber filters"""
+    teams, players, positions = set(), set(), set()
+    if isinstance(item, dict):
+        if item.get("team"):
+            teams.add(str(item["team"]).upper())
+        teams.update(str(team).upper() for team in item.get("teams") or [])
+        if item.get("playerId") is not None:
+            players.add(str(item["playerId"]))
+        players.update(str(player) for player in item.get("playerIds") or [])
+        if item.get("position"):
+            positions.add(str(item["position"]).upper())
+    elif isinstance(item, list) and key.count(":") == 1:
+        # Depth chart slots are keyed by team and position
+        team, position = key.split(":")
+        teams.add(team.upper())
+        positions.add(position.upper())
+        players.update(str(row.get("playerId")) for row in item if isinstance(row, dict))
+    return {"team": teams, "player": players, "position": positions}
+
+class Subscriber:
+    """One client's queue of change events, filtered by team, player and position"""
+
+    def __init__(self, sources: List[str], filters: Dict[str, Set[str]], max_queue: int):
+        self.sources = sources
+        self.filters = {name: values for name, values in filters.items() if values}
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def matches(self, key: str, item: Any) -> bool:
+        if not self.filters:
+            return True
+        described = _describe(key, item)
+        return all(described[name] & values for name, values in self.filters.items())
+
+    def offer(self, source: str, entry: Dict[str, Any], removed_items: Dict[str, Any]):
+        """Queue the part of a change feed version this subscriber asked for, if any"""
+        event = {
+            "source": source,
+            "version": entry["version"],
+            "timestamp": entry["timestamp"],
+            "added": [change for change in entry["added"] if self.matches(change["key"], change["item"])],
+            "changed": [change for change in entry["changed"] if self.matches(change["key"], change["item"])],
+            "removed": [key for key in entry["removed"] if self.matches(key, removed_items.get(key))],
+        }
+        if not (event["added"] or event["changed"] or event["removed"]):
+            return
+        try:
+            self.queue.put_nowait(("change", event))
+        except asyncio.QueueFull:
+            # A client this far behind has to reload; replace its backlog with a reset
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(("reset", {"reason": "Subscriber fell too far behind; reload and resubscribe"}))
+
+class SourceBroadcaster:
+    """
+    Fans one source's changes out to every subscriber of that source.
+
+    While the source has subscribers, a single background task refreshes it from upstream at
+    background rate-limiter priority. Any refresh that changes the data (the background one, or
+    a client request that found the cache expired) produces a change feed version, which is
+    filtered and queued for each subscriber.
+    """
+
+    def __init__(self, source: str, refresh: Callable[[], Awaitable[Any]], interval: float):
+        self.source = source
+        self.refresh = refresh
+        self.interval = interval
+        self.subscribers: Set[Subscriber] = set()
+        self.task: Optional[asyncio.Task] = None
+        change_feeds[source].listeners.append(self._publish)
+
+    def subscribe(self, subscriber: Subscriber):
+        self.subscribers.add(subscriber)
+        if self.task is None or self.task.done():
+            # Start from an empty context so the task doesn't inherit the subscribing request's
+            # deadline and response headers
+            self.task = contextvars.Context().run(asyncio.ensure_future, self._run())
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self):
+        upstream_priority.set(PRIORITY_BACKGROUND)
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Background refresh of {self.source} failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _publish(self, entry: Dict[str, Any], removed_items: Dict[str, Any]):
+        for subscriber in list(self.subscribers):
+            subscriber.offer(self.source, entry, removed_items)
+
+class LiveUpdates:
+    """Subscriptions to change feed sources, served as server-sent events"""
+
+    def __init__(self):
+        self.broadcasters: Dict[str, SourceBroadcaster] = {}
+
+    def register_source(self, source: str, refresh: Callable[[], Awaitable[Any]]):
+        self.broadcasters[source] = SourceBroadcaster(source, refresh, settings.LIVE_UPDATE_REFRESH_INTERVAL)
+
+    def subscribe(self, sources: List[str], filters: Dict[str, Set[str]]) -> Subscriber:
+        subscriber = Subscriber(sources, filters, settings.LIVE_UPDATE_QUEUE_SIZE)
+        for source in sources:
+            self.broadcasters[source].subscribe(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        for source in subscriber.sources:
+            self.broadcasters[source].unsubscribe(subscriber)
+
+    async def stream(self, sources: List[str], filters: Dict[str, Set[str]]):
+        """
+        Subscribe and yield server-sent events: a ready event with each source's current version,
+        then change events, with a comment line as a heartbeat while nothing changes
+        """
+        subscriber = self.subscribe(sources, filters)
+        try:
+            versions = {source: change_feeds[source].version for source in subscriber.sources}
+            yield _sse("ready", {"sources": versions})
+            while True:
+                try:
+                    kind, event = await asyncio.wait_for(subscriber.queue.get(), settings.LIVE_UPDATE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(kind, event)
+                if kind == "reset":
+                    return
+        finally:
+            self.unsubscribe(subscriber)
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+live_updates = LiveUpdates()
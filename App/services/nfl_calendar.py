@@ -0,0 +1,277 @@
+import time
+import asyncio
+import datetime
+import functools
+import contextvars
+from zoneinfo import ZoneInfo
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from App.core.config import settings
+from App.services.nfl_service import add_refresh_listener
+from App.services.rate_limiter import upstream_priority, PRIORITY_BACKGROUND
+
+SCHEDULE_TIMEZONE = ZoneInfo(settings.NFL_SCHEDULE_TIMEZONE)
+POSTSEASON_WEEKS = 5  # Wild card, divisional, conference, the week off and the Super Bowl
+PRESEASON_WEEKS = 5  # Training camp and preseason games before week 1
+RETRY_INTERVAL = 60  # Seconds between attempts to load the schedule while it is missing or outdated
+PHASE_SEASON_TYPES = {"offseason": "PRE", "preseason": "PRE", "regular": "REG", "postseason": "PST"}
+
+def _approximate_week(timestamp: float) -> Tuple[int, int]:
+    """
+    NFL season and week for a point in time, without a schedule.
+
+    The regular season opens the Thursday after Labor Day (first Monday of September) and weeks
+    run Tuesday to Monday. Anything before week 1 is week 0, and postseason weeks continue the
+    count past 18. Seasons are named by the year they start in.
+    """
+    moment = datetime.datetime.fromtimestamp(timestamp, SCHEDULE_TIMEZONE).replace(tzinfo=None)
+    season = moment.year if moment.month >= 3 else moment.year - 1
+    september_first = datetime.datetime(season, 9, 1)
+    labor_day = september_first + datetime.timedelta(days=(7 - september_first.weekday()) % 7)
+    week_one = labor_day + datetime.timedelta(days=1)  # Tuesday
+    if moment < week_one:
+        return season, 0
+    return season, (moment - week_one).days // 7 + 1
+
+def _parse_kickoff(value: Any) -> Optional[float]:
+    """Kickoff timestamp from a schedule date; dates without an offset are in the schedule's timezone"""
+    if not value:
+        return None
+    try:
+        moment = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=SCHEDULE_TIMEZONE)
+    return moment.timestamp()
+
+def _week_start(kickoff: float) -> float:
+    """Midnight on the Tuesday starting the NFL week a kickoff falls in"""
+    moment = datetime.datetime.fromtimestamp(kickoff, SCHEDULE_TIMEZONE)
+    tuesday = moment.date() - datetime.timedelta(days=(moment.weekday() - 1) % 7)
+    return datetime.datetime.combine(tuesday, datetime.time(), SCHEDULE_TIMEZONE).timestamp()
+
+def _schedule_games(data: Any) -> List[Dict[str, Any]]:
+    if isinstance(data, dict):
+        data = data.get("schedule") or data.get("games") or []
+    return [game for game in data if isinstance(game, dict)] if isinstance(data, list) else []
+
+class NFLCalendar:
+    """
+    Season, week, phase and game windows, derived from the cached schedule and bye weeks.
+
+    Week boundaries come from each week's first kickoff (weeks run Tuesday to Monday), so the
+    current week is exact once the schedule has loaded. Timestamps outside the loaded season,
+    or any timestamp before the schedule has loaded, fall back to a Labor Day approximation.
+    The schedule is reloaded in the background when it is older than the refresh interval.
+    """
+
+    def __init__(self):
+        self.season: Optional[int] = None
+        self.week_starts: Dict[int, float] = {}  # regular season week -> when it starts
+        self.kickoffs: List[Tuple[float, int, str]] = []  # (kickoff, week, season type), in order
+        self.postseason_end: Optional[float] = None
+        self.byes: Dict[int, List[str]] = {}  # week -> teams on bye
+        self.byes_season: Optional[int] = None  # season the bye weeks are for, if the data says
+        self.loaded_at = 0.0
+        self.attempted_at = 0.0
+        self.loader: Optional[Callable[[], Awaitable[Tuple[Any, Any]]]] = None
+        self.refreshing: Optional[asyncio.Task] = None
+
+    def load_schedule(self, data: Any):
+        kickoffs, week_starts, seasons = [], {}, set()
+        schedule_type = data.get("type") if isinstance(data, dict) else None
+        for game in _schedule_games(data):
+            kickoff = _parse_kickoff(game.get("game_date") or game.get("scheduled") or game.get("date"))
+            try:
+                week = int(game.get("week"))
+            except (TypeError, ValueError):
+                continue
+            if kickoff is None:
+                continue
+            season_type = str(game.get("season_type") or schedule_type or "Regular").upper()[:3]  # PRE, REG, PST or POS(t)
+            kickoffs.append((kickoff, week, season_type))
+            if season_type == "REG":
+                week_starts[week] = min(week_starts.get(week, kickoff), kickoff)
+            if str(game.get("season", "")).isdigit():
+                seasons.add(int(game["season"]))
+        if not week_starts:
+            return
+        kickoffs.sort()
+        self.kickoffs = kickoffs
+        self.week_starts = {week: _week_start(kickoff) for week, kickoff in week_starts.items()}
+        first_week = min(self.week_starts)
+        declared = data.get("season", data.get("year", "")) if isinstance(data, dict) else ""
+        if str(declared).isdigit():
+            self.season = int(declared)
+        elif seasons:
+            self.season = max(seasons)
+        else:
+            self.season = _approximate_week(self.week_starts[first_week])[0]
+        postseason = [kickoff for kickoff, _, season_type in kickoffs if season_type in ("PST", "POS")]
+        self.postseason_end = max(postseason) + settings.NFL_GAME_WINDOW_MINUTES * 60 if postseason else None
+        self.loaded_at = time.time()
+
+    def load_byes(self, data: Any):
+        byes: Dict[int, List[str]] = {}
+        if isinstance(data, dict) and isinstance(data.get("teams"), dict):
+            for week, teams in data["teams"].items():
+                byes[int(week)] = [str(team).upper() for team in teams or []]
+        elif isinstance(data, list):
+            for row in data:
+                if isinstance(row, dict) and row.get("team") and row.get("bye_week"):
+                    byes.setdefault(int(row["bye_week"]), []).append(str(row["team"]).upper())
+        self.byes = byes
+        declared = data.get("season") if isinstance(data, dict) else None
+        self.byes_season = int(declared) if str(declared).isdigit() else None
+
+    def _scheduled(self, timestamp: float) -> bool:
+        """Whether the loaded schedule covers the season a timestamp falls in"""
+        return bool(self.week_starts) and _approximate_week(timestamp)[0] == self.season
+
+    def week(self, timestamp: Optional[float] = None) -> Tuple[int, int]:
+        """NFL season and week at a point in time (default now); 0 before week 1, past the last regular week in the postseason"""
+        timestamp = time.time() if timestamp is None else timestamp
+        if not self._scheduled(timestamp):
+            return _approximate_week(timestamp)
+        started = [week for week, start in self.week_starts.items() if start <= timestamp]
+        if not started:
+            return self.season, 0
+        current = max(started)
+        return self.season, current + int((timestamp - self.week_starts[current]) // (7 * 86400))
+
+    def phase(self, timestamp: Optional[float] = None) -> str:
+        """offseason, preseason, regular or postseason"""
+        timestamp = time.time() if timestamp is None else timestamp
+        season, week = self.week(timestamp)
+        last_week = max(self.week_starts) if self._scheduled(timestamp) else 18
+        if week == 0:
+            season_start = self.week_starts[min(self.week_starts)] if self._scheduled(timestamp) else None
+            if season_start is not None and season_start - timestamp <= PRESEASON_WEEKS * 7 * 86400:
+                return "preseason"
+            moment = datetime.datetime.fromtimestamp(timestamp, SCHEDULE_TIMEZONE)
+            return "preseason" if season_start is None and moment.month == 8 else "offseason"
+        if week <= last_week:
+            return "regular"
+        if self.postseason_end is not None and self._scheduled(timestamp):
+            return "postseason" if timestamp <= self.postseason_end else "offseason"
+        return "postseason" if week <= last_week + POSTSEASON_WEEKS else "offseason"
+
+    def season_type(self, timestamp: Optional[float] = None) -> str:
+        """Season type code (PRE, REG or PST); the offseason counts toward the coming preseason"""
+        return PHASE_SEASON_TYPES[self.phase(timestamp)]
+
+    def kickoff_windows(self, week: Optional[int] = None, timestamp: Optional[float] = None) -> List[Tuple[float, float]]:
+        """
+        (start, end) of each stretch with games in progress in a week (default the current one)
+        of the season a timestamp (default now) falls in, overlaps merged; none when the loaded
+        schedule is for another season
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        if not self._scheduled(timestamp):
+            return []
+        week = self.week(timestamp)[1] if week is None else week
+        duration = settings.NFL_GAME_WINDOW_MINUTES * 60
+        windows: List[List[float]] = []
+        for kickoff, game_week, season_type in self.kickoffs:
+            if game_week != week or season_type != "REG":
+                continue
+            if windows and kickoff <= windows[-1][1]:
+                windows[-1][1] = max(windows[-1][1], kickoff + duration)
+            else:
+                windows.append([kickoff, kickoff + duration])
+        return [(start, end) for start, end in windows]
+
+    def in_game_window(self, timestamp: Optional[float] = None) -> bool:
+        """Whether any game is in progress"""
+        timestamp = time.time() if timestamp is None else timestamp
+        if not self._scheduled(timestamp):
+            return False
+        duration = settings.NFL_GAME_WINDOW_MINUTES * 60
+        return any(kickoff <= timestamp < kickoff + duration for kickoff, _, _ in self.kickoffs)
+
+    def game_window(self, timestamp: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        """The kickoff window in progress, if any"""
+        timestamp = time.time() if timestamp is None else timestamp
+        windows = self.kickoff_windows(timestamp=timestamp)
+        return next(((start, end) for start, end in windows if start <= timestamp < end), None)
+
+    def next_lock(self, timestamp: Optional[float] = None) -> Optional[float]:
+        """The next kickoff, when lineups for that game lock"""
+        timestamp = time.time() if timestamp is None else timestamp
+        return next((kickoff for kickoff, _, _ in self.kickoffs if kickoff > timestamp), None)
+
+    def teams_on_bye(self, week: Optional[int] = None, timestamp: Optional[float] = None) -> List[str]:
+        """
+        Teams on bye in a week (default the current one) of the season a timestamp (default
+        now) falls in; none when the bye weeks (or, if they don't say, the schedule) are for
+        another season
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        season = _approximate_week(timestamp)[0]
+        if (self.byes_season != season) if self.byes_season is not None else not self._scheduled(timestamp):
+            return []
+        return self.byes.get(self.week(timestamp)[1] if week is None else week, [])
+
+    def status(self) -> Dict[str, Any]:
+        now = time.time()
+        season, week = self.week(now)
+        next_lock = self.next_lock(now)
+        return {
+            "season": season,
+            "week": week,
+            "phase": self.phase(now),
+            "season_type": self.season_type(now),
+            "in_game_window": self.in_game_window(now),
+            "next_lock": _isoformat(next_lock) if next_lock else None,
+            "kickoff_windows": [
+                {"start": _isoformat(start), "end": _isoformat(end)} for start, end in self.kickoff_windows(week, now)
+            ],
+            "teams_on_bye": self.teams_on_bye(week, now),
+            "from_schedule": self._scheduled(now),
+        }
+
+    def register_loader(self, loader: Callable[[], Awaitable[Tuple[Any, Any]]]):
+        """Set the coroutine function returning (schedule, bye weeks) data, e.g. through the cached routes"""
+        self.loader = loader
+
+    async def refresh(self):
+        if self.loader is None:
+            return
+        self.attempted_at = time.time()
+        schedule, byes = await self.loader()
+        self.load_schedule(schedule)
+        self.load_byes(byes)
+
+    def ensure_fresh(self) -> Optional[asyncio.Task]:
+        """Reload the schedule in the background if it is older than the refresh interval, without waiting"""
+        now = time.time()
+        if now - self.loaded_at < settings.NFL_CALENDAR_REFRESH_INTERVAL or now - self.attempted_at < RETRY_INTERVAL:
+            return None
+        if self.refreshing is None or self.refreshing.done():
+            # Start from an empty context so the task doesn't inherit the calling request's deadline
+            self.refreshing = contextvars.Context().run(asyncio.ensure_future, self._background_refresh())
+        return self.refreshing
+
+    async def _background_refresh(self):
+        upstream_priority.set(PRIORITY_BACKGROUND)
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"Could not load the NFL calendar: {e}")
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat()
+
+nfl_calendar = NFLCalendar()
+
+def _on_refresh(endpoint: str, params: Dict[str, Any], payload) -> Optional[Callable[[], None]]:
+    # Parsed here, off the event loop; the calendar itself is only changed on the loop
+    if params:
+        return None
+    if endpoint == "schedule":
+        return functools.partial(nfl_calendar.load_schedule, payload.data)
+    if endpoint == "byes":
+        return functools.partial(nfl_calendar.load_byes, payload.data)
+    return None
+
+add_refresh_listener(_on_refresh)
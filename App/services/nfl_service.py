@@ -1,22 +1,116 @@
+import time
+import asyncio
+import contextvars
+import hashlib
 import httpx
+import orjson
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Set
 from fastapi import HTTPException
 from App.core.config import settings
+from App.core.request_context import mark_stale, remaining_time
+from App.services.rate_limiter import fantasy_nerds_limiter, upstream_priority
+from App.services.circuit_breaker import get_breaker
+from App.services.hedging import get_latency_tracker
+from App.services.cassette import cassette_store
+from App.services.variants import superset_for
+from App.services.cluster import cluster
+from App.core.metrics import UPSTREAM_LATENCY, UPSTREAM_RESPONSES, UPSTREAM_IN_FLIGHT
+
+# Last successful payload per endpoint and params, served while an endpoint's circuit is open
+last_good = OrderedDict()
+
+# Superset fetches in progress, shared by every variant request waiting on the same document
+superset_inflight: Dict[str, asyncio.Task] = {}
+
+def forget_supersets():
+    """After a cache clear, derive variants only from supersets fetched from now on"""
+    cluster.invalidated_at = max(cluster.invalidated_at, time.time())
+    superset_inflight.clear()
+
+# Called as listener(endpoint, params, payload) after every fresh fetch from upstream. Listeners
+# run one refresh at a time on the refresh thread, where parsing and indexing multi-MB payloads
+# can't block the event loop, and return None or a function that applies the result on the loop
+refresh_listeners: List[Callable] = []
+refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="refresh-listeners")
+refresh_tasks: Set[asyncio.Task] = set()  # refreshes not yet handled by every listener
+
+def add_refresh_listener(listener: Callable):
+    """Register a function to be told about each fresh upstream payload"""
+    refresh_listeners.append(listener)
+
+def _prepare_refresh(endpoint: str, params: dict, payload) -> List[tuple]:
+    """Run the listeners for one refresh on the refresh thread; returns (listener, apply) pairs"""
+    applies = []
+    for listener in refresh_listeners:
+        try:
+            apply = listener(endpoint, params, payload)
+        except Exception as e:
+            print(f"Refresh listener {getattr(listener, '__name__', listener)} failed for {endpoint}: {e}")
+            continue
+        if apply is not None:
+            applies.append((listener, apply))
+    return applies
+
+async def _run_refresh_listeners(endpoint: str, params: dict, payload):
+    """Hand one refresh to the listeners; a failing listener never affects the others or the request"""
+    applies = await asyncio.get_running_loop().run_in_executor(refresh_executor, _prepare_refresh, endpoint, params, payload)
+    # Refreshes are prepared in order on the single refresh thread and applied in the same order
+    for listener, apply in applies:
+        try:
+            apply()
+        except Exception as e:
+            print(f"Refresh listener {getattr(listener, '__name__', listener)} failed for {endpoint}: {e}")
+
+async def refresh_listeners_idle():
+    """Wait until every refresh so far has been applied by the listeners"""
+    while refresh_tasks:
+        await asyncio.gather(*refresh_tasks, return_exceptions=True)
+
+class UpstreamPayload:
+    """
+    An upstream response body kept as the bytes Fantasy Nerds sent, parsed only on first use.
+    
+    Routes that return upstream data unmodified serve the bytes directly; consumers that need
+    the object read .data, which is decoded with orjson once and then reused.
+    """
+    __slots__ = ("raw", "_data", "_parsed")
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self._data = None
+        self._parsed = False
+
+    @property
+    def data(self):
+        if not self._parsed:
+            self._data = orjson.loads(self.raw)
+            self._parsed = True
+        return self._data
 
 class NFLService:
-    def __init__(self):
+    def __init__(self, passthrough: bool = False):
+        """
+        Args:
+            passthrough (bool): Return UpstreamPayload objects instead of parsed data
+        """
         self.base_url = settings.BASE_URL
         self.api_key = settings.API_KEY
+        self.passthrough = passthrough
         
-    async def get_data(self, endpoint: str, params: dict = None):
+    async def get_data(self, endpoint: str, params: dict = None, priority: str = None, deadline: float = None):
         """
         Generic method to fetch data from the Fantasy Nerds NFL API
         
         Args:
             endpoint (str): The API endpoint to call
             params (dict, optional): Additional query parameters
+            priority (str, optional): Rate limiter priority class (defaults to the context priority)
+            deadline (float, optional): time.monotonic() by which to give up (defaults to the request deadline)
             
         Returns:
-            dict: The JSON response from the API
+            dict: The JSON response from the API (an UpstreamPayload in passthrough mode)
         """
         # Make sure endpoint doesn't start with a slash
         if endpoint.startswith('/'):
@@ -29,19 +123,104 @@ class NFLService:
         query_params = {"apikey": self.api_key}
         if params:
             query_params.update(params)
+        
+        # Replay mode serves recorded responses only and never reaches the network
+        if settings.UPSTREAM_MODE == "replay":
+            return await self._replay(endpoint, params, deadline)
+        
+        stale_key = f"{endpoint}:{sorted((params or {}).items())}"
+        
+        # Requests that are a subset of another document are cut from that document instead
+        variant = superset_for(endpoint, params) if settings.VARIANT_DERIVATION_ENABLED else None
+        if variant is not None:
+            superset_params, derive = variant
+            derived = derive((await self._superset(endpoint, superset_params, priority, deadline)).data)
+            if derived is not None:
+                payload = UpstreamPayload(orjson.dumps(derived))
+                self._remember(endpoint, params, stale_key, payload)
+                return self._result(payload)
+            print(f"Cannot derive {endpoint} {params} from its superset, fetching it directly")
+        
+        # While the endpoint's circuit is open, serve the last good payload instead of waiting on upstream
+        breaker = get_breaker(endpoint)
+        if not breaker.allow_request():
+            return self._serve_stale(endpoint, stale_key, breaker.retry_after())
+            
+        if not cluster.enabled:
+            return self._result(await self._fetch(endpoint, params, url, query_params, breaker, stale_key, priority, deadline))
+        
+        # One worker on the host fetches a document at a time; the others wait for it and take
+        # the copy it published instead of calling upstream again
+        wait = settings.CLUSTER_FOLLOWER_WAIT
+        remaining = remaining_time(deadline)
+        if remaining is not None:
+            wait = max(0.0, min(wait, remaining))
+        shared_key = self._shared_key(stale_key)
+        async with cluster.refresh_lock(shared_key, wait):
+            loop = asyncio.get_running_loop()
+            shared = await loop.run_in_executor(None, cluster.load_recent, shared_key, settings.CLUSTER_SHARE_MAX_AGE)
+            if shared is not None:
+                breaker.release_probe()
+                payload = UpstreamPayload(shared)
+                self._remember(endpoint, params, stale_key, payload)
+                return self._result(payload)
+            payload = await self._fetch(endpoint, params, url, query_params, breaker, stale_key, priority, deadline)
+            await loop.run_in_executor(None, cluster.publish, shared_key, payload.raw)
+        return self._result(payload)
+
+    def _shared_key(self, stale_key: str) -> str:
+        """
+        The key a document is shared between workers under, qualified by the upstream it comes
+        from: other instances on the host using the same CLUSTER_DIR (a load test against a
+        mock, staging, a recording instance) must not take each other's documents. The API key
+        only goes in hashed, as the key is written to the shared directory.
+        """
+        upstream = hashlib.sha256(f"{settings.UPSTREAM_MODE}|{self.base_url}|{self.api_key}".encode()).hexdigest()
+        return f"{upstream[:16]}:{stale_key}"
+
+    async def _fetch(self, endpoint: str, params: dict, url: str, query_params: dict, breaker,
+                     stale_key: str, priority: str = None, deadline: float = None) -> UpstreamPayload:
+        """
+        Call upstream for a document within the caller's deadline, through the rate limiter,
+        hedging and the endpoint's circuit breaker, and keep it as the last good copy
+        """
+        # Bound the call by whatever time the caller has left
+        timeout = settings.UPSTREAM_TIMEOUT
+        remaining = remaining_time(deadline)
+        if remaining is not None:
+            if remaining <= 0:
+                breaker.release_probe()
+                raise HTTPException(status_code=408, detail=f"Deadline exceeded before calling {endpoint}")
+            timeout = min(timeout, remaining)
             
         # Debug log
         print(f"Calling Fantasy Nerds API: {url}")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=query_params)
-                response.raise_for_status()  # Raise an exception for HTTP errors
-                return response.json()
-        except httpx.TimeoutException:
+            # Wait for a token from the rate limiter shared by all workers
+            await fantasy_nerds_limiter.acquire(priority)
+            
+            started = time.perf_counter()
+            response = await self._hedged_get(endpoint, url, query_params, timeout, priority)
+            await self._record(endpoint, params, response, time.perf_counter() - started)
+            payload = UpstreamPayload(response.content)
+            # Parsed callers decode here; passthrough only checks the body looks like JSON so a
+            # malformed response still fails the call instead of being cached and served
+            if self.passthrough and response.content.lstrip()[:1] not in (b"{", b"["):
+                raise ValueError("Upstream response is not JSON")
+            self._result(payload)
+        except (httpx.TimeoutException, asyncio.TimeoutError):
+            breaker.record_failure()
             raise HTTPException(status_code=408, detail=f"Request to {url} timed out")
         except httpx.HTTPStatusError as e:
+            await self._record(endpoint, params, e.response, time.perf_counter() - started)
             status_code = e.response.status_code
+            # Client errors mean upstream is up and answering; only server errors count against it.
+            # A 429 is neither: upstream is throttling us, so a half-open circuit stays half-open
+            if status_code >= 500:
+                breaker.record_failure()
+            elif status_code != 429:
+                breaker.record_success()
             if status_code == 401:
                 detail = "API key invalid or expired"
             elif status_code == 403:
@@ -50,11 +229,197 @@ class NFLService:
                 detail = f"Resource not found: {endpoint}"
             elif status_code == 429:
                 detail = "Rate limit exceeded"
+                # Back off every worker, honouring Retry-After when upstream sends one
+                retry_after = e.response.headers.get("Retry-After", "")
+                await fantasy_nerds_limiter.penalize(float(retry_after) if retry_after.isdigit() else 60.0)
             else:
                 detail = f"HTTP error {status_code}: {str(e)}"
             raise HTTPException(status_code=status_code, detail=detail)
+        except HTTPException:
+            raise
         except Exception as e:
+            breaker.record_failure()
             raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+        finally:
+            # Covers calls that ended without an outcome, e.g. cancelled or rate limited
+            breaker.release_probe()
+        
+        breaker.record_success()
+        self._remember(endpoint, params, stale_key, payload)
+        return payload
+
+    def _remember(self, endpoint: str, params: dict, stale_key: str, payload: UpstreamPayload):
+        """Keep a fresh payload as the last good copy and hand it to the refresh listeners"""
+        last_good[stale_key] = (time.time(), payload)
+        last_good.move_to_end(stale_key)
+        while len(last_good) > settings.STALE_CACHE_MAX_ENTRIES:
+            last_good.popitem(last=False)
+        self._notify_refresh(endpoint, params, payload)
+
+    async def _superset(self, endpoint: str, params: dict, priority: str = None, deadline: float = None) -> UpstreamPayload:
+        """
+        The superset document a variant is derived from: the last good copy if it is recent
+        enough, otherwise one fetch shared by all variant requests waiting on it
+        """
+        key = f"{endpoint}:{sorted(params.items())}"
+        entry = last_good.get(key)
+        # A copy from before the latest cache clear isn't reused: the clear asked for fresh data
+        if (entry is not None and entry[0] > cluster.invalidated_at
+                and time.time() - entry[0] <= settings.VARIANT_SUPERSET_MAX_AGE):
+            return entry[1]
+        
+        task = superset_inflight.get(key)
+        if task is None:
+            # The shared fetch runs outside any one request's deadline; each waiter bounds its own wait
+            task = contextvars.Context().run(asyncio.ensure_future, nfl_passthrough_service.get_data(
+                endpoint, params, priority or upstream_priority.get()))
+            superset_inflight[key] = task
+            task.add_done_callback(lambda _: superset_inflight.pop(key) if superset_inflight.get(key) is task else None)
+        remaining = remaining_time(deadline)
+        if remaining is not None and remaining <= 0:
+            raise HTTPException(status_code=408, detail=f"Deadline exceeded before calling {endpoint}")
+        try:
+            # Shield the shared fetch so one waiter giving up doesn't cancel it for the others
+            return await asyncio.wait_for(asyncio.shield(task), remaining)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=408, detail=f"Request to {endpoint} timed out")
+
+    async def _hedged_get(self, endpoint: str, url: str, query_params: dict, timeout: float, priority: str = None):
+        """
+        GET from upstream, sending one duplicate request if the first is slower than usual
+        
+        The hedge is issued once the primary has been outstanding longer than the endpoint's
+        latency percentile, subject to the hedge budget and an immediately available rate
+        limiter token. Whichever response arrives first is used and the other is cancelled.
+        
+        Returns:
+            httpx.Response: The winning response
+        """
+        tracker = get_latency_tracker(endpoint)
+        started = time.monotonic()
+        give_up_at = started + timeout
+        pending = {asyncio.ensure_future(self._send(endpoint, url, query_params, timeout))}
+        try:
+            delay = tracker.hedge_delay()
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                # Only spend the budget once a token is in hand and the hedge is actually sent
+                if (not done and tracker.can_hedge() and await fantasy_nerds_limiter.try_acquire(priority)
+                        and tracker.take_hedge()):
+                    print(f"Hedging slow request to {url}")
+                    pending.add(asyncio.ensure_future(
+                        self._send(endpoint, url, query_params, give_up_at - time.monotonic())
+                    ))
+            
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=give_up_at - time.monotonic(), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+                # An HTTP error status is a real answer; only transport failures wait on the other request
+                answered = [task for task in done
+                            if task.exception() is None or isinstance(task.exception(), httpx.HTTPStatusError)]
+                if answered:
+                    winner = min(answered, key=lambda task: task.exception() is not None)
+                    if winner.exception() is not None:
+                        raise winner.exception()
+                    tracker.record(time.monotonic() - started)
+                    return winner.result()
+                if not pending:
+                    raise done.pop().exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _send(self, endpoint: str, url: str, query_params: dict, timeout: float):
+        """Send a single GET request and raise for HTTP error statuses"""
+        started = time.perf_counter()
+        status = "error"
+        UPSTREAM_IN_FLIGHT.labels(endpoint).inc()
+        try:
+            async with httpx.AsyncClient(timeout=max(timeout, 0.001)) as client:
+                response = await client.get(url, params=query_params)
+                status = str(response.status_code)
+                response.raise_for_status()  # Raise an exception for HTTP errors
+                return response
+        except httpx.TimeoutException:
+            status = "timeout"
+            raise
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            UPSTREAM_IN_FLIGHT.labels(endpoint).dec()
+            UPSTREAM_LATENCY.labels(endpoint).observe(time.perf_counter() - started)
+            UPSTREAM_RESPONSES.labels(endpoint, status).inc()
+
+    def _notify_refresh(self, endpoint: str, params: dict, payload: UpstreamPayload):
+        """Hand a fresh payload to the refresh listeners in the background, without waiting for them"""
+        if refresh_listeners:
+            task = asyncio.ensure_future(_run_refresh_listeners(endpoint, dict(params or {}), payload))
+            refresh_tasks.add(task)
+            task.add_done_callback(refresh_tasks.discard)
+
+    async def _record(self, endpoint: str, params: dict, response: httpx.Response, elapsed: float):
+        """Save an upstream response to the cassette store, off the event loop, when running in record mode"""
+        if settings.UPSTREAM_MODE != "record":
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, cassette_store.save, endpoint, dict(params or {}), response.status_code, response.content, elapsed
+            )
+        except OSError as e:
+            print(f"Could not record response for {endpoint}: {e}")
+
+    async def _replay(self, endpoint: str, params: dict, deadline: float = None):
+        """
+        Serve a recorded response, optionally taking as long as upstream originally did
+        
+        Raises:
+            HTTPException: 503 if the request was never recorded, or the recorded error status
+        """
+        recording = await asyncio.get_running_loop().run_in_executor(None, cassette_store.load, endpoint, params)
+        if recording is None:
+            raise HTTPException(
+                status_code=503,
+                detail=f"No recorded response for {endpoint} with params {params or {}}",
+            )
+        if settings.REPLAY_SIMULATE_LATENCY:
+            delay = recording["elapsed"]
+            remaining = remaining_time(deadline)
+            if remaining is not None and remaining < delay:
+                await asyncio.sleep(max(remaining, 0))
+                raise HTTPException(status_code=408, detail=f"Request to {endpoint} timed out")
+            await asyncio.sleep(delay)
+        status_code = recording["status"]
+        if status_code >= 400:
+            raise HTTPException(status_code=status_code, detail=f"HTTP error {status_code} (recorded) for {endpoint}")
+        payload = UpstreamPayload(recording["body"].encode())
+        self._notify_refresh(endpoint, params, payload)
+        return self._result(payload)
+
+    def _serve_stale(self, endpoint: str, stale_key: str, retry_after: float):
+        """
+        Return the last good payload for a request while its endpoint's circuit is open
+        
+        Raises:
+            HTTPException: 503 if nothing has been fetched for these params yet
+        """
+        entry = last_good.get(stale_key)
+        if entry is None:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Upstream unavailable for {endpoint} and no cached data to serve",
+                headers={"Retry-After": str(max(1, int(retry_after)))},
+            )
+        fetched_at, payload = entry
+        mark_stale(time.time() - fetched_at)
+        return self._result(payload)
+
+    def _result(self, payload: UpstreamPayload):
+        """What get_data hands back for a payload: the payload itself in passthrough mode, else the data"""
+        return payload if self.passthrough else payload.data
             
     async def get_teams(self):
         """
@@ -381,3 +746,5 @@ class NFLService:
         return await self.get_data("ros")
 
 nfl_service = NFLService()
+# For routes that serve upstream payloads unmodified
+nfl_passthrough_service = NFLService(passthrough=True)
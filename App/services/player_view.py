@@ -0,0 +1,159 @@
+import time
+import functools
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from App.services.nfl_service import add_refresh_listener
+from App.services.variants import superset_for
+
+NEWS_PER_PLAYER = 5  # Most recent articles kept on each profile
+RETRY_INTERVAL = 300  # Seconds before loading a section that is still missing is tried again
+
+def _player_rows(data: Any) -> Iterable[Dict[str, Any]]:
+    """Player records in a payload, whether it is a list, has a players list or groups players by team"""
+    if isinstance(data, dict):
+        if isinstance(data.get("players"), list):
+            data = data["players"]
+        elif isinstance(data.get("teams"), dict):
+            data = [row for rows in data["teams"].values() if isinstance(rows, list) for row in rows]
+        elif isinstance(data.get("teams"), list):
+            data = [row for team in data["teams"] if isinstance(team, dict) for row in team.get("players") or []]
+        else:
+            data = []
+    return (row for row in data if isinstance(row, dict) and row.get("playerId") is not None)
+
+def _index_players(data: Any) -> Dict[str, Dict[str, Any]]:
+    return {str(row["playerId"]): row for row in _player_rows(data)}
+
+def _index_depth(data: Any) -> Dict[str, Dict[str, Any]]:
+    """Each player's depth chart slot: team, position and depth"""
+    index = {}
+    charts = data.get("charts", {}) if isinstance(data, dict) else {}
+    for team, positions in charts.items():
+        for position, players in (positions or {}).items():
+            for order, row in enumerate(players or [], 1):
+                if isinstance(row, dict) and row.get("playerId") is not None:
+                    index[str(row["playerId"])] = {"team": team, "position": position, "depth": row.get("depth", order)}
+    return index
+
+def _index_news(data: Any) -> Dict[str, List[Dict[str, Any]]]:
+    """The most recent articles mentioning each player, newest first"""
+    articles = data.get("news", []) if isinstance(data, dict) else data
+    index: Dict[str, List[Dict[str, Any]]] = {}
+    ordered = sorted((a for a in articles if isinstance(a, dict)), key=lambda a: a.get("article_date", ""), reverse=True)
+    for article in ordered:
+        for player_id in article.get("playerIds") or []:
+            entries = index.setdefault(str(player_id), [])
+            if len(entries) < NEWS_PER_PLAYER:
+                entries.append(article)
+    return index
+
+# Upstream endpoint -> (profile section, indexer). Only the default view of each endpoint
+# (standard scoring, 12 teams, ...) contributes, so a profile never mixes formats.
+PROFILE_SOURCES = {
+    "players": ("bio", _index_players),
+    "draft-rankings": ("draft_rankings", _index_players),
+    "weekly-rankings": ("weekly_rankings", _index_players),
+    "adp": ("adp", _index_players),
+    "auction": ("auction_values", _index_players),
+    "ros": ("ros_projections", _index_players),
+    "weekly-projections": ("weekly_projections", _index_players),
+    "injuries": ("injury", _index_players),
+    "depth": ("depth_chart", _index_depth),
+    "news": ("news", _index_news),
+}
+
+class PlayerView:
+    """
+    One joined profile per player across every fantasy source, kept in memory.
+
+    Each contributing payload is indexed by player id when it refreshes. Only players whose
+    record in that source was added, changed or removed have their profile rebuilt, so a
+    refresh costs the size of the payload plus the players it touched, and a lookup is a
+    dictionary access.
+
+    Sections that never arrived are loaded on demand, at most once per retry interval, so a
+    source that is down or has no data isn't fetched again on every lookup.
+
+    Indexing and rebuilding happen off the event loop (prepare); only the rebuilt profiles are
+    swapped in on the loop, so lookups never see a half-updated view.
+    """
+
+    def __init__(self):
+        self.sections: Dict[str, Dict[str, Any]] = {}  # section -> player id -> record; written only by prepare
+        self.loaded_at: Dict[str, float] = {}  # section -> when it last refreshed
+        self.attempted_at: Dict[str, float] = {}  # upstream endpoint -> last on-demand load
+        self.profiles: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, section: str, index: Dict[str, Any]):
+        self.prepare(section, index)()
+
+    def prepare(self, section: str, index: Dict[str, Any]) -> Callable[[], None]:
+        """Take in a section's new index and rebuild the profiles it touched; returns a function that publishes them"""
+        previous = self.sections.get(section, {})
+        touched = {pid for pid, record in index.items() if previous.get(pid) != record}
+        touched.update(pid for pid in previous if pid not in index)
+        self.sections[section] = index
+        return functools.partial(self._publish, section, self._rebuild(touched))
+
+    def _publish(self, section: str, rebuilt: Dict[str, Optional[Dict[str, Any]]]):
+        for player_id, profile in rebuilt.items():
+            if profile is None:
+                self.profiles.pop(player_id, None)
+            else:
+                self.profiles[player_id] = profile
+        self.loaded_at[section] = time.time()
+
+    def _rebuild(self, player_ids: Set[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fresh profiles of the given players, None for those no section has any more"""
+        rebuilt = {}
+        for player_id in player_ids:
+            profile = {"playerId": player_id, "name": None, "team": None, "position": None}
+            found = False
+            # In PROFILE_SOURCES order, so identity comes from the roster (bio) when it has the player
+            for section, _ in PROFILE_SOURCES.values():
+                record = self.sections.get(section, {}).get(player_id)
+                if record is None:
+                    continue
+                found = True
+                profile[section] = record
+                if isinstance(record, dict):
+                    for field in ("name", "team", "position"):
+                        if profile[field] is None and record.get(field):
+                            profile[field] = record[field]
+            rebuilt[player_id] = profile if found else None
+        return rebuilt
+
+    def get(self, player_id: str) -> Optional[Dict[str, Any]]:
+        return self.profiles.get(str(player_id))
+
+    def sections_to_load(self) -> List[str]:
+        """
+        Upstream endpoints whose section has never been loaded and wasn't tried within the
+        retry interval; the caller is expected to load them now
+        """
+        now = time.time()
+        due = [endpoint for endpoint, (section, _) in PROFILE_SOURCES.items()
+               if section not in self.sections and now - self.attempted_at.get(endpoint, 0.0) >= RETRY_INTERVAL]
+        for endpoint in due:
+            self.attempted_at[endpoint] = now
+        return due
+
+player_view = PlayerView()
+
+def _on_refresh(endpoint: str, params: Dict[str, Any], payload) -> Optional[Callable[[], None]]:
+    source = PROFILE_SOURCES.get(endpoint)
+    if source is None:
+        return None
+    section, indexer = source
+    data = payload.data
+    if params:
+        # Only the default view contributes. The default roster (active players only) may be cut
+        # from the roster including inactive players rather than fetched, so take it from there.
+        variant = superset_for(endpoint, {})
+        if variant is None or {k: str(v) for k, v in params.items()} != {k: str(v) for k, v in variant[0].items()}:
+            return None
+        data = variant[1](data)
+        if data is None:
+            return None
+    return player_view.prepare(section, indexer(data))
+
+add_refresh_listener(_on_refresh)
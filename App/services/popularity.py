@@ -0,0 +1,115 @@
+import time
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from App.core.config import settings
+from App.services.rate_limiter import upstream_priority, PRIORITY_BACKGROUND
+
+class PopularityTracker:
+    """
+    Access frequency per cache key, decaying with a half-life so recent traffic dominates.
+
+    Uses forward decay: each access adds 2^((t - landmark) / half_life) to the key's weight, so
+    comparing keys needs no per-key decay step and recording is O(1). Weights are rescaled when
+    the landmark falls too far behind. Only the most popular keys are kept once the table is
+    full, along with how to refresh each one.
+    """
+
+    def __init__(self, half_life: float, max_keys: int):
+        self.half_life = half_life
+        self.max_keys = max_keys
+        self.landmark = time.time()
+        self.weights: Dict[str, float] = {}
+        self.refreshers: Dict[str, Callable[[], Awaitable]] = {}
+
+    def record(self, key: str, refresh: Callable[[], Awaitable]):
+        """Count one access of a cache key; refresh fetches and caches the key anew"""
+        exponent = (time.time() - self.landmark) / self.half_life
+        if exponent > 60:
+            self._rescale()
+            exponent = 0.0
+        self.weights[key] = self.weights.get(key, 0.0) + 2.0 ** exponent
+        self.refreshers[key] = refresh
+        if len(self.weights) > self.max_keys:
+            # Drop the least popular tenth in one pass rather than one key per access
+            for dropped, _ in sorted(self.weights.items(), key=lambda item: item[1])[:max(1, self.max_keys // 10)]:
+                del self.weights[dropped]
+                del self.refreshers[dropped]
+
+    def forget(self, key: str):
+        self.weights.pop(key, None)
+        self.refreshers.pop(key, None)
+
+    def _rescale(self):
+        now = time.time()
+        factor = 2.0 ** (-(now - self.landmark) / self.half_life)
+        self.weights = {key: weight * factor for key, weight in self.weights.items() if weight * factor > 1e-6}
+        self.refreshers = {key: self.refreshers[key] for key in self.weights}
+        self.landmark = now
+
+    def score(self, key: str) -> float:
+        """Decayed number of accesses: each access counts 1 now and half as much a half-life later"""
+        return self.weights.get(key, 0.0) * 2.0 ** (-(time.time() - self.landmark) / self.half_life)
+
+    def top(self, k: int) -> List[Tuple[str, float]]:
+        decay = 2.0 ** (-(time.time() - self.landmark) / self.half_life)
+        ranked = sorted(self.weights.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(key, weight * decay) for key, weight in ranked]
+
+class Prefetcher:
+    """
+    Keeps the most popular cache keys warm.
+
+    Every interval, each of the top-K keys with enough recent traffic whose cache entry expires
+    within the lead time (or is gone) is refreshed, one at a time at background rate-limiter
+    priority. Everything else is still fetched on demand.
+    """
+
+    def __init__(self, tracker: PopularityTracker):
+        self.tracker = tracker
+        self.time_left: Optional[Callable[[str], Optional[float]]] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self, time_left: Callable[[str], Optional[float]]):
+        """Start refreshing; time_left gives the seconds until a cached key expires (None if not cached)"""
+        self.time_left = time_left
+        if settings.PREFETCH_ENABLED and (self.task is None or self.task.done()):
+            # Start from an empty context so the task doesn't inherit request state
+            self.task = contextvars.Context().run(asyncio.ensure_future, self._run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def due(self) -> List[str]:
+        """Popular keys about to expire, most popular first"""
+        keys = []
+        for key, score in self.tracker.top(settings.PREFETCH_TOP_K):
+            if score < settings.PREFETCH_MIN_SCORE:
+                break
+            left = self.time_left(key)
+            if left is None or left <= settings.PREFETCH_LEAD_TIME:
+                keys.append(key)
+        return keys
+
+    async def _run(self):
+        upstream_priority.set(PRIORITY_BACKGROUND)
+        while True:
+            await asyncio.sleep(settings.PREFETCH_INTERVAL)
+            for key in self.due():
+                refresh = self.tracker.refreshers.get(key)
+                if refresh is None:
+                    continue
+                try:
+                    await refresh()
+                except Exception as e:
+                    print(f"Prefetch of {key} failed: {e}")
+                left = self.time_left(key)
+                if left is None or left <= settings.PREFETCH_LEAD_TIME:
+                    # The refresh didn't renew this key (a week-scoped key from a past week, or
+                    # upstream failing), so stop retrying it until it is requested again
+                    self.tracker.forget(key)
+
+popularity = PopularityTracker(settings.POPULARITY_HALF_LIFE, settings.POPULARITY_MAX_KEYS)
+prefetcher = Prefetcher(popularity)
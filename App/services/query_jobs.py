@@ -0,0 +1,358 @@
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import tempfile
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from App.core.config import settings
+from App.services.admission import Overloaded
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; each worker runs only the jobs submitted to it
+    fcntl = None
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+JOB_ID = re.compile(r"[0-9a-f]{32}")
+PRUNE_INTERVAL = 10.0  # seconds between sweeps for expired and orphaned jobs
+
+class QueryJob:
+    __slots__ = ("id", "query", "queries", "status", "result", "error", "created_at", "finished_at")
+
+    def __init__(self, query: Optional[str], job_id: Optional[str] = None, queries: Optional[List[str]] = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.query = query
+        self.queries = queries  # set for a batch job, answered together in one process_batch call
+        self.status = JOB_QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "query": self.query,
+            "queries": self.queries,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QueryJob":
+        job = cls(data["query"], data["job_id"], data.get("queries"))
+        job.status = data["status"]
+        job.result = data.get("result")
+        job.error = data.get("error")
+        job.created_at = data["created_at"]
+        job.finished_at = data.get("finished_at")
+        return job
+
+class QueryJobs:
+    """
+    Natural-language queries processed in the background, for clients that can't hold a
+    request open for the length of an LLM call.
+
+    Jobs are stored as files in a directory shared by the workers on the host, so a job can be
+    polled from any worker, not just the one it was submitted to:
+
+    - jobs/<id>.json holds the job, rewritten atomically as it moves from queued to running to
+      done or failed.
+    - pending/<submitted time>-<id> marks a queued job. The submitting worker hands the job to
+      its own pool right away; idle workers of other processes pick up pending jobs in
+      submission order, which spreads a burst over the host.
+    - locks/<id>.lock is held (flock) by the worker running the job, so each job is claimed
+      once. A running job whose lock is free lost its worker and is marked failed.
+
+    Finished jobs are kept for a TTL for their results to be collected, and the store holds at
+    most max_jobs: the oldest finished jobs make room first, and a submission is refused with a
+    503 when every stored job is still pending. Without flock, jobs are only run by the worker
+    they were submitted to, but can still be read from any worker.
+    """
+
+    def __init__(self, directory: str, max_jobs: int, ttl: float):
+        self.directory = directory
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.queue: asyncio.Queue = asyncio.Queue()  # ids of jobs submitted to this worker
+        self.workers: List[asyncio.Task] = []
+        self.process: Optional[Callable[[str], Awaitable[Dict[str, Any]]]] = None
+        self.process_batch: Optional[Callable[[List[str]], Awaitable[List[Dict[str, Any]]]]] = None
+        self.pruned_at = 0.0
+
+    def _path(self, kind: str, name: str) -> str:
+        return os.path.join(self.directory, kind, name)
+
+    def _job_path(self, job_id: str) -> str:
+        return self._path("jobs", f"{job_id}.json")
+
+    def _lock_path(self, job_id: str) -> str:
+        return self._path("locks", f"{job_id}.lock")
+
+    @staticmethod
+    def _pending_name(job: QueryJob) -> str:
+        return f"{job.created_at:017.6f}-{job.id}"
+
+    # Blocking file operations, run in the executor
+
+    def _read(self, job_id: str) -> Optional[QueryJob]:
+        try:
+            with open(self._job_path(job_id), "rb") as f:
+                return QueryJob.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, job: QueryJob):
+        path = self._job_path(job.id)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(job.as_dict(), f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _remove(self, *paths: str):
+        for path in paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def _job_ids(self) -> List[str]:
+        try:
+            names = os.listdir(os.path.join(self.directory, "jobs"))
+        except FileNotFoundError:
+            return []
+        return [name[:-5] for name in names if name.endswith(".json")]
+
+    def _create(self, query: Optional[str], queries: Optional[List[str]] = None) -> QueryJob:
+        for kind in ("jobs", "pending", "locks"):
+            os.makedirs(os.path.join(self.directory, kind), exist_ok=True)
+        if len(self._job_ids()) >= self.max_jobs:
+            self._prune()
+            if len(self._job_ids()) >= self.max_jobs:
+                raise Overloaded("job queue full", max(1, int(settings.QUERY_TARGET_WAIT)))
+        job = QueryJob(query, queries=queries)
+        self._write(job)
+        open(self._path("pending", self._pending_name(job)), "w").close()
+        return job
+
+    def _prune(self):
+        """Drop expired finished jobs, make room for new ones and fail jobs whose worker died"""
+        self.pruned_at = time.monotonic()
+        now = time.time()
+        finished = []
+        for job_id in self._job_ids():
+            job = self._read(job_id)
+            if job is None:
+                continue
+            if job.status == JOB_RUNNING:
+                claim = self._lock(job_id)
+                if claim is not None:
+                    try:
+                        job = self._read(job_id)
+                        if job is not None and job.status == JOB_RUNNING:
+                            job.status = JOB_FAILED
+                            job.error = "The worker processing this job exited"
+                            job.finished_at = now
+                            self._write(job)
+                    finally:
+                        os.close(claim)
+            if job is not None and job.finished:
+                if now - job.finished_at >= self.ttl:
+                    self._remove(self._job_path(job_id), self._lock_path(job_id))
+                else:
+                    finished.append((job.finished_at, job_id))
+        excess = len(self._job_ids()) - self.max_jobs + 1
+        for _, job_id in sorted(finished)[:max(0, excess)]:
+            self._remove(self._job_path(job_id), self._lock_path(job_id))
+
+    def _lock(self, job_id: str) -> Optional[int]:
+        """A descriptor holding the job's lock, or None if another worker holds it"""
+        fd = os.open(self._lock_path(job_id), os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return None
+        return fd
+
+    def _claim(self, job_id: str, pending_name: Optional[str] = None) -> Optional[Tuple[QueryJob, int]]:
+        """
+        Lock a queued job and mark it running; returns the job and the lock descriptor (closing
+        it releases the claim), or None if the job is gone, taken or already claimed
+        """
+        fd = self._lock(job_id)
+        if fd is None:
+            return None
+        try:
+            job = self._read(job_id)
+            if job is None or job.status != JOB_QUEUED:
+                if job is None:
+                    self._remove(self._lock_path(job_id))
+                os.close(fd)
+                return None
+            job.status = JOB_RUNNING
+            self._write(job)
+            self._remove(self._path("pending", pending_name or self._pending_name(job)))
+            return job, fd
+        except BaseException:
+            os.close(fd)
+            raise
+
+    def _claim_pending(self) -> Optional[Tuple[QueryJob, int]]:
+        """Claim the oldest pending job that no other worker has taken"""
+        if time.monotonic() - self.pruned_at >= PRUNE_INTERVAL:
+            self._prune()
+        if fcntl is None:
+            return None  # can't claim safely across processes
+        try:
+            names = sorted(os.listdir(os.path.join(self.directory, "pending")))
+        except FileNotFoundError:
+            return None
+        for name in names:
+            job_id = name.rsplit("-", 1)[-1]
+            if not JOB_ID.fullmatch(job_id):
+                continue
+            claim = self._claim(job_id, name)
+            if claim is not None:
+                return claim
+            job = self._read(job_id)
+            if job is None or job.status != JOB_QUEUED:
+                self._remove(self._path("pending", name))  # pruned or finished; drop the marker
+        return None
+
+    def _finish(self, job: QueryJob, fd: int):
+        try:
+            self._write(job)
+        finally:
+            os.close(fd)
+
+    def _requeue(self, job: QueryJob, fd: int):
+        """Put a claimed job back in the queue for another worker and release the claim"""
+        try:
+            job.status = JOB_QUEUED
+            self._write(job)
+            open(self._path("pending", self._pending_name(job)), "w").close()
+        finally:
+            os.close(fd)
+
+    # Event loop side
+
+    async def _run_blocking(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def submit(self, query: Optional[str], queries: Optional[List[str]] = None) -> QueryJob:
+        """
+        Queue a query for processing, or with queries, a batch answered together so its
+        questions share data fetches and summaries
+
+        Raises:
+            Overloaded: 503 with Retry-After when the store is full of pending jobs
+        """
+        job = await self._run_blocking(self._create, query, queries)
+        self.queue.put_nowait(job.id)
+        return job
+
+    async def get(self, job_id: str) -> Optional[QueryJob]:
+        if not JOB_ID.fullmatch(job_id):
+            return None
+        job = await self._run_blocking(self._read, job_id)
+        if job is not None and job.finished and time.time() - job.finished_at >= self.ttl:
+            return None
+        return job
+
+    async def wait(self, job: QueryJob, timeout: float) -> QueryJob:
+        """Wait up to timeout seconds for a job to finish, whichever worker runs it; returns its latest state"""
+        give_up_at = time.monotonic() + timeout
+        while not job.finished:
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, settings.QUERY_JOB_POLL_INTERVAL))
+            job = await self.get(job.id) or job
+        return job
+
+    def start(self, process: Callable[[str], Awaitable[Dict[str, Any]]],
+              process_batch: Optional[Callable[[List[str]], Awaitable[List[Dict[str, Any]]]]] = None):
+        """Start the worker pool, processing each query with process and each batch with process_batch"""
+        self.process = process
+        self.process_batch = process_batch
+        self.workers = [task for task in self.workers if not task.done()]
+        while len(self.workers) < settings.QUERY_JOB_WORKERS:
+            # Start from an empty context so workers don't inherit request state
+            self.workers.append(contextvars.Context().run(asyncio.ensure_future, self._work()))
+
+    async def stop(self):
+        """Stop the worker pool, waiting for jobs in progress to be put back in the queue"""
+        workers, self.workers = self.workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _next(self) -> Tuple[QueryJob, int]:
+        """Claim the next job: one submitted here, else one pending anywhere on the host"""
+        while True:
+            try:
+                job_id = await asyncio.wait_for(self.queue.get(), settings.QUERY_JOB_POLL_INTERVAL)
+                claim = await self._run_blocking(self._claim, job_id)
+            except asyncio.TimeoutError:
+                claim = await self._run_blocking(self._claim_pending)
+            if claim is not None:
+                return claim
+
+    async def _work(self):
+        while True:
+            try:
+                job, fd = await self._next()
+            except OSError as e:
+                print(f"Could not read the query job store: {e}")
+                await asyncio.sleep(settings.QUERY_JOB_POLL_INTERVAL)
+                continue
+            try:
+                while True:
+                    try:
+                        if job.queries is not None:
+                            job.result = {"results": await self.process_batch(job.queries)}
+                        else:
+                            job.result = await self.process(job.query)
+                        job.status = JOB_DONE
+                    except Overloaded as e:
+                        # Jobs have already waited their turn in the job queue; wait for a slot rather than fail
+                        await asyncio.sleep(float(e.headers["Retry-After"]))
+                        continue
+                    except Exception as e:
+                        job.error = getattr(e, "detail", None) or str(e)
+                        job.status = JOB_FAILED
+                    break
+            except asyncio.CancelledError:
+                # Shutting down: put the job back for another worker
+                try:
+                    await self._run_blocking(self._requeue, job, fd)
+                except OSError as e:
+                    print(f"Could not requeue query job {job.id}: {e}")
+                raise
+            job.finished_at = time.time()
+            try:
+                await self._run_blocking(self._finish, job, fd)
+            except OSError as e:
+                print(f"Could not store the result of query job {job.id}: {e}")
+
+query_jobs = QueryJobs(settings.QUERY_JOB_DIR, settings.QUERY_JOB_MAX_JOBS, settings.QUERY_JOB_TTL)
@@ -0,0 +1,169 @@
+import os
+import time
+import math
+import random
+import struct
+import asyncio
+import threading
+import contextvars
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from App.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; fall back to a per-process bucket
+    fcntl = None
+
+PRIORITY_USER = "user"
+PRIORITY_QUERY = "query"
+PRIORITY_BACKGROUND = "background"
+
+# Priority for upstream calls made in the current context. Background refreshers set this
+# to PRIORITY_BACKGROUND so their calls yield to user-facing cache misses; natural-language
+# queries fetch their data at PRIORITY_QUERY so they yield to the data routes.
+upstream_priority = contextvars.ContextVar("upstream_priority", default=PRIORITY_USER)
+
+# Carries a lowered priority on calls to our own API (see api_client), honoured by main.py
+LOWER_PRIORITIES = (PRIORITY_QUERY, PRIORITY_BACKGROUND)
+PRIORITY_HEADER = "X-Upstream-Priority"
+
+# Bucket state on disk: current token count and the timestamp it was last refilled at
+_STATE = struct.Struct("dd")
+
+# Returned by _update while another worker holds the state file lock
+_BUSY = object()
+_LOCK_RETRY_INTERVAL = 0.002  # seconds
+
+class TokenBucketLimiter:
+    """
+    Token bucket rate limiter for Fantasy Nerds calls, shared by every worker on the host.
+    
+    The bucket lives in a small state file guarded by flock, so all gunicorn workers draw
+    from the same quota. Query and background calls may only take tokens while the bucket
+    holds more than their reserved share, which keeps headroom for the data routes (and, for
+    background calls, for queries too).
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, state_file: str,
+                 background_reserve: float = 0.25, user_max_wait: float = 2.0,
+                 background_max_wait: float = 30.0, query_reserve: float = 0.1,
+                 query_max_wait: float = 5.0):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(max(1, burst))
+        self.state_file = state_file
+        self.floors = {
+            PRIORITY_USER: 0.0,
+            PRIORITY_QUERY: self.capacity * query_reserve,
+            PRIORITY_BACKGROUND: self.capacity * background_reserve,
+        }
+        self.max_waits = {
+            PRIORITY_USER: user_max_wait,
+            PRIORITY_QUERY: query_max_wait,
+            PRIORITY_BACKGROUND: background_max_wait,
+        }
+        self._thread_lock = threading.Lock()
+        self._local_state: Optional[Tuple[float, float]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    async def acquire(self, priority: Optional[str] = None):
+        """
+        Take one token, queueing briefly when the bucket is empty
+        
+        Args:
+            priority (str, optional): PRIORITY_USER, PRIORITY_QUERY or PRIORITY_BACKGROUND (defaults to the context priority)
+            
+        Raises:
+            HTTPException: 429 if no token is available within the priority's maximum wait
+        """
+        if not self.enabled:
+            return
+        priority = priority or upstream_priority.get()
+        floor = self.floors.get(priority, 0.0)
+        give_up_at = time.monotonic() + self.max_waits.get(priority, 0.0)
+
+        while True:
+            wait = await self._update_async(lambda tokens: (tokens - 1, 0.0) if tokens - 1 >= floor
+                                else (tokens, (floor + 1 - tokens) / self.rate))
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > give_up_at:
+                raise HTTPException(
+                    status_code=429,
+                    detail="Upstream rate limit reached. Please try again shortly",
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+            # A little jitter keeps queued workers from waking up in lockstep
+            await asyncio.sleep(wait + random.uniform(0, 0.05))
+
+    async def try_acquire(self, priority: Optional[str] = None) -> bool:
+        """Take one token only if it is available right now (and the bucket isn't locked by another worker)"""
+        if not self.enabled:
+            return True
+        floor = self.floors.get(priority or upstream_priority.get(), 0.0)
+        take = lambda tokens: (tokens - 1, True) if tokens - 1 >= floor else (tokens, False)
+        return await asyncio.get_running_loop().run_in_executor(None, self._update, take) is True
+
+    async def penalize(self, retry_after: float):
+        """Drain the bucket after an upstream 429 so no worker calls again for retry_after seconds"""
+        if self.enabled:
+            await self._update_async(lambda tokens: (min(tokens, 0.0) - retry_after * self.rate, 0.0))
+
+    async def _update_async(self, take):
+        """_update in the executor, retrying while another worker holds the bucket"""
+        loop = asyncio.get_running_loop()
+        while True:
+            result = await loop.run_in_executor(None, self._update, take)
+            if result is not _BUSY:
+                return result
+            await asyncio.sleep(_LOCK_RETRY_INTERVAL)
+
+    def _update(self, take):
+        """
+        Refill the bucket, apply take(tokens) -> (new_tokens, result) atomically and return result,
+        or _BUSY without waiting when another worker holds the state file lock; blocking, so call
+        it off the event loop
+        """
+        with self._thread_lock:
+            if fcntl is None:
+                return self._apply(take, self._local_state, self._store_local)
+
+            fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return _BUSY
+                raw = os.pread(fd, _STATE.size, 0)
+                state = _STATE.unpack(raw) if len(raw) == _STATE.size else None
+                return self._apply(take, state, lambda s: os.pwrite(fd, _STATE.pack(*s), 0))
+            finally:
+                os.close(fd)  # closing the descriptor releases the lock
+
+    def _apply(self, take, state, store) -> float:
+        now = time.time()
+        if state is None:
+            tokens = self.capacity
+        else:
+            tokens, updated = state
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+        tokens, result = take(tokens)
+        store((tokens, now))
+        return result
+
+    def _store_local(self, state):
+        self._local_state = state
+
+fantasy_nerds_limiter = TokenBucketLimiter(
+    rate_per_minute=settings.FN_RATE_LIMIT_PER_MINUTE,
+    burst=settings.FN_RATE_LIMIT_BURST,
+    state_file=settings.FN_RATE_LIMIT_STATE_FILE,
+    background_reserve=settings.FN_RATE_LIMIT_BACKGROUND_RESERVE,
+    user_max_wait=settings.FN_RATE_LIMIT_USER_MAX_WAIT,
+    background_max_wait=settings.FN_RATE_LIMIT_BACKGROUND_MAX_WAIT,
+    query_reserve=settings.FN_RATE_LIMIT_QUERY_RESERVE,
+    query_max_wait=settings.FN_RATE_LIMIT_QUERY_MAX_WAIT,
+)
@@ -0,0 +1,209 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from App.core.config import settings
+from App.services.nfl_calendar import nfl_calendar
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; compaction is skipped
+    fcntl = None
+
+COMPACT_INTERVAL = 86400  # Seconds between a worker's attempts to compact the index
+
+class SnapshotStore:
+    """
+    Append-only history of every payload a cached route fetched, for time-travel queries.
+
+    Payloads are stored once per distinct content as gzip files named by their hash. Every fetch
+    appends a line to index.jsonl with the route, its parameters, when it was fetched and the NFL
+    season and week at the time, so a week in which nothing changed still has its own entries.
+    Workers sharing the directory append to the same index and pick up each other's entries.
+
+    History is bounded: entries older than the retention period are dropped, a fetch that
+    returned the same content as the previous fetch of the call in the same week adds nothing
+    a lookup could tell apart and is collapsed into it, and at most max_entries are kept per
+    route call. Once a day a worker rewrites the index that way and deletes the payloads no
+    entry refers to any more; the others notice the new index and reload it.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self.lock_path = os.path.join(directory, "index.lock")
+        self.entries: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}  # (source, params) -> in index order
+        self.offset = 0
+        self.inode: Optional[int] = None  # of the index file read so far; changes when it is compacted
+        self.compacted_at = 0.0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def params_key(params: Dict[str, Any]) -> str:
+        return json.dumps(params, sort_keys=True, default=str)
+
+    def _index_lock(self, exclusive: bool) -> Optional[int]:
+        """
+        Lock the index: shared while saving a payload, exclusive while compacting (without
+        waiting; None if another worker holds the lock). Close the descriptor to unlock.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB if exclusive else fcntl.LOCK_SH)
+            except BlockingIOError:
+                os.close(fd)
+                return None
+        return fd
+
+    def save(self, source: str, params: Dict[str, Any], body: bytes, passthrough: bool, fetched_at: float = None):
+        """Record one fetched payload; blocking, so call it off the event loop"""
+        fetched_at = fetched_at or time.time()
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = os.path.join(self.directory, source, f"{digest}.json.gz")
+        # Held until the entry is in the index, so compaction can't delete the payload in between
+        lock_fd = self._index_lock(exclusive=False)
+        try:
+            if not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path), suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(gzip.compress(body))
+                    os.replace(tmp_path, blob_path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+
+            season, week = nfl_calendar.week(fetched_at)
+            entry = {
+                "source": source,
+                "params": self.params_key(params),
+                "fetched_at": fetched_at,
+                "season": season,
+                "week": week,
+                "blob": digest,
+                "passthrough": passthrough,
+            }
+            # One write on an O_APPEND descriptor, so lines from concurrent workers don't interleave
+            line = (json.dumps(entry) + "\n").encode()
+            fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        finally:
+            os.close(lock_fd)
+
+        if time.time() - self.compacted_at >= COMPACT_INTERVAL:
+            self.compacted_at = time.time()
+            self.compact()
+
+    def _retain(self, entries: List[Dict[str, Any]], now: float) -> List[Dict[str, Any]]:
+        """A route call's entries (in index order) that the retention policy keeps"""
+        cutoff = now - settings.SNAPSHOT_RETENTION_DAYS * 86400
+        kept: List[Dict[str, Any]] = []
+        for entry in entries:
+            if entry["fetched_at"] < cutoff:
+                continue
+            if kept and (kept[-1]["blob"], kept[-1]["season"], kept[-1]["week"]) == (entry["blob"], entry["season"], entry["week"]):
+                continue  # Same content as the previous fetch that week: lookups return the earlier entry
+            kept.append(entry)
+        return kept[-settings.SNAPSHOT_MAX_ENTRIES:]
+
+    def compact(self):
+        """
+        Rewrite the index with only the entries the retention policy keeps and delete the
+        payloads nothing refers to; skipped while another worker compacts. Blocking.
+        """
+        if fcntl is None:
+            return
+        lock_fd = self._index_lock(exclusive=True)
+        if lock_fd is None:
+            return
+        try:
+            now = time.time()
+            calls: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+            try:
+                with open(self.index_path, "rb") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            calls.setdefault((entry["source"], entry["params"]), []).append(entry)
+            except FileNotFoundError:
+                return
+            kept = sorted((entry for entries in calls.values() for entry in self._retain(entries, now)),
+                          key=lambda entry: entry["fetched_at"])
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(b"".join((json.dumps(entry) + "\n").encode() for entry in kept))
+                os.replace(tmp_path, self.index_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+            referenced = {(entry["source"], entry["blob"]) for entry in kept}
+            for source in {source for source, _ in calls}:
+                source_dir = os.path.join(self.directory, source)
+                for name in os.listdir(source_dir) if os.path.isdir(source_dir) else []:
+                    if name.endswith(".json.gz") and (source, name[:-len(".json.gz")]) not in referenced:
+                        os.unlink(os.path.join(source_dir, name))
+        finally:
+            os.close(lock_fd)
+
+    def _sync(self):
+        """Read index lines appended since the last read, by this or any other worker"""
+        try:
+            with open(self.index_path, "rb") as f:
+                inode = os.fstat(f.fileno()).st_ino
+                if inode != self.inode:
+                    # First read, or another worker compacted the index: start over
+                    self.inode, self.offset, self.entries = inode, 0, {}
+                f.seek(self.offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return
+        # Leave a partly written last line for the next read
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        self.offset += len(complete)
+        now = time.time()
+        touched = set()
+        for line in complete.splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                key = (entry["source"], entry["params"])
+                self.entries.setdefault(key, []).append(entry)
+                touched.add(key)
+        for key in touched:
+            self.entries[key] = self._retain(self.entries[key], now)
+
+    def find(self, source: str, params: Dict[str, Any], as_of: Optional[float] = None,
+             week: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        The latest snapshot of a route call fetched at or before as_of and, when given, during
+        that NFL week (of the season as_of falls in, or the current season); blocking, so call
+        it off the event loop
+        """
+        cutoff = as_of if as_of is not None else time.time()
+        season = nfl_calendar.week(cutoff)[0]
+        with self.lock:
+            self._sync()
+            for entry in reversed(self.entries.get((source, self.params_key(params)), [])):
+                if entry["fetched_at"] > cutoff:
+                    continue
+                if week is not None and (entry["season"], entry["week"]) != (season, week):
+                    continue
+                return entry
+        return None
+
+    def load(self, entry: Dict[str, Any]) -> bytes:
+        with open(os.path.join(self.directory, entry["source"], f"{entry['blob']}.json.gz"), "rb") as f:
+            return gzip.decompress(f.read())
+
+snapshot_store = SnapshotStore(settings.SNAPSHOT_DIR)
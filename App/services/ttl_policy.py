@@ -0,0 +1,87 @@
+import time
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from App.core.config import settings
+from App.core.metrics import CACHE_TTL_SECONDS
+from App.services.nfl_calendar import nfl_calendar
+
+class NamespaceTTL:
+    """The adaptive TTL of one cache namespace and the content last seen under each of its keys"""
+
+    __slots__ = ("base", "minimum", "maximum", "game_window", "current", "digests")
+
+    def __init__(self, base: float, minimum: float, maximum: float, game_window: Optional[float]):
+        self.base = base
+        self.minimum = minimum
+        self.maximum = maximum
+        self.game_window = game_window
+        self.current = base
+        self.digests: Dict[str, bytes] = OrderedDict()  # least recently fetched key first
+
+class TTLPolicy:
+    """
+    Cache expiry per namespace (route), adapted to how often its content actually changes.
+
+    Every fetch is hashed and compared with the previous fetch under the same cache key. A
+    change cuts the namespace's TTL by a factor, and each unchanged refetch adds a fraction of
+    the configured expiry back (additive increase, multiplicative decrease), always within the
+    namespace's bounds. Only the ADAPTIVE_TTL_MAX_KEYS most recently fetched keys of a namespace
+    are remembered, so one-off keys (a slate id, a past week) don't accumulate. While games are in progress, namespaces with a game window expiry are
+    capped at it, and entries fetched before the current window's first kickoff are expired.
+    """
+
+    def __init__(self):
+        self.namespaces: Dict[str, NamespaceTTL] = {}
+
+    def register(self, namespace: str, base: timedelta, minimum: Optional[timedelta] = None,
+                 maximum: Optional[timedelta] = None, game_window: Optional[timedelta] = None):
+        base_seconds = base.total_seconds()
+        self.namespaces[namespace] = NamespaceTTL(
+            base_seconds,
+            minimum.total_seconds() if minimum is not None else base_seconds / 4,
+            maximum.total_seconds() if maximum is not None else base_seconds * 4,
+            game_window.total_seconds() if game_window is not None else None,
+        )
+        CACHE_TTL_SECONDS.labels(namespace).set(base_seconds)
+
+    def expiry(self, namespace: str, now: Optional[float] = None) -> timedelta:
+        """The TTL of a namespace right now"""
+        state = self.namespaces[namespace]
+        if not settings.ADAPTIVE_TTL_ENABLED:
+            return timedelta(seconds=state.base)
+        ttl = state.current
+        if state.game_window is not None and nfl_calendar.in_game_window(now):
+            ttl = min(ttl, state.game_window)
+        return timedelta(seconds=ttl)
+
+    def is_fresh(self, namespace: str, stored_at: datetime, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        if now - stored_at.timestamp() >= self.expiry(namespace, now).total_seconds():
+            return False
+        state = self.namespaces[namespace]
+        if settings.ADAPTIVE_TTL_ENABLED and state.game_window is not None:
+            window = nfl_calendar.game_window(now)
+            if window is not None and stored_at.timestamp() < window[0]:
+                return False
+        return True
+
+    def observe(self, namespace: str, key: str, body: bytes):
+        """Adjust a namespace's TTL after fetching a cache key's content"""
+        state = self.namespaces[namespace]
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        previous = state.digests.get(key)
+        state.digests[key] = digest
+        state.digests.move_to_end(key)
+        while len(state.digests) > settings.ADAPTIVE_TTL_MAX_KEYS:
+            state.digests.popitem(last=False)
+        if previous is None:
+            return
+        if previous != digest:
+            state.current = max(state.minimum, state.current * settings.ADAPTIVE_TTL_DECREASE)
+        else:
+            state.current = min(state.maximum, state.current + state.base * settings.ADAPTIVE_TTL_INCREASE)
+        CACHE_TTL_SECONDS.labels(namespace).set(state.current)
+
+ttl_policy = TTLPolicy()
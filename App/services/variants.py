@@ -0,0 +1,71 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Leader positions that are not part of position=ALL, which covers offensive players only
+NON_DERIVABLE_POSITIONS = {"IDP", "DL", "LB", "DB", "DEF"}
+FLEX_POSITIONS = {"RB", "WR", "TE"}
+FORMAT_POINTS = {"std": "standard_points", "ppr": "ppr_points", "half": "half_ppr_points"}
+
+def _rows(data: Any) -> Tuple[Optional[List[Dict[str, Any]]], Callable[[List[Dict[str, Any]]], Any]]:
+    """The player rows of a payload and a function putting replacement rows back in the same shape"""
+    if isinstance(data, list):
+        return data, lambda rows: rows
+    if isinstance(data, dict) and isinstance(data.get("players"), list):
+        return data["players"], lambda rows: {**data, "players": rows}
+    return None, lambda rows: rows
+
+def _active_players(data: Any) -> Optional[Any]:
+    """The default roster (active players only) from the roster including inactive players"""
+    rows, rebuild = _rows(data)
+    if rows is None or not all(isinstance(row, dict) and "active" in row for row in rows):
+        return None
+    return rebuild([row for row in rows if str(row["active"]).lower() in ("1", "true")])
+
+def _position_leaders(position: str) -> Callable[[Any], Optional[Any]]:
+    """Leaders at one position (or FLEX) from the leaders at all positions"""
+    wanted = FLEX_POSITIONS if position == "FLEX" else {position}
+
+    def derive(data: Any) -> Optional[Any]:
+        rows, rebuild = _rows(data)
+        if rows is None or not all(isinstance(row, dict) and "position" in row for row in rows):
+            return None
+        derived = rebuild([row for row in rows if str(row["position"]).upper() in wanted])
+        if isinstance(derived, dict) and "position" in derived:
+            derived["position"] = position
+        return derived
+    return derive
+
+def _rankings_in_format(format: str) -> Callable[[Any], Optional[Any]]:
+    """Rankings in a scoring format, re-ordered by that format's points from the standard rankings"""
+    points = FORMAT_POINTS[format]
+
+    def derive(data: Any) -> Optional[Any]:
+        rows, rebuild = _rows(data)
+        if not rows or not all(isinstance(row, dict) and isinstance(row.get(points), (int, float)) for row in rows):
+            return None
+        ordered = sorted(rows, key=lambda row: row[points], reverse=True)
+        if all("rank" in row for row in rows):
+            ordered = [{**row, "rank": rank} for rank, row in enumerate(ordered, 1)]
+        derived = rebuild(ordered)
+        if isinstance(derived, dict) and "format" in derived:
+            derived["format"] = format
+        return derived
+    return derive
+
+def superset_for(endpoint: str, params: Optional[Dict[str, Any]]) -> Optional[Tuple[Dict[str, Any], Callable[[Any], Optional[Any]]]]:
+    """
+    For a request that is a subset of another upstream document, the superset's params and a
+    function deriving this request's payload from it (which returns None when the superset's
+    shape doesn't allow it, so the caller falls back to fetching the variant directly)
+    """
+    params = params or {}
+    if endpoint == "players" and not params:
+        return {"include_inactive": 1}, _active_players
+    if endpoint == "leaders":
+        position = str(params.get("position", "ALL")).upper()
+        if position != "ALL" and position not in NON_DERIVABLE_POSITIONS:
+            return {k: v for k, v in params.items() if k != "position"}, _position_leaders(position)
+    if endpoint in ("weekly-rankings", "draft-rankings") and set(params) == {"format"}:
+        format = str(params["format"]).lower()
+        if format in ("ppr", "half"):
+            return {}, _rankings_in_format(format)
+    return None
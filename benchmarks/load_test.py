@@ -0,0 +1,266 @@
+"""
+Load test for the NFL Data API against local stand-ins for Fantasy Nerds and OpenAI.
+
+Starts the two mock servers and the API (uvicorn) as subprocesses, drives a fixed,
+seeded sequence of requests through each scenario, and reports latency percentiles,
+throughput and the upstream calls each scenario caused. Nothing touches the paid APIs.
+
+Scenarios:
+    cached  - GETs across the data routes after warming the cache (pure cache hits)
+    cold    - each GET is preceded by DELETE /nfl/cache, so every request misses
+    query   - POST /nfl/query with a mix of natural-language questions
+    mix     - 70% cached routes, 10% cold parameter variants, 20% queries
+
+Run:
+    python -m benchmarks.load_test --requests 500 --concurrency 20 --output results.json
+    python -m benchmarks.load_test --compare results.json   # flag regressions vs an earlier run
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+CACHED_ROUTES = [
+    "/nfl/teams", "/nfl/schedule", "/nfl/standings", "/nfl/injuries", "/nfl/draft-rankings",
+    "/nfl/player-tiers", "/nfl/auction-values", "/nfl/adp", "/nfl/best-ball", "/nfl/bye-weeks",
+    "/nfl/defense-rankings", "/nfl/depth", "/nfl/weekly-projections", "/nfl/weekly-rankings",
+    "/nfl/dynasty", "/nfl/news", "/nfl/fantasy-leaders", "/nfl/players", "/nfl/add-drops",
+    "/nfl/weather", "/nfl/draft-projections", "/nfl/ros", "/nfl/dfs-slates", "/nfl/idp-draft",
+    "/nfl/idp-weekly", "/nfl/nfl-picks",
+]
+
+QUERIES = [
+    ("Who are the top RBs this week?", 10),
+    ("Who should I pick up off waivers?", 8),
+    ("What's the injury status for the Chiefs this week?", 6),
+    ("Show me the Packers' upcoming schedule", 4),
+    ("What's the depth chart for the Cowboys?", 3),
+    ("What are the current standings?", 3),
+    ("Top PPR draft rankings for wide receivers", 3),
+    ("Auction values for a 10 team league", 2),
+    ("What's the weather forecast for Sunday's games?", 2),
+    ("Rest of season projections for tight ends", 2),
+    ("How is Patrick Mahomes ranked this week?", 2),
+    ("Which defenses have the best rankings?", 1),
+]
+
+def param_variant(rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+    """A parameterized route request, drawn from the combinations clients actually send"""
+    route = rng.choice(["/nfl/adp", "/nfl/auction-values", "/nfl/fantasy-leaders", "/nfl/weekly-rankings"])
+    if route == "/nfl/adp":
+        return route, {"teams": rng.choice([8, 10, 12, 14, 16]), "format": rng.choice(["std", "ppr", "half", "superflex"])}
+    if route == "/nfl/auction-values":
+        return route, {"teams": rng.choice([10, 12]), "budget": rng.choice([100, 200, 300]), "format": rng.choice(["std", "ppr"])}
+    if route == "/nfl/fantasy-leaders":
+        return route, {"position": rng.choice(["ALL", "QB", "RB", "WR", "TE"]), "week": rng.randint(0, 6)}
+    return route, {"format": rng.choice(["std", "ppr", "half"])}
+
+def build_plan(scenario: str, count: int, seed: int) -> List[Dict[str, Any]]:
+    """The fixed sequence of requests for a scenario; the same seed always gives the same plan"""
+    rng = random.Random(f"{seed}:{scenario}")
+    questions, weights = zip(*QUERIES)
+    plan = []
+    for _ in range(count):
+        kind = scenario
+        if scenario == "mix":
+            roll = rng.random()
+            kind = "cached" if roll < 0.7 else "variant" if roll < 0.8 else "query"
+        if kind == "cached":
+            plan.append({"method": "GET", "path": rng.choice(CACHED_ROUTES)})
+        elif kind == "cold":
+            plan.append({"method": "GET", "path": rng.choice(CACHED_ROUTES), "clear_cache": True})
+        elif kind == "variant":
+            path, params = param_variant(rng)
+            plan.append({"method": "GET", "path": path, "params": params})
+        else:
+            plan.append({"method": "POST", "path": "/nfl/query", "json": {"query": rng.choices(questions, weights)[0]}})
+    return plan
+
+def percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+async def run_plan(client: httpx.AsyncClient, plan: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(item):
+        nonlocal errors
+        async with semaphore:
+            try:
+                if item.get("clear_cache"):
+                    await client.delete("/nfl/cache")
+            except httpx.HTTPError:
+                pass
+            started = time.perf_counter()
+            try:
+                response = await client.request(item["method"], item["path"], params=item.get("params"), json=item.get("json"))
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(item) for item in plan))
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    return {
+        "requests": len(plan),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(plan) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+        "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+    }
+
+async def upstream_stats(fn_url: str, openai_url: str) -> Dict[str, int]:
+    async with httpx.AsyncClient() as client:
+        fn = (await client.get(f"{fn_url}/__stats")).json()
+        llm = (await client.get(f"{openai_url}/__stats")).json()
+    return {"fantasy_nerds": fn["total"], "openai": llm["calls"]}
+
+async def run_scenarios(args, api_url: str, fn_url: str, openai_url: str) -> Dict[str, Any]:
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=api_url, timeout=120.0, limits=limits) as client:
+        for scenario in args.scenarios:
+            await client.delete("/nfl/cache")
+            if scenario == "cached":
+                # Warm every route so the measured requests are all hits
+                await asyncio.gather(*(client.get(path) for path in CACHED_ROUTES))
+            before = await upstream_stats(fn_url, openai_url)
+            result = await run_plan(client, build_plan(scenario, args.requests, args.seed), args.concurrency)
+            after = await upstream_stats(fn_url, openai_url)
+            result["upstream_calls"] = {name: after[name] - before[name] for name in after}
+            results[scenario] = result
+            print(f"{scenario:>7}: p50 {result['p50_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  "
+                  f"p99 {result['p99_ms']:8.1f} ms  {result['throughput_rps']:7.1f} req/s  "
+                  f"errors {result['errors']}  upstream {result['upstream_calls']}")
+    return results
+
+def start(command: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+
+def wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout} seconds")
+
+def compare(current: Dict[str, Any], baseline_path: str, tolerance: float) -> bool:
+    """Print regressions against an earlier report; return True if any metric regressed"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["scenarios"]
+    regressed = False
+    for scenario, result in current.items():
+        previous = baseline.get(scenario)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if previous[metric] and result[metric] > previous[metric] * (1 + tolerance):
+                regressed = True
+                print(f"REGRESSION {scenario} {metric}: {previous[metric]} -> {result[metric]} ms")
+        if previous["throughput_rps"] and result["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressed = True
+            print(f"REGRESSION {scenario} throughput: {previous['throughput_rps']} -> {result['throughput_rps']} req/s")
+        for name, calls in result["upstream_calls"].items():
+            if calls > previous["upstream_calls"].get(name, 0):
+                print(f"NOTE {scenario} {name} calls: {previous['upstream_calls'].get(name, 0)} -> {calls}")
+    return regressed
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=["cached", "cold", "query", "mix"],
+                        choices=["cached", "cold", "query", "mix"])
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the API")
+    parser.add_argument("--api-port", type=int, default=8100)
+    parser.add_argument("--fn-port", type=int, default=9001)
+    parser.add_argument("--openai-port", type=int, default=9002)
+    parser.add_argument("--fn-latency-ms", type=float, default=120.0)
+    parser.add_argument("--fn-error-rate", type=float, default=0.0)
+    parser.add_argument("--openai-latency-ms", type=float, default=1500.0)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    api_url = f"http://127.0.0.1:{args.api_port}"
+    fn_url = f"http://127.0.0.1:{args.fn_port}"
+    openai_url = f"http://127.0.0.1:{args.openai_port}"
+    # Everything the API stores on disk goes to a directory of its own for the run, so mock
+    # payloads never reach the snapshot history or the shared state of a real server on this host
+    state_dir = tempfile.mkdtemp(prefix="nfl_load_test_")
+    env = dict(
+        os.environ,
+        FANTASY_NERDS_API_KEY=os.getenv("FANTASY_NERDS_API_KEY", "benchmark"),
+        GPT_API_KEY=os.getenv("GPT_API_KEY", "benchmark"),
+        FANTASY_NERDS_BASE_URL=f"{fn_url}/v1/nfl",
+        GPT_API_URL=f"{openai_url}/v1/chat/completions",
+        INTERNAL_API_URL=api_url,
+        UPSTREAM_MODE="passthrough",
+        SNAPSHOT_DIR=os.path.join(state_dir, "snapshots"),
+        CLUSTER_DIR=os.path.join(state_dir, "cluster"),
+        QUERY_JOB_DIR=os.path.join(state_dir, "jobs"),
+        FN_RATE_LIMIT_STATE_FILE=os.path.join(state_dir, "ratelimit.bin"),
+        PYTHONHASHSEED=str(args.seed),
+    )
+    env.setdefault("FN_RATE_LIMIT_PER_MINUTE", "0")  # measure the service, not our quota
+
+    python = sys.executable
+    processes = [
+        start([python, "-m", "benchmarks.mock_fantasy_nerds", "--port", str(args.fn_port), "--seed", str(args.seed),
+               "--latency-ms", str(args.fn_latency_ms), "--error-rate", str(args.fn_error_rate)], env),
+        start([python, "-m", "benchmarks.mock_openai", "--port", str(args.openai_port), "--seed", str(args.seed),
+               "--latency-ms", str(args.openai_latency_ms)], env),
+        start([python, "-m", "uvicorn", "main:app", "--port", str(args.api_port), "--workers", str(args.workers),
+               "--log-level", "warning"], env),
+    ]
+    try:
+        wait_ready(f"{fn_url}/__stats")
+        wait_ready(f"{openai_url}/__stats")
+        wait_ready(f"{api_url}/health")
+        scenarios = asyncio.run(run_scenarios(args, api_url, fn_url, openai_url))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "scenarios": scenarios,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare and compare(scenarios, args.compare, args.tolerance):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
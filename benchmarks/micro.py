@@ -0,0 +1,280 @@
+"""
+Micro-benchmarks for the CPU-bound parts of answering a query.
+
+Times query classification, each LLMService summarizer, the route cache key (binding,
+canonicalizing and building it, as every cached request does) and the JSON
+encoding of the LLM context against payloads at full-season scale (PayloadFactory) and a
+few thousand generated questions. Each benchmark reports the best per-operation time over
+several repeats and the memory it allocates (tracemalloc), and can be compared against a
+saved baseline to flag regressions.
+
+Run:
+    python -m benchmarks.micro --save-baseline micro_baseline.json
+    python -m benchmarks.micro --baseline micro_baseline.json   # exits 1 on a regression
+    python -m benchmarks.micro --only classify,summarize_context
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import timeit
+import argparse
+import platform
+import tracemalloc
+import contextlib
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.payloads import PayloadFactory, TEAMS, FIRST_NAMES, LAST_NAMES
+
+QUESTION_TEMPLATES = [
+    "Who are the top {position}s this week?",
+    "How is {player} ranked in week {week}?",
+    "What's the injury status for the {team} this week?",
+    "Is {player} questionable for Sunday?",
+    "Show me the {team} upcoming schedule",
+    "{team} vs {other} matchup in week {week}",
+    "What's the depth chart for the {team}?",
+    "What are the current standings in the {conference}?",
+    "Top PPR draft rankings for {position}s in {year}",
+    "Auction values for a 10 team league",
+    "What's the weather forecast for the {team} game?",
+    "Who should I pick up off waivers in week {week}?",
+    "Rest of season projections for {position}s",
+    "Which defenses have the best rankings?",
+    "When is the {team} bye week?",
+    "Dynasty keeper advice for {player}",
+    "Best ball sleepers at {position}",
+    "Tell me something about the {team}",
+]
+
+def generate_queries(count: int, seed: int) -> List[str]:
+    """A fixed mix of questions spanning every query type the classifier knows"""
+    rng = random.Random(seed)
+    names = [name for _, name in TEAMS]
+    queries = []
+    for _ in range(count):
+        team, other = rng.sample(names, 2)
+        queries.append(rng.choice(QUESTION_TEMPLATES).format(
+            team=team, other=other,
+            player=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            position=rng.choice(["QB", "RB", "WR", "TE"]),
+            week=rng.randint(1, 18), year=rng.choice([2023, 2024, 2025]),
+            conference=rng.choice(["AFC", "NFC"]),
+        ))
+    return queries
+
+class Fixtures:
+    """Payloads as the query service receives them from the internal API"""
+
+    def __init__(self, seed: int, query_count: int):
+        factory = PayloadFactory(seed=seed)
+        self.schedule = factory.build("schedule")
+        self.standings = factory.build("standings")
+        self.injuries = factory.build("injuries")
+        self.roster = factory.build("players", {"include_inactive": 1})
+        self.draft_rankings = factory.build("draft-rankings", {"format": "ppr"})
+        self.weekly_rankings = factory.build("weekly-rankings", {"format": "std"})
+        self.queries = generate_queries(query_count, seed)
+        self.context = {
+            "query_type": "player_rankings",
+            "metadata": {"target_player": "Patrick Mahomes"},
+            "standings": self.standings,
+            "schedule": self.schedule,
+            "injuries": self.injuries,
+            "draft_rankings": self.draft_rankings,
+            "weekly_rankings": self.weekly_rankings,
+        }
+        # Cached route calls as (route handler name, args, kwargs)
+        self.cache_calls = [("get_teams", (), {}), ("get_draft_rankings", ("ppr",), {}),
+                            ("get_adp", (), {"teams": 12, "format": "PPR"}),
+                            ("get_weekly_injuries", (), {"season": 2024, "week": 6}),
+                            ("get_players", (), {"include_inactive": 1})]
+
+# Left in a summary by a summarizer that gave up on its input
+FALLBACK_MARKERS = ("could not be summarized", "unexpected format")
+
+def check_summary(name: str, summary: Any):
+    """
+    Raise if a summary (or any section of it) is a summarizer's error fallback or came out
+    empty, so benchmarks never time the error path instead of the real one
+    """
+    sections = [summary]
+    while sections:
+        section = sections.pop()
+        if isinstance(section, dict):
+            text = str(section.get("summary", "")).lower()
+            if "error" in section or any(marker in text for marker in FALLBACK_MARKERS):
+                raise RuntimeError(f"{name} fell back to its error summary: {section}")
+            for key in ("conferences", "games", "teams_with_injuries", "players_sample"):
+                if key in section and not section[key]:
+                    raise RuntimeError(f"{name} summarized no {key}; the fixture doesn't match the summarizer")
+            sections.extend(section.values())
+        elif isinstance(section, list):
+            sections.extend(section)
+
+def build_benchmarks(fixtures: Fixtures) -> Dict[str, Tuple[Callable[[], Any], int]]:
+    """
+    Map each benchmark name to a callable and the number of operations one call performs,
+    so results are reported per operation (per query, per cache key, ...)
+    
+    Raises:
+        RuntimeError: if a summarizer doesn't take its normal path on the fixtures
+    """
+    # Nothing here calls out, but settings refuse to load without API keys
+    os.environ.setdefault("FANTASY_NERDS_API_KEY", "benchmark")
+    os.environ.setdefault("GPT_API_KEY", "benchmark")
+    from App.api import api_routes
+    from App.services.nfl_calendar import nfl_calendar
+    from App.services.LLm_service import LLMService
+    from App.services.Nfl_query_service import NFLQueryService
+
+    llm = LLMService()
+    query_service = NFLQueryService()
+    with contextlib.redirect_stdout(io.StringIO()):
+        summarized = llm._summarize_context_data(fixtures.context)
+        check_summary("summarize_context", summarized)
+        for section in ("standings", "schedule", "injuries", "draft_rankings", "weekly_rankings"):
+            if section not in summarized:
+                raise RuntimeError(f"summarize_context left out {section}")
+        check_summary("summarize_standings", llm._summarize_standings_data(fixtures.standings))
+        check_summary("summarize_schedule", llm._summarize_schedule_data(fixtures.schedule))
+        check_summary("summarize_injuries", llm._summarize_injury_data(fixtures.injuries))
+        check_summary("summarize_rankings", llm._summarize_fantasy_rankings(fixtures.draft_rankings))
+    context_str = json.dumps(summarized, indent=2)
+    payload = {
+        "model": llm.model,
+        "messages": [{"role": "system", "content": context_str},
+                     {"role": "user", "content": fixtures.queries[0]}],
+        "temperature": 0.7,
+        "max_tokens": 800,
+    }
+
+    def classify():
+        for query in fixtures.queries:
+            query_service._classify_query(query)
+
+    # Week-scoped keys would otherwise schedule a calendar reload on every call
+    nfl_calendar.loaded_at = time.time()
+    cache_calls = [(getattr(api_routes, name).request_key, args, kwargs) for name, args, kwargs in fixtures.cache_calls]
+
+    def cache_keys():
+        for request_key, args, kwargs in cache_calls:
+            request_key(*args, **dict(kwargs))
+
+    return {
+        "classify": (classify, len(fixtures.queries)),
+        "summarize_context": (lambda: llm._summarize_context_data(fixtures.context), 1),
+        "summarize_standings": (lambda: llm._summarize_standings_data(fixtures.standings), 1),
+        "summarize_schedule": (lambda: llm._summarize_schedule_data(fixtures.schedule), 1),
+        "summarize_injuries": (lambda: llm._summarize_injury_data(fixtures.injuries), 1),
+        "summarize_rankings": (lambda: llm._summarize_fantasy_rankings(fixtures.draft_rankings), 1),
+        "summarize_generic": (lambda: llm._create_generic_summary(fixtures.roster), 1),
+        "cache_key": (cache_keys, len(fixtures.cache_calls)),
+        "context_json": (lambda: json.dumps(summarized, indent=2), 1),
+        "prompt_key": (lambda: hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest(), 1),
+    }
+
+def measure(func: Callable[[], Any], ops: int, repeat: int, min_time: float) -> Dict[str, Any]:
+    """Best and median time per operation, plus memory allocated by a single call"""
+    timer = timeit.Timer(func)
+    # Size the inner loop so each repeat runs for at least min_time
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    runs = sorted(timer.repeat(repeat=repeat, number=number))
+    per_op = [run / number / ops for run in runs]
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops": ops,
+        "best_us": round(per_op[0] * 1e6, 3),
+        "median_us": round(per_op[len(per_op) // 2] * 1e6, 3),
+        "peak_alloc_bytes": max(0, peak - before) // ops,
+        "retained_bytes": max(0, after - before) // ops,
+    }
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Benchmarks whose best time or peak allocation grew by more than the tolerance"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("best_us", "peak_alloc_bytes"):
+            if previous[metric] and result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {previous[metric]} -> {result[metric]} "
+                                   f"(+{(result[metric] / previous[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for classification, summarization and encoding")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--queries", type=int, default=5000, help="number of sample questions to classify")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+    parser.add_argument("--only", help="comma-separated benchmark names to run")
+    parser.add_argument("--baseline", help="compare against this saved baseline")
+    parser.add_argument("--save-baseline", help="write the results to this file as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging, e.g. 0.2 = 20%%")
+    args = parser.parse_args()
+
+    fixtures = Fixtures(args.seed, args.queries)
+    benchmarks = build_benchmarks(fixtures)
+    if args.only:
+        wanted = set(args.only.split(","))
+        unknown = wanted - set(benchmarks)
+        if unknown:
+            parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+        benchmarks = {name: bench for name, bench in benchmarks.items() if name in wanted}
+
+    results = {}
+    for name, (func, ops) in benchmarks.items():
+        # The summarizers print debug output; keep it out of the report but still pay for it
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = measure(func, ops, args.repeat, args.min_time)
+        results[name] = result
+        print(f"{name:>20}: best {result['best_us']:10.2f} us/op  median {result['median_us']:10.2f} us/op  "
+              f"peak {result['peak_alloc_bytes']:>10,} B/op  retained {result['retained_bytes']:>8,} B/op")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "queries": args.queries,
+        "benchmarks": results,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline.get("seed"), baseline.get("queries")) != (args.seed, args.queries):
+            print("Warning: baseline was recorded with a different seed or query count")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Local stand-in for the Fantasy Nerds NFL API.
+
+Serves the synthetic payloads from benchmarks.payloads (or recorded JSON files) with
+configurable latency and error rates, and counts calls per endpoint so a load test can
+report how much upstream traffic it caused.
+
+Run:
+    python -m benchmarks.mock_fantasy_nerds --port 9001 --latency-ms 120 --error-rate 0.01
+
+then point the API at it with FANTASY_NERDS_BASE_URL=http://127.0.0.1:9001/v1/nfl
+"""
+import os
+import random
+import asyncio
+import argparse
+from collections import Counter
+from pathlib import Path
+
+import orjson
+from fastapi import FastAPI, Request, Response
+
+from benchmarks.payloads import PayloadFactory, ENDPOINTS
+
+class MockFantasyNerds:
+    def __init__(self, seed: int = 2024, latency_ms: float = 100.0, latency_sigma: float = 0.5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, payload_dir: str = None):
+        self.factory = PayloadFactory(seed)
+        self.rng = random.Random(seed)
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.payload_dir = Path(payload_dir) if payload_dir else None
+        self.bodies = {}
+        self.calls = Counter()
+        self.errors = Counter()
+
+    def body(self, endpoint: str, params: dict) -> bytes:
+        """Encoded payload for a request, built once per distinct endpoint and params"""
+        key = (endpoint, tuple(sorted((k, v) for k, v in params.items() if k != "apikey")))
+        if key not in self.bodies:
+            recorded = self.payload_dir / f"{endpoint}.json" if self.payload_dir else None
+            if recorded is not None and recorded.exists():
+                self.bodies[key] = recorded.read_bytes()
+            else:
+                self.bodies[key] = orjson.dumps(self.factory.build(endpoint, params))
+        return self.bodies[key]
+
+    def latency(self) -> float:
+        """Sample a response latency in seconds from a log-normal around the configured median"""
+        if self.latency_ms <= 0:
+            return 0.0
+        return self.latency_ms / 1000 * self.rng.lognormvariate(0, self.latency_sigma)
+
+    def create_app(self) -> FastAPI:
+        app = FastAPI(title="Mock Fantasy Nerds")
+
+        @app.get("/v1/nfl/{endpoint}")
+        async def serve(endpoint: str, request: Request):
+            self.calls[endpoint] += 1
+            await asyncio.sleep(self.latency())
+            if endpoint not in ENDPOINTS:
+                return Response(status_code=404)
+            roll = self.rng.random()
+            if roll < self.rate_limit_rate:
+                self.errors[endpoint] += 1
+                return Response(status_code=429, headers={"Retry-After": "1"})
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.errors[endpoint] += 1
+                return Response(status_code=500)
+            return Response(content=self.body(endpoint, dict(request.query_params)), media_type="application/json")
+
+        @app.get("/__stats")
+        async def stats():
+            return {"calls": dict(self.calls), "errors": dict(self.errors), "total": sum(self.calls.values())}
+
+        @app.post("/__reset")
+        async def reset():
+            self.calls.clear()
+            self.errors.clear()
+            return {"reset": True}
+
+        return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--seed", type=int, default=int(os.getenv("MOCK_SEED", "2024")))
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal spread of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction answered with 429")
+    parser.add_argument("--payload-dir", help="directory of recorded <endpoint>.json payloads to serve instead")
+    args = parser.parse_args()
+
+    import uvicorn
+    mock = MockFantasyNerds(args.seed, args.latency_ms, args.latency_sigma, args.error_rate,
+                            args.rate_limit_rate, args.payload_dir)
+    uvicorn.run(mock.create_app(), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Answers /v1/chat/completions with a canned completion after a configurable delay, as a
+single JSON body or as a server-sent event stream when the request sets "stream": true.
+Token usage is estimated from the prompt size so LLM metrics look plausible.
+
+Run:
+    python -m benchmarks.mock_openai --port 9002 --latency-ms 1500
+
+then point the API at it with GPT_API_URL=http://127.0.0.1:9002/v1/chat/completions
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+ANSWER = (
+    "Based on the Fantasy Nerds data provided, the top options this week are the players ranked "
+    "highest in the weekly rankings, adjusted for matchup and injury status. Monitor the injury "
+    "report before kickoff. Primary data sourced from Fantasy Nerds API: /nfl/weekly-rankings"
+)
+
+class MockOpenAI:
+    def __init__(self, seed: int = 2024, latency_ms: float = 1500.0, latency_sigma: float = 0.4,
+                 chunk_delay_ms: float = 20.0, error_rate: float = 0.0):
+        self.rng = random.Random(seed)
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.chunk_delay_ms = chunk_delay_ms
+        self.error_rate = error_rate
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    def latency(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        return self.latency_ms / 1000 * self.rng.lognormvariate(0, self.latency_sigma)
+
+    def create_app(self) -> FastAPI:
+        app = FastAPI(title="Mock OpenAI")
+
+        @app.post("/v1/chat/completions")
+        async def completions(request: Request):
+            body = await request.json()
+            self.calls += 1
+            prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+            self.prompt_tokens += prompt_tokens
+            completion_tokens = len(ANSWER) // 4
+            if self.rng.random() < self.error_rate:
+                await asyncio.sleep(self.latency() / 4)
+                return StreamingResponse(iter([b'{"error": {"message": "overloaded"}}']), status_code=503,
+                                         media_type="application/json")
+
+            created = int(time.time())
+            if body.get("stream"):
+                async def events():
+                    # Time to first token, then the answer word by word
+                    await asyncio.sleep(self.latency() / 3)
+                    for word in ANSWER.split(" "):
+                        chunk = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created,
+                                 "model": body.get("model"), "choices": [{"index": 0, "delta": {"content": word + " "}}]}
+                        yield f"data: {json.dumps(chunk)}\n\n"
+                        await asyncio.sleep(self.chunk_delay_ms / 1000)
+                    yield "data: [DONE]\n\n"
+                return StreamingResponse(events(), media_type="text/event-stream")
+
+            await asyncio.sleep(self.latency())
+            return {
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": created, "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            }
+
+        @app.get("/__stats")
+        async def stats():
+            return {"calls": self.calls, "prompt_tokens": self.prompt_tokens}
+
+        @app.post("/__reset")
+        async def reset():
+            self.calls = 0
+            self.prompt_tokens = 0
+            return {"reset": True}
+
+        return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9002)
+    parser.add_argument("--seed", type=int, default=int(os.getenv("MOCK_SEED", "2024")))
+    parser.add_argument("--latency-ms", type=float, default=1500.0, help="median completion latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.4)
+    parser.add_argument("--chunk-delay-ms", type=float, default=20.0, help="delay between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import uvicorn
+    mock = MockOpenAI(args.seed, args.latency_ms, args.latency_sigma, args.chunk_delay_ms, args.error_rate)
+    uvicorn.run(mock.create_app(), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Synthetic Fantasy Nerds payloads at realistic scale for benchmarks and local stand-ins.
+
+Every payload is generated from a fixed seed, so two runs with the same seed serve
+byte-identical data. Shapes follow the upstream responses the service code reads (the
+schedule's games with home and away teams, standings by conference and division, injury
+reports by team), so summarization and filtering take the same paths they do against real
+data; sizes are in line with a full season (~2,500 rostered players, 272 games, weekly
+injury reports).
+"""
+import random
+import datetime
+from typing import Any, Dict, List
+
+TEAMS = [
+    ("ARI", "Arizona Cardinals"), ("ATL", "Atlanta Falcons"), ("BAL", "Baltimore Ravens"),
+    ("BUF", "Buffalo Bills"), ("CAR", "Carolina Panthers"), ("CHI", "Chicago Bears"),
+    ("CIN", "Cincinnati Bengals"), ("CLE", "Cleveland Browns"), ("DAL", "Dallas Cowboys"),
+    ("DEN", "Denver Broncos"), ("DET", "Detroit Lions"), ("GB", "Green Bay Packers"),
+    ("HOU", "Houston Texans"), ("IND", "Indianapolis Colts"), ("JAX", "Jacksonville Jaguars"),
+    ("KC", "Kansas City Chiefs"), ("LV", "Las Vegas Raiders"), ("LAC", "Los Angeles Chargers"),
+    ("LA", "Los Angeles Rams"), ("MIA", "Miami Dolphins"), ("MIN", "Minnesota Vikings"),
+    ("NE", "New England Patriots"), ("NO", "New Orleans Saints"), ("NYG", "New York Giants"),
+    ("NYJ", "New York Jets"), ("PHI", "Philadelphia Eagles"), ("PIT", "Pittsburgh Steelers"),
+    ("SEA", "Seattle Seahawks"), ("SF", "San Francisco 49ers"), ("TB", "Tampa Bay Buccaneers"),
+    ("TEN", "Tennessee Titans"), ("WAS", "Washington Commanders"),
+]
+
+# Roster slots per team; skill positions first so rankings draw from them
+ROSTER = {"QB": 3, "RB": 5, "WR": 7, "TE": 4, "K": 1, "DL": 10, "LB": 8, "DB": 10, "OL": 10, "P": 1, "LS": 1}
+SKILL_POSITIONS = ["QB", "RB", "WR", "TE", "K"]
+IDP_POSITIONS = ["DL", "LB", "DB"]
+
+FIRST_NAMES = ["Josh", "Patrick", "Justin", "Lamar", "Joe", "Jalen", "Christian", "Tyreek", "Travis",
+               "Derrick", "Saquon", "Davante", "Stefon", "Mark", "George", "Aaron", "Dak", "Trevor",
+               "Austin", "Cooper", "Deebo", "Amon", "Garrett", "Breece", "Bijan", "Puka", "Nico"]
+LAST_NAMES = ["Allen", "Mahomes", "Jefferson", "Jackson", "Burrow", "Hurts", "McCaffrey", "Hill",
+              "Kelce", "Henry", "Barkley", "Adams", "Diggs", "Andrews", "Kittle", "Rodgers", "Prescott",
+              "Lawrence", "Ekeler", "Kupp", "Samuel", "Brown", "Wilson", "Hall", "Robinson", "Nacua",
+              "Collins", "Smith", "Johnson", "Williams", "Davis", "Moore", "Taylor", "Thomas"]
+
+TEAM_NAMES = dict(TEAMS)
+CONFERENCES = [("AFC", "American Football Conference"), ("NFC", "National Football Conference")]
+DIVISIONS = ["East", "North", "South", "West"]
+
+INJURIES = ["Hamstring", "Ankle", "Knee", "Concussion", "Shoulder", "Groin", "Back", "Calf", "Foot", "Hip"]
+GAME_STATUSES = ["Questionable", "Doubtful", "Out", "Injured Reserve", "Probable"]
+
+class PayloadFactory:
+    """Builds one deterministic set of payloads for every Fantasy Nerds endpoint"""
+
+    def __init__(self, seed: int = 2024, season: int = 2024, week: int = 6):
+        self.seed = seed
+        self.season = season
+        self.week = week
+        self.rng = random.Random(seed)
+        self.players = self._roster()
+        self.skill_players = [p for p in self.players if p["position"] in SKILL_POSITIONS]
+        self.idp_players = [p for p in self.players if p["position"] in IDP_POSITIONS]
+
+    def _roster(self) -> List[Dict[str, Any]]:
+        players = []
+        player_id = 1000
+        for team, _ in TEAMS:
+            for position, count in ROSTER.items():
+                for depth in range(1, count + 1):
+                    player_id += 1
+                    players.append({
+                        "playerId": player_id,
+                        "name": f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                        "team": team,
+                        "position": position,
+                        "depth": depth,
+                        "jersey": str(self.rng.randint(1, 99)),
+                        "height": f"{self.rng.randint(5, 6)}-{self.rng.randint(0, 11)}",
+                        "weight": str(self.rng.randint(170, 330)),
+                        "dob": f"{self.rng.randint(1988, 2002)}-{self.rng.randint(1, 12):02d}-{self.rng.randint(1, 28):02d}",
+                        "college": f"State University {self.rng.randint(1, 120)}",
+                        "active": "1" if self.rng.random() > 0.08 else "0",
+                    })
+        return players
+
+    def _points(self, player: Dict[str, Any]) -> Dict[str, float]:
+        base = {"QB": 18, "RB": 11, "WR": 10, "TE": 7, "K": 8}.get(player["position"], 4)
+        standard = round(max(0.0, self.rng.gauss(base / player["depth"], 3)), 2)
+        receptions = self.rng.uniform(0, 7) if player["position"] in ("RB", "WR", "TE") else 0
+        return {
+            "standard_points": standard,
+            "ppr_points": round(standard + receptions, 2),
+            "half_ppr_points": round(standard + receptions / 2, 2),
+        }
+
+    def _ranked(self, players: List[Dict[str, Any]], extra=None) -> List[Dict[str, Any]]:
+        rows = []
+        for player in players:
+            row = {key: player[key] for key in ("playerId", "name", "team", "position")}
+            row.update(self._points(player))
+            if extra:
+                row.update(extra(player))
+            rows.append(row)
+        rows.sort(key=lambda row: row["standard_points"], reverse=True)
+        for rank, row in enumerate(rows, 1):
+            row["rank"] = rank
+        return rows
+
+    def _bye_week(self, team: str) -> int:
+        return 5 + sum(map(ord, team)) % 10
+
+    def teams(self):
+        return [{
+            "team_code": code, "team_name": name,
+            "logo_small": f"https://cdn.example.com/{code}-s.png",
+            "logo_medium": f"https://cdn.example.com/{code}-m.png",
+            "logo_standard": f"https://cdn.example.com/{code}.png",
+            "logo_helmet": f"https://cdn.example.com/{code}-h.png",
+        } for code, name in TEAMS]
+
+    def schedule(self):
+        games = []
+        kickoff = datetime.datetime(self.season, 9, 5, 20, 20)
+        codes = [code for code, _ in TEAMS]
+        game_id = 8000
+        for week in range(1, 19):
+            week_start = kickoff + datetime.timedelta(days=7 * (week - 1))
+            playing = [code for code in codes if self._bye_week(code) != week]
+            self.rng.shuffle(playing)
+            for index in range(0, len(playing) - 1, 2):
+                game_id += 1
+                if index == 0:
+                    start = week_start  # Thursday night
+                elif index >= len(playing) - 2:
+                    start = week_start + datetime.timedelta(days=4)  # Monday night
+                else:
+                    start = (week_start + datetime.timedelta(days=3)).replace(
+                        hour=self.rng.choice([13, 13, 13, 16, 16, 20]), minute=self.rng.choice([0, 5, 25, 20])
+                    )
+                home, away = playing[index + 1], playing[index]
+                games.append({
+                    "id": f"game-{game_id}", "week": week,
+                    "status": "closed" if week < self.week else "scheduled",
+                    "scheduled": start.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "home": {"name": TEAM_NAMES[home], "alias": home},
+                    "away": {"name": TEAM_NAMES[away], "alias": away},
+                    "broadcast": {"network": self.rng.choice(["CBS", "FOX", "NBC", "ESPN", "Prime Video"])},
+                })
+        return {"year": self.season, "type": "REG", "games": games}
+
+    def standings(self):
+        conferences = []
+        for conference_index, (alias, name) in enumerate(CONFERENCES):
+            divisions = []
+            for division_index, division in enumerate(DIVISIONS):
+                teams = []
+                for index, (code, team_name) in enumerate(TEAMS):
+                    if index % 2 != conference_index or index // 2 % 4 != division_index:
+                        continue
+                    wins = self.rng.randint(0, self.week)
+                    teams.append({
+                        "name": team_name, "alias": code,
+                        "wins": wins, "losses": self.week - wins, "ties": 0,
+                        "win_pct": round(wins / self.week, 3) if self.week else 0.0,
+                        "points_for": self.rng.randint(60, 200), "points_against": self.rng.randint(60, 200),
+                    })
+                teams.sort(key=lambda team: team["wins"], reverse=True)
+                divisions.append({"name": f"{alias} {division}", "alias": f"{alias}_{division.upper()}", "teams": teams})
+            conferences.append({"name": name, "alias": alias, "divisions": divisions})
+        return {"season": {"year": self.season, "type": "REG"}, "conferences": conferences}
+
+    def injuries(self, week: int = None):
+        teams = []
+        for code, name in TEAMS:
+            roster = [p for p in self.players if p["team"] == code]
+            teams.append({"name": name, "alias": code, "players": [{
+                "playerId": player["playerId"], "name": player["name"], "team": code,
+                "position": player["position"], "injury": self.rng.choice(INJURIES),
+                "status": self.rng.choice(GAME_STATUSES),
+                "notes": "Limited participation in practice on Wednesday.",
+                "last_update": f"{self.season}-10-{self.rng.randint(1, 28):02d}",
+            } for player in self.rng.sample(roster, self.rng.randint(6, 16))]})
+        return {"season": self.season, "week": week or self.week, "teams": teams}
+
+    def draft_rankings(self, format="std"):
+        return {"season": self.season, "format": format, "players": self._ranked(
+            self.skill_players[:400],
+            lambda p: {"bye_week": self._bye_week(p["team"]), "injury_risk": self.rng.choice(["Low", "Medium", "High"])},
+        )}
+
+    def tiers(self, format="std"):
+        ranked = self._ranked(self.skill_players[:300])
+        tiers = {}
+        for position in SKILL_POSITIONS:
+            rows = [row for row in ranked if row["position"] == position]
+            tiers[position] = [dict(row, tier=index // 6 + 1) for index, row in enumerate(rows)]
+        return {"season": self.season, "format": format, "tiers": tiers}
+
+    def auction(self, teams=12, budget=200, format="std"):
+        def price(_):
+            average = round(self.rng.uniform(1, 70) * int(budget) / 200, 1)
+            return {"min_price": max(1, average - 8), "max_price": average + 8, "avg_price": average}
+        return {"season": self.season, "format": format, "teams": int(teams), "budget": int(budget),
+                "players": self._ranked(self.skill_players[:300], price)}
+
+    def adp(self, teams=12, format="std"):
+        return {"season": self.season, "format": format, "teams": int(teams), "players": self._ranked(
+            self.skill_players[:300],
+            lambda p: {"adp": round(self.rng.uniform(1, 240), 1), "times_drafted": self.rng.randint(50, 5000)},
+        )}
+
+    def season_players(self, players=None):
+        return {"season": self.season, "players": self._ranked(players or self.skill_players[:500])}
+
+    def byes(self):
+        byes = {}
+        for code, _ in TEAMS:
+            byes.setdefault(str(self._bye_week(code)), []).append(code)
+        return {"season": self.season, "teams": byes}
+
+    def dfs_slates(self):
+        return {"season": self.season, "week": self.week, "slates": [
+            {"slateId": f"{self.season}{self.week:02d}{index}", "platform": platform,
+             "games": self.rng.randint(2, 14), "start": f"{self.season}-10-13 13:00:00"}
+            for index, platform in enumerate(["draftkings", "fanduel", "yahoo"])
+        ]}
+
+    def dfs(self, slateId="1"):
+        return {"slateId": slateId, "players": self._ranked(
+            self.skill_players, lambda p: {"salary": self.rng.randint(3000, 9500), "bang_for_buck": round(self.rng.uniform(0, 5), 2)}
+        )}
+
+    def depth(self):
+        charts = {}
+        for player in self.players:
+            charts.setdefault(player["team"], {}).setdefault(player["position"], []).append(
+                {"playerId": player["playerId"], "name": player["name"], "depth": player["depth"]}
+            )
+        return {"season": self.season, "charts": charts}
+
+    def weekly_projections(self):
+        return {"season": self.season, "week": self.week, "players": self._ranked(self.skill_players)}
+
+    def weekly_rankings(self, format="std"):
+        return {"season": self.season, "week": self.week, "format": format, "players": self._ranked(
+            self.skill_players[:350], lambda p: {"bye_week": self._bye_week(p["team"])}
+        )}
+
+    def news(self):
+        return [{
+            "article_headline": f"{player['name']} {self.rng.choice(['limited', 'expected to start', 'ruled out', 'returns'])}",
+            "article_date": f"{self.season}-10-{self.rng.randint(1, 28):02d} {self.rng.randint(0, 23):02d}:00:00",
+            "article_author": self.rng.choice(["Staff", "Rotowire", "Beat Writer"]),
+            "article_excerpt": "Coach said in his Wednesday press conference that the team would evaluate him "
+                               "through the week before making a decision on his availability for Sunday.",
+            "article_link": f"https://news.example.com/{self.season}/{player['playerId']}-{index}",
+            "playerIds": [player["playerId"]],
+            "teams": [player["team"]],
+        } for index, player in enumerate(self.rng.sample(self.skill_players, 100))]
+
+    def nfl_picks(self):
+        games = [g for g in self.schedule()["games"] if g["week"] == self.week]
+        return {"season": self.season, "week": self.week, "games": [dict(
+            game, picks={f"expert_{n}": self.rng.choice([game["home"]["alias"], game["away"]["alias"]]) for n in range(12)}
+        ) for game in games]}
+
+    def leaders(self, format="std", position="ALL", week=0):
+        players = self.skill_players if position in ("ALL", None) else [
+            p for p in self.players if p["position"] == position or (position == "FLEX" and p["position"] in ("RB", "WR", "TE"))
+        ]
+        return {"season": self.season, "week": int(week), "format": format, "position": position,
+                "players": self._ranked(players[:300])}
+
+    def roster(self, include_inactive=0):
+        players = self.players if str(include_inactive) == "1" else [p for p in self.players if p["active"] == "1"]
+        return {"players": players}
+
+    def add_drops(self):
+        def moves():
+            return [{"playerId": p["playerId"], "name": p["name"], "team": p["team"], "position": p["position"],
+                     "percent": round(self.rng.uniform(0.5, 40), 1)} for p in self.rng.sample(self.skill_players, 50)]
+        return {"adds": moves(), "drops": moves()}
+
+    def playoffs(self, week=1):
+        return {"season": self.season, "week": int(week), "players": self._ranked(self.skill_players[:200])}
+
+    def weather(self):
+        games = [g for g in self.schedule()["games"] if g["week"] == self.week]
+        return {"season": self.season, "week": self.week, "games": [dict(
+            game, forecast=self.rng.choice(["Sunny", "Cloudy", "Rain", "Snow", "Dome"]),
+            temperature=self.rng.randint(20, 95), wind_speed=self.rng.randint(0, 25)
+        ) for game in games]}
+
+    def build(self, endpoint: str, params: Dict[str, Any] = None) -> Any:
+        """Generate the payload for a Fantasy Nerds endpoint and its query parameters"""
+        params = {k: v for k, v in (params or {}).items() if k != "apikey"}
+        # Reseed per request shape so the same request always yields the same payload
+        self.rng = random.Random(f"{self.seed}:{endpoint}:{sorted(params.items())}")
+        builders = {
+            "teams": self.teams,
+            "schedule": self.schedule,
+            "standings": self.standings,
+            "injuries": lambda: self.injuries(int(params.get("week", 0)) or None),
+            "draft-rankings": lambda: self.draft_rankings(params.get("format", "std")),
+            "tiers": lambda: self.tiers(params.get("format", "std")),
+            "auction": lambda: self.auction(params.get("teams", 12), params.get("budget", 200), params.get("format", "std")),
+            "adp": lambda: self.adp(params.get("teams", 12), params.get("format", "std")),
+            "bestball": self.season_players,
+            "byes": self.byes,
+            "dfs": lambda: self.dfs(params.get("slateId", "1")),
+            "dfs-slates": self.dfs_slates,
+            "defense-rankings": lambda: self.season_players([p for p in self.players if p["position"] == "DB"][:32]),
+            "depth": self.depth,
+            "weekly-projections": self.weekly_projections,
+            "weekly-rankings": lambda: self.weekly_rankings(params.get("format", "std")),
+            "dynasty": self.season_players,
+            "news": self.news,
+            "idp-draft": lambda: self.season_players(self.idp_players[:300]),
+            "idp-weekly": lambda: self.season_players(self.idp_players),
+            "nfl-picks": self.nfl_picks,
+            "leaders": lambda: self.leaders(params.get("format", "std"), params.get("position", "ALL"), params.get("week", 0)),
+            "players": lambda: self.roster(params.get("include_inactive", 0)),
+            "add-drops": self.add_drops,
+            "playoffs": lambda: self.playoffs(params.get("week", 1)),
+            "weather": self.weather,
+            "draft-projections": self.season_players,
+            "ros": lambda: self.season_players(self.skill_players + self.idp_players),
+        }
+        if endpoint not in builders:
+            raise KeyError(endpoint)
+        return builders[endpoint]()
+
+ENDPOINTS = [
+    "teams", "schedule", "standings", "injuries", "draft-rankings", "tiers", "auction", "adp", "bestball",
+    "byes", "dfs", "dfs-slates", "defense-rankings", "depth", "weekly-projections", "weekly-rankings",
+    "dynasty", "news", "idp-draft", "idp-weekly", "nfl-picks", "leaders", "players", "add-drops",
+    "playoffs", "weather", "draft-projections", "ros",
+]
@@ -1,7 +1,28 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from App.api.api_routes import router as api_router
+from contextlib import asynccontextmanager
+from App.api.api_routes import router as api_router, start_prefetcher
+from App.services.popularity import prefetcher
+from App.services.Nfl_query_service import nfl_query_service
+from App.services.answer_cache import answer_cache
+from App.services.query_jobs import query_jobs
 from App.core.config import settings
+import time
+import functools
+from App.core.request_context import response_headers, request_deadline, DEADLINE_HEADER
+from App.services.rate_limiter import upstream_priority, PRIORITY_HEADER, LOWER_PRIORITIES
+from App.core.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, render_metrics, METRICS_CONTENT_TYPE
+
+# Background work that runs for the lifetime of the app
+@asynccontextmanager
+async def lifespan(app):
+    start_prefetcher()
+    nfl_query_service.start_precompute()
+    query_jobs.start(functools.partial(nfl_query_service.process_query, raise_errors=True), nfl_query_service.process_batch)
+    yield
+    prefetcher.stop()
+    answer_cache.stop()
+    await query_jobs.stop()
 
 # Create FastAPI app
 app = FastAPI(
@@ -10,6 +31,7 @@ app = FastAPI(
     version=settings.API_VERSION,
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -21,6 +43,52 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Set up per-request context: the caller's deadline, a lowered upstream priority for our own
+# background calls, and headers that services set while handling the request (e.g. stale-data markers)
+@app.middleware("http")
+async def apply_request_context(request, call_next):
+    headers = {}
+    token = response_headers.set(headers)
+    deadline_token = None
+    try:
+        budget = float(request.headers.get(DEADLINE_HEADER, ""))
+    except ValueError:
+        budget = None
+    if budget is not None and budget > 0:
+        deadline_token = request_deadline.set(time.monotonic() + budget)
+    # Only ever lowers the priority, so clients can't claim more than a normal request gets
+    priority_token = None
+    priority = request.headers.get(PRIORITY_HEADER)
+    if priority in LOWER_PRIORITIES:
+        priority_token = upstream_priority.set(priority)
+    try:
+        response = await call_next(request)
+    finally:
+        response_headers.reset(token)
+        if deadline_token is not None:
+            request_deadline.reset(deadline_token)
+        if priority_token is not None:
+            upstream_priority.reset(priority_token)
+    response.headers.update(headers)
+    return response
+
+# Record latency per route template and the number of requests in flight
+@app.middleware("http")
+async def record_request_metrics(request, call_next):
+    started = time.perf_counter()
+    status = 500
+    REQUESTS_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            route.path if route else "unmatched", request.method, str(status)
+        ).observe(time.perf_counter() - started)
+
 # Include API router
 app.include_router(api_router)
 
@@ -38,13 +106,19 @@ async def root():
 async def health_check():
     return {"status": "ok"}
 
+# Prometheus metrics
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     from fastapi.responses import JSONResponse
     return JSONResponse(
         status_code=exc.status_code,
-        content={"detail": exc.detail}
+        content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None)
     )
 
 if __name__ == "__main__":
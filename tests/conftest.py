@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# App.core.config requires an API key at import time; the tests never call upstream
+os.environ.setdefault("FANTASY_NERDS_API_KEY", "test-key")
+# Keep shared state files of the module-level singletons away from a running server's
+os.environ.setdefault("FN_RATE_LIMIT_STATE_FILE", os.path.join(tempfile.mkdtemp(), "ratelimit.bin"))
+os.environ.setdefault("CLUSTER_DIR", tempfile.mkdtemp())
+os.environ.setdefault("QUERY_JOB_DIR", tempfile.mkdtemp())
+os.environ.setdefault("SNAPSHOT_DIR", tempfile.mkdtemp())
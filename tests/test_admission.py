@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from App.services.admission import AdmissionController, Overloaded
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+async def settle():
+    """Let every ready task run until it blocks again"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+async def occupy(controller, slots, release, started=None):
+    async with controller.admit(slots):
+        if started is not None:
+            started.append(slots)
+        await release.wait()
+
+def test_callers_run_up_to_the_concurrency_limit_then_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=2, max_queue=10, target_wait=60)
+        release, started = asyncio.Event(), []
+        tasks = [asyncio.ensure_future(occupy(controller, 1, release, started)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert started == [1, 1]
+        assert (controller.running, controller.waiting, controller.available) == (2, 1, 0)
+        release.set()
+        await asyncio.gather(*tasks)
+        assert started == [1, 1, 1]
+        assert (controller.running, controller.waiting, controller.available) == (0, 0, 2)
+    run(scenario())
+
+def test_waiters_are_admitted_in_arrival_order():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=4, max_queue=10, target_wait=60)
+        order = []
+
+        async def work(name, slots):
+            async with controller.admit(slots):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        tasks = [asyncio.ensure_future(work("single", 2))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(work("batch", 4)))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(work("late single", 1)))  # fits, but must not overtake the batch
+        await asyncio.gather(*tasks)
+        assert order == ["single", "batch", "late single"]
+    run(scenario())
+
+def test_slots_are_capped_at_the_concurrency_limit():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=2, max_queue=10, target_wait=60)
+        async with controller.admit(8):
+            assert controller.running == 2
+        assert controller.available == 2
+    run(scenario())
+
+def test_long_estimated_wait_is_rejected_with_retry_after():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=10, target_wait=5)
+        controller.average_run_time = 8
+        release = asyncio.Event()
+        holder = asyncio.ensure_future(occupy(controller, 1, release))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as error:
+            async with controller.admit():
+                pass
+        assert error.value.status_code == 503
+        assert error.value.headers["Retry-After"] == "8"
+        release.set()
+        await holder
+    run(scenario())
+
+def test_full_queue_is_rejected():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, target_wait=60)
+        release = asyncio.Event()
+        tasks = [asyncio.ensure_future(occupy(controller, 1, release)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            async with controller.admit():
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+    run(scenario())
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=2, max_queue=10, target_wait=60)
+        release, started = asyncio.Event(), []
+        holder = asyncio.ensure_future(occupy(controller, 1, release))
+        await asyncio.sleep(0)
+        batch = asyncio.ensure_future(occupy(controller, 2, release, started))
+        await asyncio.sleep(0)
+        behind = asyncio.ensure_future(occupy(controller, 1, asyncio.Event(), started))
+        await asyncio.sleep(0)
+        assert started == []  # queued behind the batch
+        batch.cancel()
+        await settle()
+        assert started == [1]
+        assert controller.waiting == 0 and not controller.waiters
+        behind.cancel()
+        release.set()
+        await asyncio.gather(holder, batch, behind, return_exceptions=True)
+        assert controller.available == 2
+    run(scenario())
@@ -0,0 +1,80 @@
+import asyncio
+import time
+import pytest
+from App.core.config import settings
+from App.services.answer_cache import AnswerCache, normalize_query, context_digest
+from App.services.LLm_service import llm_usage
+
+QUERY = "Who are the top quarterbacks?"
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_PRECOMPUTE_TOP_N", 2)
+    monkeypatch.setattr(settings, "QUERY_PRECOMPUTE_MIN_SCORE", 2)
+    monkeypatch.setattr(settings, "QUERY_PRECOMPUTE_TOKEN_BUDGET", 250)
+    cache = AnswerCache()
+    cache.context = {"players": ["QB One"]}
+    cache.answers_made = []
+
+    async def fetch_context(query):
+        return "player_stats", dict(cache.context)
+
+    async def answer(query, query_type, context_data):
+        llm_usage.get()["tokens"] += 100
+        cache.answers_made.append(context_data)
+        return {"query": query, "answer": f"answer from {context_data['players']}"}
+
+    cache.fetch_context = fetch_context
+    cache.answer = answer
+    return cache
+
+def ask(cache, query, times=1):
+    for _ in range(times):
+        cache.record(normalize_query(query), query)
+
+def test_rephrasings_of_a_question_match():
+    assert normalize_query("Who are the TOP quarterbacks?!") == normalize_query("who are  the top quarterbacks")
+    assert context_digest({"a": 1, "b": 2}) == context_digest({"b": 2, "a": 1})
+
+def test_questions_are_ranked_once_per_interval(cache, monkeypatch):
+    rankings = []
+    top = cache.tracker.top
+    monkeypatch.setattr(cache.tracker, "top", lambda k: rankings.append(k) or top(k))
+    ask(cache, QUERY, times=3)
+    ask(cache, "Who is injured?")
+    assert cache.is_popular(normalize_query(QUERY))
+    assert not cache.is_popular(normalize_query("Who is injured?"))  # below the minimum score
+    ask(cache, "Who is injured?", times=5)
+    assert not cache.is_popular(normalize_query("Who is injured?"))  # not ranked again yet
+    assert rankings == [2]
+    cache.ranked_at -= settings.QUERY_PRECOMPUTE_INTERVAL
+    assert cache.is_popular(normalize_query("Who is injured?"))
+    assert len(rankings) == 2
+
+def test_unchanged_data_renews_the_answer_without_the_llm(cache):
+    normalized = normalize_query(QUERY)
+    asyncio.run(cache._regenerate(normalized, QUERY))
+    assert cache.get(normalized)["answer"] == "answer from ['QB One']"
+    cache.answers[normalized].answered_at -= settings.QUERY_ANSWER_TTL
+    assert cache.get(normalized) is None
+
+    asyncio.run(cache._regenerate(normalized, QUERY))
+    assert len(cache.answers_made) == 1
+    assert cache.get(normalized) is not None
+
+    cache.context = {"players": ["QB Two"]}
+    asyncio.run(cache._regenerate(normalized, QUERY))
+    assert len(cache.answers_made) == 2
+    assert cache.get(normalized)["answer"] == "answer from ['QB Two']"
+
+def test_regeneration_stops_at_the_hourly_token_budget(cache):
+    for players in (["A"], ["B"], ["C"], ["D"]):
+        cache.context = {"players": players}
+        asyncio.run(cache._regenerate("q", QUERY))
+    assert len(cache.answers_made) == 3  # 200 of 250 spent before the third, 300 before the fourth
+    assert cache.tokens_spent() == 300
+    assert cache.get("q")["answer"] == "answer from ['C']"
+
+    cache.spent[0] = (time.time() - 3601, 100)  # an hour on, that regeneration no longer counts
+    asyncio.run(cache._regenerate("q", QUERY))
+    assert len(cache.answers_made) == 4
@@ -0,0 +1,76 @@
+from typing import Optional
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from App.api import api_routes
+from App.api.api_routes import _batch_routes, _bind_route_params, _coerce_param
+from App.services import nfl_service
+
+def test_route_table_is_built_once():
+    routes = _batch_routes()
+    assert routes is _batch_routes()
+    assert routes["adp"] is api_routes.get_adp
+    assert routes["injuries"] is api_routes.get_weekly_injuries
+    assert not any("{" in name for name in routes)  # path parameters can't be given in a batch
+
+def test_missing_parameters_take_the_route_defaults():
+    # as_of and week are added by with_cache for snapshot lookups
+    assert _bind_route_params(api_routes.get_adp, {}) == {"teams": 12, "format": "std", "as_of": None, "week": None}
+    assert _bind_route_params(api_routes.get_weekly_injuries, {"week": "3"}) == {"season": None, "week": 3, "as_of": None}
+
+def test_values_are_coerced_to_the_declared_types():
+    kwargs = _bind_route_params(api_routes.get_adp, {"teams": "10", "format": "ppr"})
+    assert (kwargs["teams"], kwargs["format"]) == (10, "ppr")
+    assert _coerce_param(None, Optional[int]) is None
+    assert _coerce_param("yes", bool) is True
+    assert _coerce_param("0", bool) is False
+    assert _coerce_param([1, 2], list) == [1, 2]
+
+@pytest.mark.parametrize("params, detail", [
+    ({"teamz": 10}, "Unknown parameter(s): teamz"),
+    ({"teams": "ten"}, "Invalid value for parameter 'teams'"),
+])
+def test_bad_parameters_are_422(params, detail):
+    with pytest.raises(HTTPException) as error:
+        _bind_route_params(api_routes.get_adp, params)
+    assert error.value.status_code == 422
+    assert error.value.detail == detail
+
+def test_required_parameters_must_be_given():
+    async def handler(player_id: str, week: int = 1):
+        pass
+
+    with pytest.raises(HTTPException) as error:
+        _bind_route_params(handler, {"week": 2})
+    assert error.value.detail == "Missing required parameter: player_id"
+
+def test_batch_items_share_cache_entries_with_the_routes(monkeypatch):
+    import main
+    requested = []
+
+    def respond(request):
+        requested.append(dict(request.url.params))
+        return httpx.Response(200, json={"players": [], "teams": request.url.params["teams"]})
+
+    real_client = httpx.AsyncClient
+
+    class Client(real_client):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = httpx.MockTransport(respond)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(nfl_service.httpx, "AsyncClient", Client)
+    client = TestClient(main.app)
+    assert client.get("/nfl/adp", params={"teams": 14, "format": "half"}).status_code == 200
+
+    response = client.post("/nfl/batch", json={"requests": [
+        {"resource": "adp", "params": {"format": "half", "teams": "14"}},
+        {"resource": "/nfl/adp", "params": {"teams": 14, "format": "half"}},
+        {"resource": "adp", "params": {"teams": "many"}},
+        {"resource": "nope"},
+    ]})
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == [200, 200, 422, 404]
+    assert results[0]["data"] == results[1]["data"] == {"players": [], "teams": "14"}
+    assert len(requested) == 1  # both batch items were served from the route's cache entry
@@ -0,0 +1,86 @@
+import time
+import asyncio
+import gzip
+import json
+import httpx
+import pytest
+from fastapi import HTTPException
+from App.core.config import settings
+from App.services import nfl_service
+from App.services.cassette import CassetteStore
+from App.services.nfl_service import NFLService
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = CassetteStore(str(tmp_path))
+    monkeypatch.setattr(nfl_service, "cassette_store", store)
+    return store
+
+def use_upstream(monkeypatch, respond):
+    real_client = httpx.AsyncClient
+
+    class Client(real_client):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = httpx.MockTransport(respond)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(nfl_service.httpx, "AsyncClient", Client)
+
+def get(endpoint, params=None):
+    return asyncio.run(NFLService().get_data(endpoint, params))
+
+def test_recordings_are_keyed_without_the_api_key(store):
+    assert store.path("adp", {"teams": 12, "apikey": "a"}) == store.path("adp", {"teams": "12", "apikey": "b"})
+    assert store.path("adp", {"teams": 12}) != store.path("adp", {"teams": 10})
+    store.save("adp", {"teams": 12, "apikey": "secret"}, 200, b'{"ok": true}', 0.25)
+    with open(store.path("adp", {"teams": 12}), "rb") as f:
+        recording = json.loads(gzip.decompress(f.read()))
+    assert recording["params"] == {"teams": 12}
+    assert "secret" not in json.dumps(recording)
+    assert store.load("adp", {"teams": 10}) is None
+
+def test_recorded_responses_replay_without_the_network(monkeypatch, store):
+    monkeypatch.setattr(settings, "UPSTREAM_MODE", "record")
+    use_upstream(monkeypatch, lambda request: httpx.Response(200, json={"week": request.url.params["week"]}))
+    assert get("cassette-round-trip", {"week": 3}) == {"week": "3"}
+    recording = store.load("cassette-round-trip", {"week": 3})
+    assert recording["status"] == 200 and recording["elapsed"] >= 0
+
+    def offline(request):
+        raise AssertionError("replay mode must not call upstream")
+
+    use_upstream(monkeypatch, offline)
+    monkeypatch.setattr(settings, "UPSTREAM_MODE", "replay")
+    assert get("cassette-round-trip", {"week": 3}) == {"week": "3"}
+
+def test_recorded_errors_replay_with_their_status(monkeypatch, store):
+    monkeypatch.setattr(settings, "UPSTREAM_MODE", "record")
+    use_upstream(monkeypatch, lambda request: httpx.Response(404, json={"error": "no such week"}))
+    with pytest.raises(HTTPException) as recorded:
+        get("cassette-missing", {"week": 30})
+    assert recorded.value.status_code == 404
+    assert store.load("cassette-missing", {"week": 30})["status"] == 404
+
+    monkeypatch.setattr(settings, "UPSTREAM_MODE", "replay")
+    with pytest.raises(HTTPException) as replayed:
+        get("cassette-missing", {"week": 30})
+    assert replayed.value.status_code == 404
+
+def test_unrecorded_request_is_503_in_replay_mode(monkeypatch, store):
+    monkeypatch.setattr(settings, "UPSTREAM_MODE", "replay")
+    with pytest.raises(HTTPException) as error:
+        get("cassette-unrecorded", {"week": 1})
+    assert error.value.status_code == 503
+    assert "No recorded response" in error.value.detail
+
+def test_replayed_latency_respects_the_deadline(monkeypatch, store):
+    store.save("cassette-slow", {}, 200, b"[]", 5.0)
+    monkeypatch.setattr(settings, "UPSTREAM_MODE", "replay")
+    monkeypatch.setattr(settings, "REPLAY_SIMULATE_LATENCY", True)
+
+    async def call():
+        return await NFLService().get_data("cassette-slow", deadline=time.monotonic() + 0.05)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(call())
+    assert error.value.status_code == 408
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import httpx
+from App.services import nfl_service
+from App.services.change_feed import ChangeFeed, _index_news
+from App.services.nfl_service import NFLService, refresh_listeners_idle
+
+def news(*articles):
+    return [{"article_link": link, "article_headline": headline} for link, headline in articles]
+
+def feed(max_versions=10):
+    return ChangeFeed("news", _index_news, max_versions)
+
+def test_first_payload_is_the_baseline():
+    changes = feed()
+    assert changes.changes_since(0)["reset"]
+    changes.update(news(("a", "A")))
+    baseline = changes.version
+    result = changes.changes_since(baseline)
+    assert not result["reset"] and result["changes"] == []
+    assert changes.changes_since(0)["reset"]
+
+def test_refresh_is_diffed_by_key():
+    changes = feed()
+    changes.update(news(("a", "A"), ("b", "B")))
+    baseline = changes.version
+    changes.update(news(("a", "A"), ("b", "B"), ("c", "C")))  # c added
+    changes.update(news(("a", "A2"), ("c", "C")))  # a changed, b removed
+    changes.update(news(("a", "A2"), ("c", "C")))  # no change, no version
+    assert changes.version == baseline + 2
+
+    result = changes.changes_since(baseline)
+    assert not result["reset"]
+    first, second = result["changes"]
+    assert [item["key"] for item in first["added"]] == ["c"]
+    assert second["changed"] == [{"key": "a", "item": {"article_link": "a", "article_headline": "A2"}}]
+    assert second["removed"] == ["b"]
+    assert changes.changes_since(first["version"])["changes"] == [second]
+
+def test_consumer_behind_the_truncated_log_is_reset():
+    changes = feed(max_versions=2)
+    changes.update(news())
+    baseline = changes.version
+    for link in "abc":
+        changes.update(news((link, link)))
+    assert changes.changes_since(baseline)["reset"]  # the first version was dropped
+    kept = changes.changes_since(baseline + 1)
+    assert not kept["reset"]
+    assert [entry["version"] for entry in kept["changes"]] == [baseline + 2, baseline + 3]
+
+def test_versions_from_another_worker_or_the_future_are_reset():
+    ours, theirs = feed(), feed()
+    for changes in (ours, theirs):
+        changes.update(news(("a", "A")))
+        changes.update(news(("a", "A"), ("b", "B")))
+    assert ours.epoch != theirs.epoch
+    assert ours.changes_since(theirs.version - 1)["reset"]
+    assert ours.changes_since(ours.version + 1)["reset"]
+    assert ours.changes_since(-1)["reset"]
+    assert not ours.changes_since(ours.version - 1)["reset"]
+
+def test_listeners_get_the_items_of_removed_keys():
+    changes = feed()
+    seen = []
+    changes.listeners.append(lambda entry, removed_items: seen.append((entry["removed"], removed_items)))
+    changes.update(news(("a", "A")))
+    changes.update(news())
+    assert seen == [(["a"], {"a": {"article_link": "a", "article_headline": "A"}})]
+
+def use_upstream(monkeypatch, respond):
+    real_client = httpx.AsyncClient
+
+    class Client(real_client):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = httpx.MockTransport(respond)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(nfl_service.httpx, "AsyncClient", Client)
+
+def test_listeners_prepare_off_the_loop_and_apply_on_it(monkeypatch):
+    calls = []
+
+    def listener(endpoint, params, payload):
+        calls.append(("prepare", endpoint, params, payload.data, threading.current_thread().name))
+        return lambda: calls.append(("apply", threading.current_thread().name))
+
+    monkeypatch.setattr(nfl_service, "refresh_listeners", [listener])
+    use_upstream(monkeypatch, lambda request: httpx.Response(200, json={"week": 2}))
+
+    async def fetch():
+        data = await NFLService().get_data("listener-refresh", {"week": 2})
+        await refresh_listeners_idle()
+        return data
+
+    assert asyncio.run(fetch()) == {"week": 2}
+    loop_thread = threading.current_thread().name
+    assert calls[0][:4] == ("prepare", "listener-refresh", {"week": 2}, {"week": 2})
+    assert calls[0][4] != loop_thread
+    assert calls[1] == ("apply", loop_thread)
+
+def test_derived_variants_reach_the_listeners(monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(nfl_service, "refresh_listeners", [lambda endpoint, params, payload: refreshed.append(
+        (endpoint, params, payload.data))])
+    roster = [{"playerId": 1, "active": "1"}, {"playerId": 2, "active": "0"}]
+    use_upstream(monkeypatch, lambda request: httpx.Response(200, json=roster))
+
+    async def fetch():
+        data = await NFLService().get_data("players")
+        await refresh_listeners_idle()
+        return data
+
+    assert asyncio.run(fetch()) == roster[:1]
+    assert ("players", {"include_inactive": 1}, roster) in refreshed
+    assert ("players", {}, roster[:1]) in refreshed
@@ -0,0 +1,149 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import HTTPException
+from App.core.request_context import response_headers, STALE_AGE_HEADER
+from App.services import circuit_breaker, nfl_service
+from App.services.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from App.services.nfl_service import NFLService
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("news", failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 30
+
+def test_success_resets_the_failure_run(clock):
+    breaker = CircuitBreaker("news", failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+def test_half_open_lets_one_probe_through_then_closes(clock):
+    breaker = CircuitBreaker("news", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()  # one probe at a time
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+def test_failed_probe_reopens_for_another_timeout(clock):
+    breaker = CircuitBreaker("news", failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.retry_after() == 30
+    assert not breaker.allow_request()
+
+def test_released_probe_can_be_retried(clock):
+    breaker = CircuitBreaker("news", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.release_probe()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+
+def upstream(monkeypatch, respond):
+    """Route the service's upstream calls to respond(request) -> httpx.Response"""
+    real_client = httpx.AsyncClient
+
+    class Client(real_client):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = httpx.MockTransport(respond)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(nfl_service.httpx, "AsyncClient", Client)
+
+def install_breaker(monkeypatch, endpoint, clock):
+    breaker = CircuitBreaker(endpoint, failure_threshold=1, reset_timeout=30)
+    monkeypatch.setitem(circuit_breaker.breakers, endpoint, breaker)
+    return breaker
+
+async def fetch(endpoint):
+    """Call get_data as a request would, returning the data and the response headers set"""
+    headers = {}
+    token = response_headers.set(headers)
+    try:
+        return await NFLService().get_data(endpoint), headers
+    finally:
+        response_headers.reset(token)
+
+def test_open_circuit_serves_the_last_good_copy_marked_stale(monkeypatch, clock):
+    breaker = install_breaker(monkeypatch, "breaker-stale", clock)
+    status = {"code": 200}
+    upstream(monkeypatch, lambda request: httpx.Response(status["code"], json={"week": 1}))
+
+    data, headers = asyncio.run(fetch("breaker-stale"))
+    assert data == {"week": 1} and headers == {}
+
+    status["code"] = 500
+    monkeypatch.setattr(nfl_service.settings, "CLUSTER_SHARE_MAX_AGE", 0)  # don't reuse the copy just published
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(fetch("breaker-stale"))
+    assert error.value.status_code == 500
+    assert breaker.state == OPEN
+
+    data, headers = asyncio.run(fetch("breaker-stale"))
+    assert data == {"week": 1}
+    assert headers["Warning"] == '110 - "Response is Stale"'
+    assert STALE_AGE_HEADER in headers
+
+def test_open_circuit_without_a_copy_is_503_with_retry_after(monkeypatch, clock):
+    breaker = install_breaker(monkeypatch, "breaker-empty", clock)
+    breaker.record_failure()
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(fetch("breaker-empty"))
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == "30"
+
+def test_throttled_probe_leaves_the_circuit_half_open(monkeypatch, clock):
+    breaker = install_breaker(monkeypatch, "breaker-throttled", clock)
+    breaker.record_failure()
+    clock.now += 30
+    penalties = []
+
+    async def penalize(seconds):
+        penalties.append(seconds)
+
+    monkeypatch.setattr(nfl_service.fantasy_nerds_limiter, "penalize", penalize)
+    upstream(monkeypatch, lambda request: httpx.Response(429, headers={"Retry-After": "5"}))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(fetch("breaker-throttled"))
+    assert error.value.status_code == 429
+    assert penalties == [5.0]
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()  # the probe slot was released for the next caller
+
+def test_client_errors_close_a_half_open_circuit(monkeypatch, clock):
+    breaker = install_breaker(monkeypatch, "breaker-missing", clock)
+    breaker.record_failure()
+    clock.now += 30
+    upstream(monkeypatch, lambda request: httpx.Response(404))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(fetch("breaker-missing"))
+    assert error.value.status_code == 404
+    assert breaker.state == CLOSED
@@ -0,0 +1,111 @@
+import os
+import time
+import asyncio
+import pytest
+from App.core.config import settings
+from App.services import cluster as cluster_module
+from App.services.cluster import ClusterCoordinator, fcntl, matches
+from App.services.nfl_service import NFLService
+
+@pytest.fixture
+def workers(tmp_path):
+    return ClusterCoordinator(str(tmp_path)), ClusterCoordinator(str(tmp_path))
+
+def test_invalidations_reach_the_other_workers(workers):
+    ours, theirs = workers
+    ours.invalidate("get_adp", "*half*")  # before theirs started reading: doesn't apply to it
+    assert theirs._read_log() == []
+    ours.invalidate("get_news")
+    ours.invalidate(pattern="*week*")
+    entries = theirs._read_log()
+    assert [(entry["namespace"], entry["pattern"]) for entry in entries] == [("get_news", None), (None, "*week*")]
+    assert theirs._read_log() == []
+
+def test_no_invalidation_is_lost_to_a_log_rotation(workers, monkeypatch):
+    monkeypatch.setattr(cluster_module, "LOG_MAX_BYTES", 300)
+    ours, theirs = workers
+    ours.invalidate(pattern="*before*")
+    theirs._read_log()
+    seen = []
+    for n in range(10):
+        ours.invalidate(pattern=f"*{n}*")
+        if n % 3 == 2:
+            seen += theirs._read_log()
+    seen += theirs._read_log()
+    assert os.path.exists(ours.log_path + ".1")
+    assert [entry["pattern"] for entry in seen] == [f"*{n}*" for n in range(10)]
+
+def test_keys_match_by_namespace_and_pattern():
+    key = "get_adp:[('format', 'ppr')]"
+    assert matches(key, "get_adp", None)
+    assert not matches(key, "get_news", None)
+    assert matches(key, None, "*ppr*") and not matches(key, "get_adp", "*half*")
+
+def test_published_documents_are_shared_until_invalidated(workers):
+    ours, theirs = workers
+    ours.publish("adp:[]", b'{"players": []}')
+    assert theirs.load_recent("adp:[]", max_age=30) == b'{"players": []}'
+    assert theirs.load_recent("news:[]", max_age=30) is None
+    theirs.invalidated_at = time.time()
+    assert theirs.load_recent("adp:[]", max_age=30) is None
+
+def test_shared_key_is_scoped_to_the_upstream(monkeypatch):
+    service = NFLService()
+    key = service._shared_key("adp:[]")
+    assert NFLService()._shared_key("adp:[]") == key
+    assert service.api_key not in key
+
+    staging = NFLService()
+    staging.base_url = "http://localhost:9000/mock"
+    assert staging._shared_key("adp:[]") != key
+    monkeypatch.setattr(settings, "UPSTREAM_MODE", "record")
+    assert service._shared_key("adp:[]") != key
+
+@pytest.mark.skipif(fcntl is None, reason="needs flock")
+def test_refresh_lock_is_held_by_one_worker(workers):
+    ours, theirs = workers
+
+    async def run():
+        order = []
+
+        async def hold(coordinator, name):
+            async with coordinator.refresh_lock("adp:[]", wait=5):
+                order.append(f"{name} in")
+                await asyncio.sleep(0.1)
+                order.append(f"{name} out")
+
+        await asyncio.gather(hold(ours, "ours"), hold(theirs, "theirs"))
+        return order
+
+    assert asyncio.run(run()) in (["ours in", "ours out", "theirs in", "theirs out"],
+                                  ["theirs in", "theirs out", "ours in", "ours out"])
+
+@pytest.mark.skipif(fcntl is None, reason="needs flock")
+def test_lock_file_swept_while_being_locked_is_not_shared(workers, monkeypatch):
+    ours, theirs = workers
+    path = os.path.join(ours.directory, "locks", f"{ours._digest('adp:[]')}.lock")
+    real_flock = fcntl.flock
+    swept = []
+
+    def flock(fd, operation):
+        if not swept and os.path.exists(path):
+            # The sweep runs between our open and our flock, deleting the idle lock file
+            swept.append(True)
+            os.utime(path, (0, 0))
+            theirs.cleanup()
+            assert not os.path.exists(path)
+        real_flock(fd, operation)
+
+    monkeypatch.setattr(cluster_module.fcntl, "flock", flock)
+
+    async def run():
+        async with ours.refresh_lock("adp:[]", wait=1):
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                with pytest.raises(BlockingIOError):
+                    real_flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            finally:
+                os.close(fd)
+
+    asyncio.run(run())
+    assert swept
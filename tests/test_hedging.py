@@ -0,0 +1,135 @@
+import asyncio
+import httpx
+from fastapi.testclient import TestClient
+from App.core.config import settings
+from App.core.request_context import deadline_scope, DEADLINE_HEADER
+from App.services import hedging, nfl_service
+from App.services.api_client import NFLApiClient
+from App.services.hedging import LatencyTracker
+from App.services.nfl_service import NFLService
+
+def test_budget_accrues_per_request_and_is_capped():
+    tracker = LatencyTracker(percentile=95, min_samples=1, max_hedge_rate=0.5)
+    tracker.hedge_delay()
+    assert not tracker.take_hedge()
+    tracker.hedge_delay()
+    assert tracker.take_hedge()
+    assert not tracker.can_hedge()
+    for _ in range(100):
+        tracker.hedge_delay()
+    assert tracker.hedge_budget == 10.0  # idle periods can't bank a burst
+
+def test_no_hedging_before_enough_samples():
+    tracker = LatencyTracker(percentile=50, min_samples=3, max_hedge_rate=1.0)
+    tracker.record(0.2)
+    tracker.record(0.4)
+    assert tracker.hedge_delay() is None
+    tracker.record(0.1)
+    assert tracker.hedge_delay() == 0.2
+
+class SlowUpstream:
+    """Answers the first request after a delay and every later one at once"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.requests = 0
+
+    async def __call__(self, request):
+        self.requests += 1
+        if self.requests == 1:
+            await asyncio.sleep(self.delay)
+        return httpx.Response(200, json={"request": self.requests})
+
+def use_upstream(monkeypatch, respond):
+    real_client = httpx.AsyncClient
+
+    class Client(real_client):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = httpx.MockTransport(respond)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(nfl_service.httpx, "AsyncClient", Client)
+
+def slow_endpoint(monkeypatch, endpoint, budget):
+    tracker = LatencyTracker(percentile=50, min_samples=1, max_hedge_rate=1.0)
+    tracker.record(0.01)
+    tracker.hedge_budget = budget
+    monkeypatch.setitem(hedging.latency_trackers, endpoint, tracker)
+    return tracker
+
+def hedged_get(endpoint):
+    return asyncio.run(NFLService()._hedged_get(endpoint, f"https://upstream.test/{endpoint}", {}, 5.0))
+
+def test_slow_request_is_hedged_and_the_hedge_wins(monkeypatch):
+    tracker = slow_endpoint(monkeypatch, "hedge-sent", budget=0.0)
+    upstream = SlowUpstream(delay=1.0)
+    use_upstream(monkeypatch, upstream)
+    response = hedged_get("hedge-sent")
+    assert response.json() == {"request": 2}
+    assert tracker.hedge_budget == 0.0  # earned 1 from this request, spent 1 on the hedge
+
+def test_budget_is_kept_when_no_limiter_token_is_free(monkeypatch):
+    tracker = slow_endpoint(monkeypatch, "hedge-throttled", budget=0.0)
+    upstream = SlowUpstream(delay=0.1)
+    use_upstream(monkeypatch, upstream)
+
+    async def no_token(priority=None):
+        return False
+
+    monkeypatch.setattr(nfl_service.fantasy_nerds_limiter, "try_acquire", no_token)
+    response = hedged_get("hedge-throttled")
+    assert response.json() == {"request": 1}
+    assert upstream.requests == 1
+    assert tracker.hedge_budget == 1.0
+
+def test_no_token_is_taken_without_budget(monkeypatch):
+    tracker = slow_endpoint(monkeypatch, "hedge-unfunded", budget=-1.0)
+    upstream = SlowUpstream(delay=0.1)
+    use_upstream(monkeypatch, upstream)
+    asked = []
+
+    async def token(priority=None):
+        asked.append(priority)
+        return True
+
+    monkeypatch.setattr(nfl_service.fantasy_nerds_limiter, "try_acquire", token)
+    hedged_get("hedge-unfunded")
+    assert asked == [] and upstream.requests == 1
+
+def test_api_client_sends_the_remaining_deadline(monkeypatch):
+    sent = []
+
+    def respond(request):
+        sent.append((request.headers.get(DEADLINE_HEADER), request.extensions["timeout"]["read"]))
+        return httpx.Response(200, json=[])
+
+    async def call():
+        client = NFLApiClient("http://api.test")
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+        await client._get("/nfl/teams")
+        with deadline_scope(2.0):
+            await client._get("/nfl/teams")
+
+    asyncio.run(call())
+    assert sent[0] == (None, 5.0)
+    header, timeout = sent[1]
+    assert 1.5 < float(header) <= 2.0
+    assert timeout <= 2.0
+
+TEAM = {"team_code": "KC", "team_name": "Kansas City Chiefs", "logo_small": "", "logo_medium": "",
+        "logo_standard": "", "logo_helmet": ""}
+
+def test_incoming_deadline_bounds_the_upstream_timeout(monkeypatch):
+    import main
+    timeouts = []
+
+    def respond(request):
+        timeouts.append(request.extensions["timeout"]["read"])
+        return httpx.Response(200, json=[TEAM])
+
+    use_upstream(monkeypatch, respond)
+    client = TestClient(main.app)
+    response = client.get("/nfl/teams", headers={DEADLINE_HEADER: "1.5"})
+    assert response.status_code == 200
+    assert len(timeouts) == 1
+    assert 0 < timeouts[0] <= 1.5 < settings.UPSTREAM_TIMEOUT
@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from App.services import LLm_service
+from App.services.LLm_service import LLMService, Completion, llm_usage
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(LLm_service, "llm_cache", {})
+    monkeypatch.setattr(LLm_service, "llm_inflight", {})
+    service = LLMService()
+    service.calls = 0
+
+    async def request_completion(headers, payload, cache_key, now):
+        service.calls += 1
+        await asyncio.sleep(0.05)
+        return Completion(f"answer {service.calls}", tokens=100)
+
+    monkeypatch.setattr(service, "_request_completion", request_completion)
+    return service
+
+CONTEXT = {"query_type": "standings", "standings": {"conferences": []}}
+
+def test_concurrent_identical_prompts_share_one_completion(service):
+    async def scenario():
+        return await asyncio.gather(*(service.generate_response("Who leads the AFC?", CONTEXT) for _ in range(5)))
+    assert asyncio.run(scenario()) == ["answer 1"] * 5
+    assert service.calls == 1
+    assert not LLm_service.llm_inflight
+
+def test_different_prompts_are_not_coalesced(service):
+    async def scenario():
+        return await asyncio.gather(service.generate_response("Who leads the AFC?", CONTEXT),
+                                    service.generate_response("Who leads the NFC?", CONTEXT))
+    asyncio.run(scenario())
+    assert service.calls == 2
+
+def test_cancelled_waiter_does_not_cancel_the_shared_completion(service):
+    async def scenario():
+        first = asyncio.ensure_future(service.generate_response("Who leads the AFC?", CONTEXT))
+        second = asyncio.ensure_future(service.generate_response("Who leads the AFC?", CONTEXT))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+    assert asyncio.run(scenario()) == ("answer 1", True)
+    assert service.calls == 1
+
+def test_usage_is_reported_to_every_coalesced_caller(service):
+    async def ask():
+        usage = {"tokens": 0, "failed": False}
+        llm_usage.set(usage)
+        await service.generate_response("Who leads the AFC?", CONTEXT)
+        return usage
+
+    async def scenario():
+        return await asyncio.gather(ask(), ask())
+    assert [usage["tokens"] for usage in asyncio.run(scenario())] == [100, 100]
+
+def test_repeated_question_skips_summarization(service, monkeypatch):
+    summarized = []
+    summarize = service._summarize_context_data
+    monkeypatch.setattr(service, "_summarize_context_data",
+                        lambda data, cache=None: summarized.append(1) or summarize(data, cache))
+    assert asyncio.run(service.generate_response("Who leads the AFC?", CONTEXT)) == "answer 1"
+    assert asyncio.run(service.generate_response("Who leads the AFC?", CONTEXT)) == "answer 1"
+    assert len(summarized) == 1
+    assert service.calls == 1
+
+def test_failed_completions_are_not_cached(service, monkeypatch):
+    async def failing(headers, payload, cache_key, now):
+        service.calls += 1
+        return Completion("Rate limit exceeded. Please try again later.", failed=True)
+    monkeypatch.setattr(service, "_request_completion", failing)
+    for _ in range(2):
+        asyncio.run(service.generate_response("Who leads the AFC?", CONTEXT))
+    assert service.calls == 2
+
+def test_summary_cache_is_keyed_on_the_source_object(service):
+    cache = {}
+    calls = []
+
+    def summarizer(data):
+        calls.append(data)
+        return {"size": len(data)}
+    summarizer.__name__ = "summarizer"
+
+    first, second = [1, 2], [1, 2, 3]
+    assert service._summarize_source(first, summarizer, cache) == {"size": 2}
+    assert service._summarize_source(first, summarizer, cache) == {"size": 2}
+    assert service._summarize_source(second, summarizer, cache) == {"size": 3}
+    assert len(calls) == 2
+    # An entry whose id now belongs to a different object is recomputed
+    cache[(summarizer.__name__, id(second))] = ([9], {"size": 1})
+    assert service._summarize_source(second, summarizer, cache) == {"size": 3}
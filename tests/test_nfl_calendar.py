@@ -0,0 +1,80 @@
+import datetime
+from zoneinfo import ZoneInfo
+import pytest
+from App.services.nfl_calendar import NFLCalendar
+
+EASTERN = ZoneInfo("America/New_York")
+
+def at(text: str) -> float:
+    return datetime.datetime.fromisoformat(text).replace(tzinfo=EASTERN).timestamp()
+
+def game(week, scheduled, season_type=None):
+    row = {"id": f"{week}-{scheduled}", "week": week, "scheduled": scheduled,
+           "home": {"alias": "KC"}, "away": {"alias": "BAL"}}
+    if season_type:
+        row["season_type"] = season_type
+    return row
+
+SCHEDULE_2024 = {"year": 2024, "type": "REG", "games": [
+    game(1, "2024-09-05T20:20:00"),
+    game(1, "2024-09-08T13:00:00"),
+    game(1, "2024-09-08T16:25:00"),
+    game(2, "2024-09-12T20:15:00"),
+    game(18, "2025-01-05T13:00:00"),
+    game(22, "2025-02-09T18:30:00", "PST"),  # Super Bowl
+]}
+
+@pytest.fixture
+def calendar():
+    calendar = NFLCalendar()
+    calendar.load_schedule(SCHEDULE_2024)
+    return calendar
+
+@pytest.mark.parametrize("moment, expected", [
+    ("2024-08-20T12:00:00", (2024, 0)),
+    ("2024-09-05T21:00:00", (2024, 1)),
+    ("2024-09-09T23:00:00", (2024, 1)),  # Monday night still belongs to week 1
+    ("2024-09-10T00:00:00", (2024, 2)),  # weeks start on Tuesday
+    ("2024-10-01T12:00:00", (2024, 5)),  # weeks missing from the schedule are counted on
+    ("2025-01-10T12:00:00", (2024, 19)),  # postseason weeks continue the count
+])
+def test_week_from_schedule(calendar, moment, expected):
+    assert calendar.week(at(moment)) == expected
+
+@pytest.mark.parametrize("moment, expected", [
+    ("2024-05-01T12:00:00", "offseason"),
+    ("2024-08-20T12:00:00", "preseason"),
+    ("2024-10-01T12:00:00", "regular"),
+    ("2025-01-20T12:00:00", "postseason"),
+    ("2025-02-09T20:00:00", "postseason"),
+    ("2025-02-20T12:00:00", "offseason"),  # after the Super Bowl
+])
+def test_phase_from_schedule(calendar, moment, expected):
+    assert calendar.phase(at(moment)) == expected
+
+@pytest.mark.parametrize("moment, expected_week, expected_phase", [
+    ("2026-08-15T12:00:00", (2026, 0), "preseason"),
+    ("2026-09-10T20:00:00", (2026, 1), "regular"),  # Labor Day 2026 is September 7
+    ("2026-09-15T12:00:00", (2026, 2), "regular"),
+    ("2027-01-19T12:00:00", (2026, 20), "postseason"),
+    ("2027-04-01T12:00:00", (2027, 0), "offseason"),
+])
+def test_week_and_phase_are_approximated_without_a_schedule(moment, expected_week, expected_phase):
+    calendar = NFLCalendar()
+    assert calendar.week(at(moment)) == expected_week
+    assert calendar.phase(at(moment)) == expected_phase
+
+def test_another_seasons_schedule_is_not_used(calendar):
+    now = at("2026-10-19T13:30:00")
+    assert calendar.week(now) == NFLCalendar().week(now)
+    assert calendar.kickoff_windows(week=1, timestamp=now) == []
+    assert not calendar.in_game_window(now)
+
+def test_kickoff_windows_merge_overlapping_games(calendar, monkeypatch):
+    monkeypatch.setattr("App.services.nfl_calendar.settings.NFL_GAME_WINDOW_MINUTES", 210)
+    windows = calendar.kickoff_windows(week=1, timestamp=at("2024-09-08T12:00:00"))
+    assert windows == [
+        (at("2024-09-05T20:20:00"), at("2024-09-05T23:50:00")),
+        (at("2024-09-08T13:00:00"), at("2024-09-08T19:55:00")),
+    ]
+    assert calendar.in_game_window(at("2024-09-08T17:00:00"))
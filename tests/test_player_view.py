@@ -0,0 +1,103 @@
+import time
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from App.services import player_view as player_view_module
+from App.services.nfl_service import UpstreamPayload
+from App.services.player_view import PlayerView, PROFILE_SOURCES, _index_players, _index_depth, _index_news, _on_refresh
+
+ROSTER = [
+    {"playerId": 1, "name": "Patrick Mahomes", "team": "KC", "position": "QB"},
+    {"playerId": 2, "name": "Travis Kelce", "team": "KC", "position": "TE"},
+    {"playerId": 3, "name": "Josh Allen", "team": "BUF", "position": "QB"},
+]
+DEPTH = {"charts": {"KC": {"QB": [{"playerId": 1, "name": "Patrick Mahomes"}], "TE": [{"playerId": 2, "depth": 1}]}}}
+NEWS = [
+    {"article_link": "old", "article_date": "2024-09-01", "playerIds": [1]},
+    {"article_link": "new", "article_date": "2024-09-08", "playerIds": [1, 3]},
+]
+
+@pytest.fixture
+def view():
+    view = PlayerView()
+    view.update("bio", _index_players(ROSTER))
+    view.update("draft_rankings", _index_players({"players": [{"playerId": 1, "rank": 2}, {"playerId": 9, "name": "Rookie", "rank": 90}]}))
+    view.update("depth_chart", _index_depth(DEPTH))
+    view.update("news", _index_news({"news": NEWS}))
+    return view
+
+def test_profiles_join_every_source(view):
+    profile = view.get(1)
+    assert (profile["name"], profile["team"], profile["position"]) == ("Patrick Mahomes", "KC", "QB")
+    assert profile["draft_rankings"] == {"playerId": 1, "rank": 2}
+    assert profile["depth_chart"] == {"team": "KC", "position": "QB", "depth": 1}
+    assert [article["article_link"] for article in profile["news"]] == ["new", "old"]
+    assert "injury" not in profile
+    assert view.get("3")["news"][0]["article_link"] == "new"
+
+def test_identity_falls_back_to_other_sources(view):
+    assert view.get(9)["name"] == "Rookie"  # not on the roster yet
+    assert view.get(9)["team"] is None
+
+def test_only_players_whose_records_changed_are_rebuilt(view, monkeypatch):
+    rebuilt = []
+    original = view._rebuild
+    monkeypatch.setattr(view, "_rebuild", lambda player_ids: rebuilt.append(set(player_ids)) or original(player_ids))
+    unchanged_profile = view.get(3)
+
+    view.update("bio", _index_players([ROSTER[0], {**ROSTER[1], "team": "NYJ"}, ROSTER[2]]))
+    assert rebuilt == [{"2"}]
+    assert view.get(2)["bio"]["team"] == "NYJ"
+    assert view.get(3) is unchanged_profile
+
+    view.update("draft_rankings", _index_players([{"playerId": 1, "rank": 2}]))
+    assert rebuilt[-1] == {"9"}
+    assert view.get(9) is None  # no source has the player any more
+
+def test_sections_to_load_are_tried_once_per_interval():
+    view = PlayerView()
+    view.update("bio", _index_players(ROSTER))
+    due = view.sections_to_load()
+    assert "players" not in due and set(due) == set(PROFILE_SOURCES) - {"players"}
+    assert view.sections_to_load() == []
+
+def test_only_the_default_view_of_a_source_contributes(monkeypatch):
+    view = PlayerView()
+    monkeypatch.setattr(player_view_module, "player_view", view)
+
+    def refresh(endpoint, params, data):
+        apply = _on_refresh(endpoint, params, UpstreamPayload(orjson.dumps(data)))
+        if apply is not None:
+            apply()
+
+    refresh("adp", {"teams": 10}, [{"playerId": 1, "adp": 4.0}])
+    assert view.get(1) is None
+    refresh("adp", {}, [{"playerId": 1, "adp": 3.0}])
+    assert view.get(1)["adp"]["adp"] == 3.0
+    # The default roster (active players) is cut from the roster including inactive players
+    refresh("players", {"include_inactive": 1}, [{"playerId": 5, "active": "1"}, {"playerId": 6, "active": "0"}])
+    assert view.get(5)["bio"]["playerId"] == 5
+    assert view.get(6) is None
+
+def test_profile_routes_filter_the_view(view, monkeypatch):
+    import main
+    from App.api import api_routes
+    for endpoint in PROFILE_SOURCES:
+        view.attempted_at[endpoint] = time.time()  # nothing to load on demand
+    monkeypatch.setattr(api_routes, "player_view", view)
+    client = TestClient(main.app)
+
+    assert client.get("/nfl/players/2/profile").json()["name"] == "Travis Kelce"
+    assert client.get("/nfl/players/404/profile").status_code == 404
+
+    def ids(**params):
+        body = client.get("/nfl/player-profiles", params=params).json()
+        assert body["count"] == len(body["profiles"])
+        assert set(body["sources"]) == {"bio", "draft_rankings", "depth_chart", "news"}
+        return sorted(profile["playerId"] for profile in body["profiles"])
+
+    assert ids() == ["1", "2", "3", "9"]
+    assert ids(team="kc") == ["1", "2"]
+    assert ids(position="QB") == ["1", "3"]
+    assert ids(team="KC", position="qb") == ["1"]
+    assert ids(ids="3, 2,404") == ["2", "3"]
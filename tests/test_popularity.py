@@ -0,0 +1,75 @@
+import pytest
+from App.services import popularity as popularity_module
+from App.services.popularity import PopularityTracker
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(popularity_module, "time", clock)
+    return clock
+
+async def refresh():
+    pass
+
+def test_each_access_counts_one_now(clock):
+    tracker = PopularityTracker(half_life=60, max_keys=10)
+    for _ in range(3):
+        tracker.record("a", refresh)
+    assert tracker.score("a") == pytest.approx(3)
+    assert tracker.score("missing") == 0
+
+def test_accesses_decay_with_the_half_life(clock):
+    tracker = PopularityTracker(half_life=60, max_keys=10)
+    tracker.record("a", refresh)
+    clock.now += 60
+    assert tracker.score("a") == pytest.approx(0.5)
+    tracker.record("a", refresh)
+    clock.now += 120
+    assert tracker.score("a") == pytest.approx(0.375)
+
+def test_top_ranks_recent_traffic_first(clock):
+    tracker = PopularityTracker(half_life=60, max_keys=10)
+    for _ in range(3):
+        tracker.record("old", refresh)
+    clock.now += 180
+    for _ in range(2):
+        tracker.record("new", refresh)
+    tracker.record("once", refresh)
+    assert [key for key, _ in tracker.top(2)] == ["new", "once"]
+    assert dict(tracker.top(3))["old"] == pytest.approx(3 / 8)
+
+def test_weights_are_rescaled_without_changing_scores(clock):
+    tracker = PopularityTracker(half_life=1, max_keys=10)
+    tracker.record("a", refresh)
+    clock.now += 30
+    tracker.record("a", refresh)
+    clock.now += 61
+    tracker.record("b", refresh)  # exponent past 60: rescaled to a new landmark
+    assert tracker.landmark == clock.now
+    assert tracker.score("b") == pytest.approx(1)
+    assert "a" not in tracker.weights  # decayed to nothing and dropped
+    assert set(tracker.refreshers) == {"b"}
+
+def test_least_popular_keys_make_room(clock):
+    tracker = PopularityTracker(half_life=60, max_keys=10)
+    for i in range(10):
+        for _ in range(i + 1):
+            tracker.record(f"key{i}", refresh)
+    tracker.record("newcomer", refresh)
+    assert len(tracker.weights) == 10
+    assert "key0" not in tracker.weights and "key0" not in tracker.refreshers
+    assert "newcomer" in tracker.weights
+
+def test_forget_drops_a_key(clock):
+    tracker = PopularityTracker(half_life=60, max_keys=10)
+    tracker.record("a", refresh)
+    tracker.forget("a")
+    tracker.forget("never recorded")
+    assert tracker.score("a") == 0 and "a" not in tracker.refreshers
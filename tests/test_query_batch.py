@@ -0,0 +1,98 @@
+import asyncio
+import collections
+import pytest
+from fastapi.testclient import TestClient
+from App.core.config import settings
+from App.services import Nfl_query_service
+from App.services.Nfl_query_service import NFLQueryService
+from App.services.query_jobs import QueryJobs, JOB_DONE
+
+class CountingApiClient:
+    """Stands in for the NFL API client, counting the calls made for each source"""
+
+    def __init__(self):
+        self.calls = collections.Counter()
+
+    def __getattr__(self, name):
+        async def call(*args, **kwargs):
+            self.calls[(name, args, tuple(sorted(kwargs.items())))] += 1
+            await asyncio.sleep(0.01)
+            return [{"source": name}] if name == "get_teams" else {"source": name}
+
+        return call
+
+class SlowLLM:
+    """Answers after a short delay, recording the most calls in progress at once"""
+
+    def __init__(self):
+        self.active = 0
+        self.most_active = 0
+        self.summary_caches = set()
+
+    async def generate_response(self, query, context_data, summary_cache=None):
+        self.summary_caches.add(id(summary_cache))
+        self.active += 1
+        self.most_active = max(self.most_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.active -= 1
+        return f"answer to {query}"
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(Nfl_query_service.nfl_calendar, "ensure_fresh", lambda: None)
+    service = NFLQueryService()
+    service.api_client = CountingApiClient()
+    service.llm_service = SlowLLM()
+    return service
+
+QUESTIONS = [
+    "Who are the top quarterbacks?",
+    "Who are the top running backs?",
+    "What's the injury status for the Chiefs?",
+    "What's the injury status for the Chiefs?",
+    "Who are the top wide receivers?",
+    "What's the injury status for the Packers?",
+]
+
+def test_each_source_is_fetched_once_per_batch(service):
+    results = asyncio.run(service.process_batch(QUESTIONS * 5))
+    assert [result["answer"] for result in results] == [f"answer to {query}" for query in QUESTIONS * 5]
+    assert service.api_client.calls
+    assert set(service.api_client.calls.values()) == {1}
+    assert len(service.llm_service.summary_caches) == 1  # every answer shares the batch's summaries
+
+def test_llm_calls_are_bounded_by_the_batch_concurrency(service, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BATCH_LLM_CONCURRENCY", 3)
+    asyncio.run(service.process_batch(QUESTIONS * 4))
+    assert service.llm_service.most_active == 3
+
+def test_batch_job_answers_the_questions_together(service, tmp_path):
+    jobs = QueryJobs(str(tmp_path), max_jobs=10, ttl=60)
+    batches = []
+
+    async def process_batch(queries):
+        batches.append(queries)
+        return await service.process_batch(queries)
+
+    async def run():
+        jobs.start(service.process_query, process_batch)
+        try:
+            job = await jobs.submit(None, QUESTIONS)
+            return await jobs.wait(job, 5)
+        finally:
+            await jobs.stop()
+
+    job = asyncio.run(run())
+    assert job.status == JOB_DONE
+    assert batches == [QUESTIONS]
+    assert [result["query"] for result in job.result["results"]] == QUESTIONS
+    assert set(service.api_client.calls.values()) == {1}
+
+def test_batch_job_size_is_checked_before_queueing(monkeypatch):
+    import main
+    monkeypatch.setattr(settings, "QUERY_BATCH_JOB_MAX_QUERIES", 2)
+    client = TestClient(main.app)
+    assert client.post("/nfl/query/batch/jobs", json={"queries": ["a", "b", "c"]}).status_code == 422
+    assert client.post("/nfl/query/batch/jobs", json={"queries": []}).status_code == 422
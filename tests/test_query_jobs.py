@@ -0,0 +1,87 @@
+import os
+import asyncio
+import pytest
+from App.core.config import settings
+from App.services.admission import Overloaded
+from App.services.query_jobs import QueryJobs, JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED
+
+@pytest.fixture
+def jobs(tmp_path):
+    return QueryJobs(str(tmp_path), max_jobs=3, ttl=60)
+
+def pending(jobs):
+    return sorted(os.listdir(os.path.join(jobs.directory, "pending")))
+
+def test_a_job_is_claimed_by_one_worker(jobs):
+    job = jobs._create("Who are the top quarterbacks?")
+    other_worker = QueryJobs(jobs.directory, max_jobs=3, ttl=60)
+    claimed, fd = jobs._claim(job.id)
+    try:
+        assert claimed.status == JOB_RUNNING
+        assert jobs._read(job.id).status == JOB_RUNNING
+        assert pending(jobs) == []
+        assert other_worker._claim(job.id) is None
+    finally:
+        os.close(fd)
+    assert other_worker._claim(job.id) is None  # no longer queued
+
+def test_pending_jobs_are_claimed_oldest_first(jobs):
+    first = jobs._create("first")
+    second = jobs._create("second")
+    other_worker = QueryJobs(jobs.directory, max_jobs=3, ttl=60)
+    claims = [other_worker._claim_pending(), other_worker._claim_pending()]
+    try:
+        assert [job.id for job, _ in claims] == [first.id, second.id]
+        assert other_worker._claim_pending() is None
+    finally:
+        for _, fd in claims:
+            os.close(fd)
+
+def test_running_job_whose_worker_died_is_failed(jobs):
+    job = jobs._create("orphaned")
+    _, fd = jobs._claim(job.id)
+    jobs._prune()
+    assert jobs._read(job.id).status == JOB_RUNNING  # its worker still holds the lock
+    os.close(fd)  # the worker exits without finishing the job
+    jobs._prune()
+    orphaned = jobs._read(job.id)
+    assert orphaned.status == JOB_FAILED
+    assert orphaned.error == "The worker processing this job exited"
+
+def test_full_store_makes_room_from_finished_jobs_only(jobs):
+    finished = jobs._create("finished")
+    job, fd = jobs._claim(finished.id)
+    job.status = JOB_DONE
+    job.finished_at = job.created_at
+    jobs._finish(job, fd)
+    queued = [jobs._create("queued"), jobs._create("queued")]
+
+    newest = jobs._create("newest")  # the finished job makes room
+    assert jobs._read(finished.id) is None
+    assert sorted(jobs._job_ids()) == sorted([queued[0].id, queued[1].id, newest.id])
+
+    with pytest.raises(Overloaded) as error:
+        jobs._create("one too many")
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == str(max(1, int(settings.QUERY_TARGET_WAIT)))
+
+def test_job_in_progress_at_shutdown_is_requeued(jobs):
+    started = asyncio.Event()
+
+    async def process(query):
+        started.set()
+        await asyncio.sleep(60)
+
+    async def run():
+        jobs.start(process)
+        job = await jobs.submit("interrupted")
+        await asyncio.wait_for(started.wait(), 5)
+        await jobs.stop()
+        return job
+
+    job = asyncio.run(run())
+    assert jobs._read(job.id).status == JOB_QUEUED
+    assert pending(jobs) == [jobs._pending_name(job)]
+    claimed, fd = QueryJobs(jobs.directory, max_jobs=3, ttl=60)._claim(job.id)  # the lock was released
+    os.close(fd)
+    assert claimed.query == "interrupted"
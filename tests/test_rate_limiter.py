@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from App.services.rate_limiter import TokenBucketLimiter, PRIORITY_USER, PRIORITY_QUERY, PRIORITY_BACKGROUND
+
+@pytest.fixture
+def limiter(tmp_path):
+    return TokenBucketLimiter(
+        rate_per_minute=60, burst=10, state_file=str(tmp_path / "bucket.bin"),
+        background_reserve=0.3, query_reserve=0.1,
+        user_max_wait=2, query_max_wait=5, background_max_wait=30,
+    )
+
+async def take_all(limiter, priority):
+    taken = 0
+    while await limiter.try_acquire(priority):
+        taken += 1
+    return taken
+
+def test_each_priority_stops_at_its_floor(limiter):
+    async def scenario():
+        return [await take_all(limiter, priority) for priority in (PRIORITY_BACKGROUND, PRIORITY_QUERY, PRIORITY_USER)]
+    # Background leaves 3 tokens, queries leave 1 for the data routes
+    assert asyncio.run(scenario()) == [7, 2, 1]
+
+def test_acquire_waits_for_a_refill_within_the_max_wait(tmp_path):
+    limiter = TokenBucketLimiter(rate_per_minute=6000, burst=1, state_file=str(tmp_path / "bucket.bin"))
+
+    async def scenario():
+        await limiter.acquire(PRIORITY_USER)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await limiter.acquire(PRIORITY_USER)
+        return loop.time() - started
+    assert 0.005 < asyncio.run(scenario()) < 0.5
+
+def test_penalty_drains_the_bucket_and_sets_retry_after(limiter):
+    async def scenario():
+        await limiter.penalize(5)
+        assert not await limiter.try_acquire(PRIORITY_USER)
+        with pytest.raises(HTTPException) as error:
+            await limiter.acquire(PRIORITY_USER)
+        return error.value
+    error = asyncio.run(scenario())
+    assert error.status_code == 429
+    # One token a second: 5 seconds of penalty plus the token itself
+    assert error.headers["Retry-After"] == "6"
+
+def test_bucket_is_shared_through_the_state_file(limiter):
+    other_worker = TokenBucketLimiter(rate_per_minute=60, burst=10, state_file=limiter.state_file)
+
+    async def scenario():
+        await take_all(limiter, PRIORITY_USER)
+        return await other_worker.try_acquire(PRIORITY_USER)
+    assert asyncio.run(scenario()) is False
+
+def test_disabled_limiter_always_grants(tmp_path):
+    limiter = TokenBucketLimiter(rate_per_minute=0, burst=1, state_file=str(tmp_path / "bucket.bin"))
+
+    async def scenario():
+        await limiter.acquire()
+        return await limiter.try_acquire()
+    assert asyncio.run(scenario()) is True
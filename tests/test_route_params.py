@@ -0,0 +1,58 @@
+import inspect
+import pytest
+from fastapi import HTTPException
+from App.api.route_params import canonical_params
+
+async def get_adp(teams: int = 12, format: str = "std"):
+    pass
+
+async def get_fantasy_leaders(format: str = "std", position: str = "ALL", week: int = 0):
+    pass
+
+async def get_dfs(slate_id: str):
+    pass
+
+def canonical(func, *args, **kwargs):
+    return canonical_params(func.__name__, inspect.signature(func), args, kwargs)
+
+def test_defaults_are_filled_in():
+    assert canonical(get_adp) == {"teams": 12, "format": "std"}
+
+def test_equivalent_calls_share_one_canonical_form():
+    expected = canonical(get_adp, teams=12, format="ppr")
+    assert canonical(get_adp, 12, "ppr") == expected
+    assert canonical(get_adp, format=" PPR ") == expected
+
+def test_values_are_normalized_per_parameter():
+    assert canonical(get_fantasy_leaders, position="wr", week="3") == {"format": "std", "position": "WR", "week": 3}
+    assert canonical(get_dfs, " main-1 ") == {"slate_id": "main-1"}
+
+@pytest.mark.parametrize("kwargs", [
+    {"teams": 11},
+    {"teams": "twelve"},
+    {"format": "dynasty"},
+])
+def test_invalid_values_are_rejected(kwargs):
+    with pytest.raises(HTTPException) as error:
+        canonical(get_adp, **kwargs)
+    assert error.value.status_code == 422
+    assert repr(next(iter(kwargs))) in error.value.detail
+
+def test_out_of_range_and_malformed_values_are_rejected():
+    with pytest.raises(HTTPException):
+        canonical(get_fantasy_leaders, week=19)
+    with pytest.raises(HTTPException):
+        canonical(get_dfs, "../slates")
+
+def test_missing_and_unknown_parameters_are_rejected():
+    with pytest.raises(HTTPException) as error:
+        canonical(get_dfs)
+    assert error.value.status_code == 422
+    with pytest.raises(HTTPException) as error:
+        canonical(get_adp, scoring="ppr")
+    assert error.value.status_code == 422
+
+def test_routes_without_rules_are_only_bound():
+    async def get_news(limit: int = 10):
+        pass
+    assert canonical(get_news, limit="5") == {"limit": "5"}
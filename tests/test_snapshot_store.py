@@ -0,0 +1,84 @@
+import os
+import datetime
+import pytest
+from fastapi.testclient import TestClient
+from App.core.config import settings
+from App.services.snapshot_store import SnapshotStore
+
+def at(year, month, day):
+    return datetime.datetime(year, month, day, 12).timestamp()
+
+# The 2024 regular season opened the week starting Tuesday, September 3
+WEEK_2 = at(2024, 9, 11)
+WEEK_3 = at(2024, 9, 18)
+LATER = at(2024, 10, 1)
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SNAPSHOT_RETENTION_DAYS", 100 * 365)  # keep the 2024 fixtures
+    return SnapshotStore(str(tmp_path))
+
+def blobs(store, source):
+    return sorted(os.listdir(os.path.join(store.directory, source)))
+
+def test_identical_payloads_are_stored_once(store):
+    store.save("get_adp", {"teams": 12}, b'{"v": 1}', True, fetched_at=WEEK_2)
+    store.save("get_adp", {"teams": 12}, b'{"v": 1}', True, fetched_at=WEEK_3)
+    store.save("get_adp", {"teams": 10}, b'{"v": 1}', True, fetched_at=WEEK_3)
+    assert len(blobs(store, "get_adp")) == 1
+    store.save("get_adp", {"teams": 12}, b'{"v": 2}', True, fetched_at=LATER)
+    assert len(blobs(store, "get_adp")) == 2
+
+def test_as_of_finds_the_latest_snapshot_at_or_before_it(store):
+    store.save("get_adp", {"teams": 12}, b'{"v": 1}', True, fetched_at=WEEK_2)
+    store.save("get_adp", {"teams": 12}, b'{"v": 2}', False, fetched_at=WEEK_3)
+    entry = store.find("get_adp", {"teams": 12}, as_of=WEEK_3 - 1)
+    assert store.load(entry) == b'{"v": 1}' and entry["passthrough"] is True
+    assert store.load(store.find("get_adp", {"teams": 12}, as_of=WEEK_3)) == b'{"v": 2}'
+    assert store.load(store.find("get_adp", {"teams": 12})) == b'{"v": 2}'
+    assert store.find("get_adp", {"teams": 12}, as_of=WEEK_2 - 1) is None
+    assert store.find("get_adp", {"teams": 10}) is None
+
+def test_week_finds_the_latest_snapshot_of_that_week(store):
+    store.save("get_news", {}, b'["early"]', True, fetched_at=WEEK_2)
+    store.save("get_news", {}, b'["late"]', True, fetched_at=WEEK_2 + 86400)
+    store.save("get_news", {}, b'["next"]', True, fetched_at=WEEK_3)
+    assert store.load(store.find("get_news", {}, as_of=LATER, week=2)) == b'["late"]'
+    assert store.load(store.find("get_news", {}, as_of=LATER, week=3)) == b'["next"]'
+    assert store.find("get_news", {}, as_of=LATER, week=1) is None
+    assert store.find("get_news", {}, as_of=at(2025, 9, 20), week=2) is None  # another season
+
+def test_other_workers_entries_are_picked_up(store):
+    store.find("get_news", {})
+    SnapshotStore(store.directory).save("get_news", {}, b"[]", True, fetched_at=WEEK_2)
+    assert store.find("get_news", {}) is not None
+
+def test_compaction_drops_expired_and_repeated_entries(store, monkeypatch):
+    monkeypatch.setattr(settings, "SNAPSHOT_RETENTION_DAYS", 30)
+    now = datetime.datetime.now().timestamp()
+    store.save("get_news", {}, b'["old"]', True, fetched_at=now - 40 * 86400)
+    store.save("get_news", {}, b'["new"]', True, fetched_at=now - 3)
+    store.save("get_news", {}, b'["new"]', True, fetched_at=now - 2)
+    store.compact()
+    with open(store.index_path) as f:
+        assert len(f.readlines()) == 1
+    assert len(blobs(store, "get_news")) == 1
+    reader = SnapshotStore(store.directory)
+    assert reader.find("get_news", {}, as_of=now - 20 * 86400) is None
+    assert reader.find("get_news", {}, as_of=now)["fetched_at"] == now - 3
+
+def test_routes_serve_snapshots_and_404_without_one(store, monkeypatch):
+    import main
+    from App.api import api_routes
+    monkeypatch.setattr(api_routes, "snapshot_store", store)
+    store.save("get_adp", {"teams": 12, "format": "ppr"}, b'{"players": ["stored"]}', True, fetched_at=WEEK_2)
+    client = TestClient(main.app)
+
+    response = client.get("/nfl/adp", params={"format": "ppr", "as_of": "2024-09-20T00:00:00"})
+    assert response.status_code == 200
+    assert response.json() == {"players": ["stored"]}
+    assert response.headers["X-Snapshot-Fetched-At"] == datetime.datetime.fromtimestamp(WEEK_2).isoformat()
+
+    response = client.get("/nfl/adp", params={"format": "ppr", "as_of": "2024-09-01T00:00:00"})
+    assert response.status_code == 404
+    assert client.get("/nfl/adp", params={"format": "half", "as_of": "2024-09-20T00:00:00"}).status_code == 404
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+import pytest
+from App.core.config import settings
+from App.services.ttl_policy import TTLPolicy
+
+@pytest.fixture
+def policy(monkeypatch):
+    monkeypatch.setattr(settings, "ADAPTIVE_TTL_ENABLED", True)
+    monkeypatch.setattr(settings, "ADAPTIVE_TTL_DECREASE", 0.5)
+    monkeypatch.setattr(settings, "ADAPTIVE_TTL_INCREASE", 0.25)
+    policy = TTLPolicy()
+    policy.register("get_news", timedelta(minutes=60), minimum=timedelta(minutes=10), maximum=timedelta(minutes=90))
+    return policy
+
+def minutes(policy, namespace="get_news"):
+    return policy.expiry(namespace, now=0).total_seconds() / 60
+
+def test_first_fetch_of_a_key_keeps_the_base_ttl(policy):
+    policy.observe("get_news", "a", b"one")
+    policy.observe("get_news", "b", b"two")
+    assert minutes(policy) == 60
+
+def test_changed_content_cuts_the_ttl(policy):
+    policy.observe("get_news", "a", b"one")
+    policy.observe("get_news", "a", b"two")
+    assert minutes(policy) == 30
+    policy.observe("get_news", "a", b"three")
+    assert minutes(policy) == 15
+
+def test_unchanged_content_adds_back_a_fraction_of_the_base(policy):
+    policy.observe("get_news", "a", b"one")
+    policy.observe("get_news", "a", b"two")
+    policy.observe("get_news", "a", b"two")
+    assert minutes(policy) == 45
+
+def test_ttl_stays_within_bounds(policy):
+    policy.observe("get_news", "a", b"same")
+    for _ in range(10):
+        policy.observe("get_news", "a", b"same")
+    assert minutes(policy) == 90
+    for i in range(10):
+        policy.observe("get_news", "a", str(i).encode())
+    assert minutes(policy) == 10
+
+def test_keys_are_compared_with_their_own_previous_content(policy):
+    policy.observe("get_news", "a", b"one")
+    policy.observe("get_news", "b", b"two")
+    policy.observe("get_news", "a", b"one")
+    assert minutes(policy) == 75
+
+def test_default_bounds_and_disabled_policy(policy, monkeypatch):
+    policy.register("get_teams", timedelta(hours=24))
+    policy.observe("get_teams", "all", b"one")
+    for i in range(5):
+        policy.observe("get_teams", "all", str(i).encode())
+    assert minutes(policy, "get_teams") == 24 * 60 / 4
+    monkeypatch.setattr(settings, "ADAPTIVE_TTL_ENABLED", False)
+    assert minutes(policy, "get_teams") == 24 * 60
+
+def test_is_fresh_uses_the_adapted_ttl(policy):
+    stored_at = datetime.fromtimestamp(1_000_000)
+    policy.observe("get_news", "a", b"one")
+    policy.observe("get_news", "a", b"two")
+    assert policy.is_fresh("get_news", stored_at, now=1_000_000 + 29 * 60)
+    assert not policy.is_fresh("get_news", stored_at, now=1_000_000 + 31 * 60)
+
+def test_digests_are_kept_for_the_most_recent_keys_only(policy, monkeypatch):
+    monkeypatch.setattr(settings, "ADAPTIVE_TTL_MAX_KEYS", 2)
+    for key in "abc":
+        policy.observe("get_news", key, b"one")
+    assert list(policy.namespaces["get_news"].digests) == ["b", "c"]
+    policy.observe("get_news", "a", b"two")  # forgotten, so not counted as a change
+    assert minutes(policy) == 60
+    policy.observe("get_news", "b", b"one")
+    assert list(policy.namespaces["get_news"].digests) == ["a", "b"]
@@ -0,0 +1,121 @@
+import time
+import asyncio
+import httpx
+from fastapi import HTTPException
+from App.core.config import settings
+from App.services import nfl_service
+from App.services.nfl_service import NFLService, forget_supersets
+from App.services.variants import superset_for
+
+LEADERS = {
+    "format": "ppr",
+    "position": "ALL",
+    "players": [
+        {"name": "QB One", "position": "QB"},
+        {"name": "RB One", "position": "RB"},
+        {"name": "WR One", "position": "WR"},
+        {"name": "TE One", "position": "te"},
+        {"name": "K One", "position": "K"},
+    ],
+}
+
+def test_default_roster_derives_from_roster_with_inactive_players():
+    params, derive = superset_for("players", {})
+    assert params == {"include_inactive": 1}
+    roster = [{"name": "A", "active": "1"}, {"name": "B", "active": "0"}, {"name": "C", "active": True}]
+    assert derive(roster) == [{"name": "A", "active": "1"}, {"name": "C", "active": True}]
+
+def test_roster_without_active_flags_is_not_derived():
+    _, derive = superset_for("players", None)
+    assert derive([{"name": "A"}]) is None
+
+def test_non_default_roster_has_no_superset():
+    assert superset_for("players", {"include_inactive": 1}) is None
+
+def test_position_leaders_derive_from_all_positions():
+    params, derive = superset_for("leaders", {"format": "ppr", "position": "wr"})
+    assert params == {"format": "ppr"}
+    derived = derive(LEADERS)
+    assert [row["name"] for row in derived["players"]] == ["WR One"]
+    assert derived["position"] == "WR"
+    assert LEADERS["position"] == "ALL"  # the superset is left untouched
+
+def test_flex_leaders_are_running_backs_receivers_and_tight_ends():
+    _, derive = superset_for("leaders", {"position": "FLEX"})
+    assert [row["name"] for row in derive(LEADERS)["players"]] == ["RB One", "WR One", "TE One"]
+
+def test_all_and_defensive_leaders_have_no_superset():
+    assert superset_for("leaders", {"position": "ALL"}) is None
+    assert superset_for("leaders", {}) is None
+    assert superset_for("leaders", {"position": "IDP"}) is None
+
+def test_rankings_in_format_are_reordered_and_reranked():
+    params, derive = superset_for("weekly-rankings", {"format": "PPR"})
+    assert params == {}
+    standard = {"format": "std", "players": [
+        {"name": "A", "rank": 1, "standard_points": 20, "ppr_points": 22},
+        {"name": "B", "rank": 2, "standard_points": 18, "ppr_points": 25},
+    ]}
+    derived = derive(standard)
+    assert [(row["name"], row["rank"]) for row in derived["players"]] == [("B", 1), ("A", 2)]
+    assert derived["format"] == "ppr"
+
+def test_rankings_without_format_points_are_not_derived():
+    _, derive = superset_for("draft-rankings", {"format": "half"})
+    assert derive([{"name": "A", "standard_points": 20}]) is None
+
+def test_other_rankings_requests_have_no_superset():
+    assert superset_for("weekly-rankings", {"format": "std"}) is None
+    assert superset_for("weekly-rankings", {"format": "ppr", "week": 3}) is None
+    assert superset_for("draft-rankings", {"format": "superflex"}) is None
+
+def use_upstream(monkeypatch, respond):
+    real_client = httpx.AsyncClient
+
+    class Client(real_client):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = httpx.MockTransport(respond)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(nfl_service.httpx, "AsyncClient", Client)
+    monkeypatch.setattr(settings, "CLUSTER_SHARE_MAX_AGE", 0)
+
+def test_superset_is_fetched_again_after_a_cache_clear(monkeypatch):
+    calls = []
+    roster = [{"playerId": 1, "active": "1"}, {"playerId": 2, "active": "0"}]
+
+    def respond(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json=roster)
+
+    use_upstream(monkeypatch, respond)
+    forget_supersets()
+    assert asyncio.run(NFLService().get_data("players")) == roster[:1]
+    assert asyncio.run(NFLService().get_data("players")) == roster[:1]
+    assert len(calls) == 1  # the second request reused the superset
+    forget_supersets()
+    asyncio.run(NFLService().get_data("players"))
+    assert len(calls) == 2
+
+def test_shared_superset_fetch_outlives_a_short_deadline(monkeypatch):
+    calls = []
+
+    async def respond(request):
+        calls.append(request.url.path)
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json=LEADERS)
+
+    use_upstream(monkeypatch, respond)
+    forget_supersets()
+
+    async def fetch():
+        service = NFLService()
+        return await asyncio.gather(
+            service.get_data("leaders", {"format": "ppr", "position": "WR"}, deadline=time.monotonic() + 0.05),
+            service.get_data("leaders", {"format": "ppr", "position": "RB"}),
+            return_exceptions=True)
+
+    impatient, patient = asyncio.run(fetch())
+    assert isinstance(impatient, HTTPException) and impatient.status_code == 408
+    assert [row["name"] for row in patient["players"]] == ["RB One"]
+    assert len(calls) == 1